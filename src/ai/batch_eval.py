@@ -0,0 +1,84 @@
+import numpy as np
+
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+# Max number of pokemons of a team, shorter teams are padded with healthy pokemons that don't change the value
+TEAM_SIZE = 6
+# Features of each pokemon: hp, max hp, fainted flag, status flag
+POKEMON_FEATURES = 4
+PADDING = [1, 1, False, False]
+# A row has the features of the bot team, then of the opponent team, the boosts of the active bot minus the ones
+# of the active opponent and the matchup terms
+TEAMS_SIZE = 2 * TEAM_SIZE * POKEMON_FEATURES
+ROW_SIZE = TEAMS_SIZE + 2
+
+
+class BatchEvaluator:
+    """Evaluates many battle fields in one vectorized pass, with the same values of Chooser.valuation_action.
+    The search encodes the leaves of a node in rows of numbers and scores them all together.
+    The matchup terms only depend on the active pokemons and the weather, so they are computed once for each
+    signature of them during a search, reset must be called when a new search starts. The signature is built from
+    the content of the pokemons: the fields of the workers are new objects at every job and their ids are reused.
+    """
+
+    def __init__(self, matchup_fn, signature_fn):
+        """
+        :param matchup_fn: Function that returns the matchup terms of the valuation of a field
+        :param signature_fn: Function that returns what the matchup terms of a field depend on, hashable
+        """
+        self.matchup_fn = matchup_fn
+        self.signature_fn = signature_fn
+        self.matchups = {}
+
+    def reset(self):
+        """Forgets the matchups of the previous search"""
+        self.matchups.clear()
+
+    def encode(self, field):
+        """Encodes a battle field in a row of numbers
+        :param field: The battle field
+        :return: A list of ROW_SIZE numbers
+        """
+        row = []
+        for bench in (field.all_pkmns_bot, field.all_pkmns_oppo):
+            for pkmn in bench.values():
+                max_hp = pkmn.stats.real_stats[StatsType.HP]
+                status = pkmn.non_volatile_status
+                row.extend((max_hp - pkmn.stats.damage, max_hp, status is StatusType.Fnt,
+                            status is not StatusType.Normal))
+            row.extend(PADDING * (TEAM_SIZE - len(bench)))
+
+        active_bot = field.active_pokemon_bot
+        active_oppo = field.active_pokemon_oppo
+        row.append(sum(active_bot.stats.mul_stats.values()) - sum(active_oppo.stats.mul_stats.values()))
+
+        matchup_key = self.signature_fn(field)
+        matchup = self.matchups.get(matchup_key)
+        if matchup is None:
+            matchup = self.matchup_fn(field)
+            self.matchups[matchup_key] = matchup
+        row.append(matchup)
+        return row
+
+    @staticmethod
+    def evaluate(rows):
+        """Scores the encoded battle fields
+        :param rows: List of rows returned by encode
+        :return: List of values, one for each row
+        """
+        features = np.array(rows, dtype=np.float64).reshape(-1, ROW_SIZE)
+        pokemons = features[:, :TEAMS_SIZE].reshape(-1, 2, TEAM_SIZE, POKEMON_FEATURES)
+        hp_left = (pokemons[..., 0] / pokemons[..., 1]) * 100
+        fainted = pokemons[..., 2]
+        status = (1 - fainted) * pokemons[..., 3]
+        bot_hp_left, oppo_hp_left = hp_left[:, 0], hp_left[:, 1]
+
+        # Same terms of Chooser.valuation_state
+        valuation = -50 * fainted[:, 0] - 5 * status[:, 0]
+        valuation -= (1 - fainted[:, 0]) * (2 * (bot_hp_left < 75) + 4 * (bot_hp_left < 50) + 8 * (bot_hp_left < 25))
+        valuation += 20 * fainted[:, 1] - 20 * status[:, 1]
+        valuation += 20 * (oppo_hp_left < 75) + 40 * (oppo_hp_left < 50) + 80 * (oppo_hp_left < 25)
+
+        total = valuation.sum(axis=1) + 2 * features[:, TEAMS_SIZE] + features[:, TEAMS_SIZE + 1]
+        return total.astype(np.int64).tolist()
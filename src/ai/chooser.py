@@ -8,68 +8,116 @@ from model.stats_type import StatsType
 from model.status import immune
 from model.pokemon_type import PokemonType
 from ai.iterative_search import IterativeDeepeningMinMax
+from ai.mcts import MonteCarloTreeSearch
+from ai.eval_cache import LRUCache
+from ai.batch_eval import BatchEvaluator
+from ai.ponder import Ponderer
+from ai.matchup_matrix import MatchupMatrix
+from ai.endgame import EndgameSolver, ENDGAME_THRESHOLD
+from ai.tablebase import Tablebase
+from ai.search_stats import SearchStats
 
 logger = logging.getLogger("Chooser")
 
+# Max number of turns that the hard mode looks ahead when the time budget allows it
+HARD_MAX_DEPTH = 8
+# Max number of entries of the caches of valuation_action
+EVALUATION_CACHE_SIZE = 50000
+MATCHUP_CACHE_SIZE = 5000
 
-class Chooser:
 
-    def __init__(self, difficulty):
+class Chooser:
+    # Values of the already evaluated fields and matchups
+    evaluation_cache = LRUCache(EVALUATION_CACHE_SIZE)
+    matchup_cache = LRUCache(MATCHUP_CACHE_SIZE)
+
+    def __init__(self, difficulty, time_budget=3, iterations=None, workers=1, ponder=False,
+                 endgame_threshold=ENDGAME_THRESHOLD, tablebase=None):
+        """
+        :param difficulty: Name of the difficulty
+        :param time_budget: Seconds that the hard and mcts modes can spend searching on each turn
+        :param iterations: Max number of iterations of the mcts mode on each turn, None for no limit
+        :param workers: Number of processes used by the hard mode
+        :param ponder: True to let the hard mode search during the turn of the opponent
+        :param endgame_threshold: Max number of pokemons alive on each side to let the hard mode solve the position
+        exactly, 0 to never do it
+        :param tablebase: Path of the tablebase of the 1v1 endgames built by build_tablebase, None to solve them
+        """
+        self.time_budget = time_budget
+        self.iterations = iterations
+        # The counters of each decision of the hard mode are logged with the hit rates of the caches, the workers
+        # add the ones of their own copies
+        self.search = IterativeDeepeningMinMax(chance_nodes=True, workers=workers,
+                                               batch_evaluator=BatchEvaluator(Chooser.valuation_matchup,
+                                                                              Chooser.matchup_signature),
+                                               stats=SearchStats(Chooser.search_caches()),
+                                               worker_caches=Chooser.search_caches)
+        self.mcts = MonteCarloTreeSearch()
+        self.ponderer = Ponderer(self.search, Chooser.valuation_action, HARD_MAX_DEPTH) if ponder else None
+        self.endgame = EndgameSolver(endgame_threshold, tablebase=Tablebase(tablebase) if tablebase else None) \
+            if endgame_threshold else None
         try:
             self.difficulty = Difficulty[difficulty.capitalize()]
             print("Starting bot with {} mode!".format(difficulty))
         except:
-            print("{} not a supported difficulty!\n Use easy or normal or hard!".format(difficulty))
+            print("{} not a supported difficulty!\n Use easy, normal, hard or mcts!".format(difficulty))
             exit(2)
 
         self.handler_move = {
             Difficulty.Easy: Chooser.__handle_easy_move__,
             Difficulty.Normal: Chooser.__handle_normal_move__,
-            Difficulty.Hard: Chooser.__handle_hard_move__
+            Difficulty.Hard: self.__handle_hard_move__,
+            Difficulty.Mcts: self.__handle_mcts_move__
         }
 
         self.handler_switch = {
             Difficulty.Easy: Chooser.__handle_easy_switch__,
             Difficulty.Normal: Chooser.__handle_normal_switch__,
-            Difficulty.Hard: Chooser.__handle_normal_switch__
+            Difficulty.Hard: self.__handle_hard_switch__,
+            Difficulty.Mcts: Chooser.__handle_normal_switch__
         }
 
     def choose_move(self, field, is_trapped=False):
+        self.stop_pondering()
         return self.handler_move[self.difficulty](field, is_trapped)
 
     def choose_switch(self, field):
+        self.stop_pondering()
         return self.handler_switch[self.difficulty](field)
 
-    @staticmethod
-    def __handle_easy_switch__(field):
-        bot_team = field.all_pkmns_bot
-        valid_switch = {}
-        for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                field.active_pokemon_bot.name != x[1].name,
-                                      bot_team.items())):
-
-            valid_switch[index_pkmn] = 0
-            for pkmn_type in bot_team[index_pkmn].types:
-                for pkmn_type_oppo in field.active_pokemon_oppo.types:
-                    if DamageCalculator.weak_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] += 1
-
-                    if DamageCalculator.weak_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] -= 1
-
-                    if DamageCalculator.resists_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] -= 1
-
-                    if DamageCalculator.resists_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] += 1
+    def ponder(self, field, action):
+        """Starts searching the next turn in background after the bot has sent its action, only in hard mode
+        :param field: The current battle field
+        :param action: Tuple (index, is_move) sent by the bot
+        """
+        if self.ponderer is not None and self.difficulty is Difficulty.Hard:
+            self.ponderer.start(field, action)
+
+    def promote(self, field, bot_action, oppo_name, oppo_is_move):
+        """Tells the hard mode the actions played in the last turn, so that it keeps the subtree of that turn
+        :param field: The battle field after the turn
+        :param bot_action: Tuple (index, is_move) sent by the bot
+        :param oppo_name: Name of the move or of the pokemon chosen by the opponent
+        :param oppo_is_move: True if the opponent used a move, False if it switched
+        """
+        if self.difficulty is Difficulty.Hard:
+            self.stop_pondering()
+            self.search.promote(field, bot_action, oppo_name, oppo_is_move)
+
+    def stop_pondering(self):
+        """Stops the background search, the caches can't be shared with it"""
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
-                    if DamageCalculator.immune_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] += 2
-
-                    if DamageCalculator.immune_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] -= 2
+    @staticmethod
+    def search_caches():
+        """Returns the caches of the evaluation of this process by name, the ones whose hit rates the hard mode logs"""
+        return {"evaluation": Chooser.evaluation_cache, "matchup": Chooser.matchup_cache,
+                "damage": DamageCalculator.cache}
 
-        choosen_switch_index = max(valid_switch.keys(), key=lambda x: valid_switch[x])
+    @staticmethod
+    def __handle_easy_switch__(field):
+        choosen_switch_index = MatchupMatrix.of(field).best_switch(field, easy=True)
         logger.info("Easy-Switch {} with {}!".format(field.active_pokemon_bot, field.all_pkmns_bot[
             choosen_switch_index]))
         return choosen_switch_index
@@ -109,6 +157,11 @@ class Chooser:
         opponent_faster = field.active_pokemon_bot.stats.get_actual(StatsType.Spe) < \
                           field.active_pokemon_oppo.stats.get_actual(StatsType.Spe)
 
+        # damage of every move of both teams, computed once
+        bot_damage, oppo_damage = DamageCalculator.damage_tensors(field)
+        index_bot = field.get_pokemon_index_by_name(1, field.active_pokemon_bot.name)
+        index_oppo = field.get_pokemon_index_by_name(2, field.active_pokemon_oppo.name)
+
         # determine the index of the move with more damage inflicted to the opponent
         moves = field.active_pokemon_bot.get_usable_moves()
         damage = {}
@@ -180,8 +233,7 @@ class Chooser:
                                 str(boost)))
                             return index_move, True
 
-            damage[index_move] = DamageCalculator.calculate(field.weather, field.field, field.active_pokemon_bot,
-                                                            moves[index_move], field.active_pokemon_oppo)
+            damage[index_move] = bot_damage.get(index_bot, index_move, index_oppo)
             bot_has_protect = moves[index_move].move_name == "Protect"
             if bot_has_protect:
                 protect_index = index_move
@@ -198,12 +250,8 @@ class Chooser:
 
         # check if an opponent's move kills the bot
         for index_move in opponent_moves:
-            bot_may_die = (field.active_pokemon_bot.stats.get_actual_hp() - DamageCalculator.calculate(field.weather,
-                                                                                                       field.field,
-                                                                                                       field.active_pokemon_oppo,
-                                                                                                       opponent_moves[
-                                                                                                           index_move],
-                                                                                                       field.active_pokemon_bot)) <= 0
+            bot_may_die = (field.active_pokemon_bot.stats.get_actual_hp() - oppo_damage.get(index_oppo, index_move,
+                                                                                            index_bot)) <= 0
 
         if oppo_is_damaging and bot_may_die and bot_has_protect and opponent_faster:
             logger.info("Selected Protect against {}".format(field.active_pokemon_oppo))
@@ -214,10 +262,7 @@ class Chooser:
             if pkmn != 1:
                 moves_actual = bench_bot[pkmn].moves
                 for move in moves_actual:
-                    if 2 * damage[max_damage_move_index] < DamageCalculator.calculate(field.weather, field.field,
-                                                                                      bench_bot[pkmn],
-                                                                                      moves_actual[move],
-                                                                                      field.active_pokemon_oppo):
+                    if 2 * damage[max_damage_move_index] < bot_damage.get(pkmn, move, index_oppo):
                         logger.info("MoreDamage Switch {} with {}".format(field.active_pokemon_bot,
                                                                           field.all_pkmns_bot[pkmn]))
                         return pkmn, False
@@ -242,75 +287,114 @@ class Chooser:
 
     @staticmethod
     def __handle_normal_switch__(field):
-        bot_team = field.all_pkmns_bot
-        valid_switch = {}
-        for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                field.active_pokemon_bot.name != x[1].name,
-                                      bot_team.items())):
-
-            valid_switch[index_pkmn] = 0
-            for pkmn_type in bot_team[index_pkmn].types:
-                for pkmn_type_oppo in field.active_pokemon_oppo.types:
-                    if DamageCalculator.weak_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] += 1 * 2
-
-                    if DamageCalculator.weak_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] -= 1 * 2
-
-                    if DamageCalculator.resists_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] -= 1 * 2
-
-                    if DamageCalculator.resists_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] += 1 * 2
+        choosen_switch_index = MatchupMatrix.of(field).best_switch(field)
+        logging.info("Switch {} with {}".format(field.active_pokemon_bot, field.all_pkmns_bot[choosen_switch_index]))
+        return choosen_switch_index
 
-                    if DamageCalculator.immune_to(pkmn_type, pkmn_type_oppo):
-                        valid_switch[index_pkmn] += 2 * 2
+    def __handle_hard_move__(self, field, is_trapped=False):
+        if self.endgame is not None and self.endgame.applies(field):
+            result = self.endgame.make_decision(field, Chooser.valuation_action, self.time_budget)
+            logger.info("Endgame action {} with value {}".format(result[1:], result[0]))
+            return result[1], result[2]
+        pondered = self.ponderer.lookup(field) if self.ponderer is not None else None
+        # The table keeps the subtrees of the previous turns of the battle
+        result = self.search.make_decision(field, Chooser.valuation_action, HARD_MAX_DEPTH, self.time_budget,
+                                           keep_table=True)
+        # The pondering had more time for this position
+        if pondered is not None and pondered.depth > self.search.depth_reached:
+            logger.info("Pondered result at depth {} instead of {}".format(pondered.depth, self.search.depth_reached))
+            result = pondered.value
+        logger.info("Evaluation cache: {}, matchup cache: {}, damage cache: {}".format(
+            Chooser.evaluation_cache, Chooser.matchup_cache, DamageCalculator.cache))
+        if result[2]:
+            logger.info("{} selected move {} with value {} against {}".format(field.active_pokemon_bot,
+                                                                              field.active_pokemon_bot.moves[
+                                                                                  result[1]].move_name,
+                                                                              result[0],
+                                                                              field.active_pokemon_oppo))
+        else:
+            logging.info("Switch {} with {}".format(field.active_pokemon_bot, field.all_pkmns_bot[result[1]]))
 
-                    if DamageCalculator.immune_to(pkmn_type_oppo, pkmn_type):
-                        valid_switch[index_pkmn] -= 2 * 2
+        return result[1], result[2]
 
-            for move_type in list(map(lambda x: x[1].move_type, bot_team[index_pkmn].moves.items())):
-                for pkmn_type_oppo in field.active_pokemon_oppo.types:
-                    if DamageCalculator.resists_to(pkmn_type_oppo, move_type):
-                        valid_switch[index_pkmn] -= 1
+    def __handle_mcts_move__(self, field, is_trapped=False):
+        result = self.mcts.make_decision(field, Chooser.valuation_action, self.time_budget, self.iterations)
+        logger.info("Evaluation cache: {}, matchup cache: {}, damage cache: {}".format(
+            Chooser.evaluation_cache, Chooser.matchup_cache, DamageCalculator.cache))
+        if result[2]:
+            logger.info("{} selected move {} with reward {} against {}".format(field.active_pokemon_bot,
+                                                                               field.active_pokemon_bot.moves[
+                                                                                   result[1]].move_name,
+                                                                               result[0],
+                                                                               field.active_pokemon_oppo))
+        else:
+            logging.info("Switch {} with {}".format(field.active_pokemon_bot, field.all_pkmns_bot[result[1]]))
 
-                    if DamageCalculator.weak_to(pkmn_type_oppo, move_type):
-                        valid_switch[index_pkmn] += 2
+        return result[1], result[2]
 
-                    if DamageCalculator.immune_to(pkmn_type_oppo, move_type):
-                        valid_switch[index_pkmn] -= 1
+    def __handle_hard_switch__(self, field):
+        # In the endgame the replacement of a fainted pokemon is the one with the best solved value
+        if self.endgame is not None and field.active_pokemon_bot.non_volatile_status is StatusType.Fnt and \
+                self.endgame.applies(field):
+            result = self.endgame.make_decision(field, Chooser.valuation_action, self.time_budget)
+            logging.info("Endgame switch {} with {}, value {}".format(field.active_pokemon_bot,
+                                                                      field.all_pkmns_bot[result[1]], result[0]))
+            return result[1]
+        return Chooser.__handle_normal_switch__(field)
 
-        choosen_switch_index = max(valid_switch.keys(), key=lambda x: valid_switch[x])
-        logging.info("Switch {} with {}".format(field.active_pokemon_bot, field.all_pkmns_bot[choosen_switch_index]))
-        return choosen_switch_index
+    @staticmethod
+    def valuation_action(field):
+        """Evaluates a battle field from the bot point of view, the values are kept in an LRU cache indexed by the
+        signature of the field
+        :param field: The battle field
+        :return: The value of the field
+        """
+        matchup_key = Chooser.matchup_signature(field)
+        key = (matchup_key, Chooser.state_signature(field))
+        valuation = Chooser.evaluation_cache.get(key)
+        if valuation is None:
+            valuation = Chooser.valuation_state(field) + Chooser.valuation_matchup(field, matchup_key)
+            Chooser.evaluation_cache.put(key, valuation)
+        return valuation
 
     @staticmethod
-    def __handle_hard_move__(field, is_trapped=False):
-        result = IterativeDeepeningMinMax.make_decision(field, Chooser.valuation_action)
-        if result[2]:
-            logger.info("{} selected move {} with predicted damage {} against {}".format(field.active_pokemon_bot,
-                                                                                     field.active_pokemon_bot.moves[
-                                                                                         result[1]].move_name,
-                                                                                     field.active_pokemon_oppo))
-        else:
-            logging.info("Switch {} with {}".format(field.active_pokemon_bot, field.all_pkmns_bot[result[1]]))
+    def matchup_signature(field):
+        """Returns what the matchup terms depend on: weather, types and moves of the active pokemons"""
+        active_bot = field.active_pokemon_bot
+        active_oppo = field.active_pokemon_oppo
+        return (field.weather, tuple(active_bot.types), tuple(active_oppo.types),
+                tuple(move.move_name for move in active_bot.moves.values()),
+                tuple(move.move_name for move in active_oppo.moves.values()),
+                tuple(move.move_name for move in active_oppo.possible_moves.values()))
 
-        return result[1], result[2]
+    @staticmethod
+    def state_signature(field):
+        """Returns what the hp and status terms depend on: hp and status of all the pokemons, boosts of the active
+        ones"""
+        return (tuple((pkmn.stats.get_actual_hp(), pkmn.stats.real_stats[StatsType.HP], pkmn.non_volatile_status)
+                      for pkmn in field.all_pkmns_bot.values()),
+                tuple((pkmn.stats.get_actual_hp(), pkmn.stats.real_stats[StatsType.HP], pkmn.non_volatile_status)
+                      for pkmn in field.all_pkmns_oppo.values()),
+                tuple(field.active_pokemon_bot.stats.mul_stats.values()),
+                tuple(field.active_pokemon_oppo.stats.mul_stats.values()))
 
     @staticmethod
-    def __handle_hard_switch__(field):
-        pass
+    def valuation_matchup(field, matchup_key=None):
+        """Returns the matchup terms of the valuation, cached by matchup signature"""
+        if matchup_key is None:
+            matchup_key = Chooser.matchup_signature(field)
+        valuation = Chooser.matchup_cache.get(matchup_key)
+        if valuation is None:
+            valuation = Chooser.matchup_terms(field)
+            Chooser.matchup_cache.put(matchup_key, valuation)
+        return valuation
 
     @staticmethod
-    def valuation_action(field):
+    def valuation_state(field):
+        """Returns the terms of the valuation that depend on hp, status and boosts"""
         valuation = 0
         active_bot = field.active_pokemon_bot
         active_oppo = field.active_pokemon_oppo
-        moves_bot = active_bot.moves
-        moves_oppo = active_oppo.moves
-        possible_moves_oppo = active_oppo.possible_moves
-        weather = field.weather
-        terrain = field.field
         bench_bot = field.all_pkmns_bot
         bench_oppo = field.all_pkmns_oppo
 
@@ -361,6 +445,19 @@ class Chooser:
             if hp_left < 25:
                 valuation += 80
 
+        return valuation
+
+    @staticmethod
+    def matchup_terms(field):
+        """Returns the terms of the valuation that depend on weather, types and moves"""
+        valuation = 0
+        active_bot = field.active_pokemon_bot
+        active_oppo = field.active_pokemon_oppo
+        moves_bot = active_bot.moves
+        moves_oppo = active_oppo.moves
+        possible_moves_oppo = active_oppo.possible_moves
+        weather = field.weather
+
         # Points with  rain weather
         if weather in [Weather.Raindance, Weather.Primordialsea]:
 
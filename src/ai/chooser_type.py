@@ -5,3 +5,4 @@ class Difficulty(Enum):
     Easy = auto()
     Normal = auto()
     Hard = auto()
+    Mcts = auto()
@@ -0,0 +1,280 @@
+import logging
+import math
+import random
+import time
+
+from model.status_type import StatusType
+from ai.iterative_search import IterativeDeepeningMinMax, SearchTimeout
+from ai.transposition import ZobristHasher
+
+logger = logging.getLogger("Endgame")
+
+# Max number of pokemons still alive on each side for the endgame mode
+ENDGAME_THRESHOLD = 2
+# Number of pokemons of a team in the random battles, the solver needs all the ones of the opponent
+TEAM_SIZE = 6
+# Max number of turns solved, the lines still open after them are valued with the evaluation function
+ENDGAME_MAX_TURNS = 10
+# Value of the evaluation function mapped to a value of about 0.76 at the horizon
+REWARD_SCALE = 100
+# Max absolute value at the horizon, so that only the decided lines reach 1 or -1
+HORIZON_BOUND = 0.99
+# Tolerance of the pivots of the simplex and of the values of the decided lines
+EPSILON = 1e-12
+WIN_TOLERANCE = 1e-9
+
+
+def solve_matrix_game(matrix):
+    """Solves a zero-sum matrix game, the row player maximizes and the column player minimizes.
+    If the game has a saddle point the strategies are pure, otherwise they come from the simplex on the linear
+    program of the column player: max sum(y) with B y <= 1 and y >= 0, where B is the matrix shifted to positive
+    values. The strategy of the row player is the dual solution, read from the objective row.
+    :param matrix: List of rows, matrix[i][j] is the value of row i against column j
+    :return: A tuple (value, row strategy, column strategy), the strategies are lists of probabilities
+    """
+    rows = len(matrix)
+    columns = len(matrix[0])
+    row_mins = [min(row) for row in matrix]
+    column_maxs = [max(matrix[i][j] for i in range(rows)) for j in range(columns)]
+    lower = max(row_mins)
+    upper = min(column_maxs)
+    if lower >= upper:
+        row = row_mins.index(lower)
+        column = column_maxs.index(upper)
+        return lower, [1 if i == row else 0 for i in range(rows)], [1 if j == column else 0 for j in range(columns)]
+
+    shift = 1 - min(row_mins)
+    # Constraints, one for each row: the shifted values, the slack variables and the right hand side
+    tableau = [[value + shift for value in matrix[i]] + [1 if k == i else 0 for k in range(rows)] + [1]
+               for i in range(rows)]
+    objective = [-1] * columns + [0] * rows + [0]
+    basis = [columns + i for i in range(rows)]
+    while True:
+        # Bland's rule: the first improving column and the first basic variable among the ties, so it never cycles
+        entering = next((j for j in range(columns + rows) if objective[j] < -EPSILON), None)
+        if entering is None:
+            break
+        leaving = None
+        for i in range(rows):
+            if tableau[i][entering] > EPSILON:
+                ratio = tableau[i][-1] / tableau[i][entering]
+                if leaving is None or ratio < best_ratio - EPSILON or (
+                        ratio <= best_ratio + EPSILON and basis[i] < basis[leaving]):
+                    leaving = i
+                    best_ratio = ratio
+        pivot_row = tableau[leaving]
+        pivot = pivot_row[entering]
+        pivot_row[:] = [value / pivot for value in pivot_row]
+        for row in tableau + [objective]:
+            if row is not pivot_row and row[entering] != 0:
+                factor = row[entering]
+                row[:] = [value - factor * pivot_value for value, pivot_value in zip(row, pivot_row)]
+        basis[leaving] = entering
+
+    total = objective[-1]
+    column_strategy = [0] * columns
+    for i, variable in enumerate(basis):
+        if variable < columns:
+            column_strategy[variable] = tableau[i][-1] / total
+    row_strategy = [objective[columns + i] / total for i in range(rows)]
+    return 1 / total - shift, row_strategy, column_strategy
+
+
+class EndgameSolver:
+    """Exact solver of the positions with few pokemons left.
+    Each turn is a simultaneous-move matrix game: the value of every pair of actions is the expected value of the
+    outcomes of their moves, and the value of the turn is the value of the game, with mixed strategies when there
+    is no pure equilibrium. A fainted pokemon is replaced by a choice of its player, the bot maximizes and the
+    opponent minimizes. A won position is worth 1, a lost one -1.
+    The turns are solved deeper one at a time until all the lines end with a winner or the time is over, the lines
+    still open at the horizon are valued with the evaluation function squashed in (-1, 1). The values are memoized
+    by Zobrist hash of the field across the iterations: an exact value holds for any number of turns left, the
+    others only for the turns left they were computed with.
+    The opponent can use all the possible moves that the search expands, like in IterativeDeepeningMinMax.
+    With a Tablebase the 1v1 positions below the root that it covers are read from it instead of being solved, as
+    values that are not exact, like the ones at the horizon.
+    """
+
+    def __init__(self, threshold=ENDGAME_THRESHOLD, max_turns=ENDGAME_MAX_TURNS, team_size=TEAM_SIZE,
+                 reward_scale=REWARD_SCALE, seed=None, tablebase=None):
+        """
+        :param threshold: Max number of pokemons alive on each side to use the solver
+        :param max_turns: Max number of turns to solve
+        :param team_size: Number of pokemons of a team
+        :param reward_scale: Value of the evaluation function mapped to a value of about 0.76
+        :param seed: Seed of the choice of the action from a mixed strategy
+        :param tablebase: Tablebase with the precomputed values of the 1v1 positions, None to solve them
+        """
+        self.threshold = threshold
+        self.max_turns = max_turns
+        self.team_size = team_size
+        self.reward_scale = reward_scale
+        self.random = random.Random(seed)
+        self.tablebase = tablebase
+        self.hasher = ZobristHasher()
+        self.memo = {}
+        self.eval_fn = None
+        self.deadline = None
+        self.nodes = 0
+        # Result of the last decision: turns solved, True if no line reached the horizon, strategy of the bot
+        self.turns_solved = 0
+        self.exact = False
+        self.strategy = None
+
+    def applies(self, field):
+        """Returns True if all the pokemons of the opponent have been seen and both sides have at most threshold
+        pokemons alive"""
+        unseen = self.team_size - len(field.all_pkmns_oppo)
+        return unseen <= 0 and \
+            len(IterativeDeepeningMinMax.alive(field.all_pkmns_bot)) <= self.threshold and \
+            len(IterativeDeepeningMinMax.alive(field.all_pkmns_oppo)) <= self.threshold
+
+    def make_decision(self, field, eval_fn, time_budget=None):
+        """Solves the position and chooses the action of the bot from its strategy.
+        The field must be a turn: if the active pokemon of the bot is fainted the action is its replacement.
+        :param field: The current battle field
+        :param eval_fn: Function that evaluates a battle field from the bot point of view
+        :param time_budget: Seconds available for the decision
+        :return: A tuple (value, index, is_move), value is in [-1, 1]
+        """
+        value, actions, self.strategy = self.solve(field, eval_fn, time_budget)
+        action = self.random.choices(actions, weights=self.strategy)[0]
+        logger.info("Endgame value {} in {} turns, exact {}, {} nodes, strategy {}".format(
+            value, self.turns_solved, self.exact, self.nodes, list(zip(actions, self.strategy))))
+        return value, action[0], action[1]
+
+    def solve(self, field, eval_fn, time_budget=None, keep_memo=False):
+        """Solves the position one more turn at a time, without a time budget up to max_turns
+        :param field: The battle field, it is copied and not changed
+        :param eval_fn: Function that evaluates a battle field from the bot point of view
+        :param time_budget: Seconds available
+        :param keep_memo: True to reuse the values of the previous solves, the fields must have the same pokemons
+        :return: A tuple (value, actions of the bot, strategy of the bot) of the last depth completed
+        """
+        self.eval_fn = eval_fn
+        self.deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.nodes = 0
+        if not keep_memo:
+            self.memo.clear()
+        # The search plays the turns on its own copy of the field
+        field = field.deepcopy()
+        field_hash = self.hasher.hash_field(field)
+        result = None
+        for turns in range(1, self.max_turns + 1):
+            try:
+                value, actions, strategy, exact = self.solve_root(field, field_hash, turns)
+            except SearchTimeout:
+                break
+            result = (value, actions, strategy)
+            self.turns_solved = turns
+            self.exact = exact
+            if exact:
+                break
+        if result is None:
+            # Not even one turn in time, the value of one turn without deadline
+            self.deadline = None
+            value, actions, strategy, self.exact = self.solve_root(field, field_hash, 1)
+            result = (value, actions, strategy)
+            self.turns_solved = 1
+        return result
+
+    def solve_root(self, field, field_hash, turns):
+        """Solves the root of the field
+        :return: A tuple (value, actions of the bot, strategy of the bot, exact)
+        """
+        if field.active_pokemon_bot.non_volatile_status is StatusType.Fnt:
+            actions = [(index, False) for index in IterativeDeepeningMinMax.switches(field.all_pkmns_bot,
+                                                                                     field.active_pokemon_bot)]
+            values = []
+            exact = True
+            for action in actions:
+                value, action_exact = self.switch_value(field, field_hash, 1, action[0], turns)
+                values.append(value)
+                exact = exact and action_exact
+            best = values.index(max(values))
+            value, exact = EndgameSolver.decided(values[best], exact)
+            return value, actions, [1 if i == best else 0 for i in range(len(actions))], exact
+        actions = IterativeDeepeningMinMax.bot_actions(field)
+        value, strategy, exact = self.turn_value(field, field_hash, actions, turns)
+        return value, actions, strategy, exact
+
+    def value(self, field, field_hash, turns_left):
+        """Value of a node for the bot
+        :return: A tuple (value, exact), exact is False if a line below the node that matters reached the horizon
+        """
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        self.nodes += 1
+
+        bot_alive = IterativeDeepeningMinMax.alive(field.all_pkmns_bot)
+        oppo_alive = IterativeDeepeningMinMax.alive(field.all_pkmns_oppo)
+        if not bot_alive or not oppo_alive:
+            return (0 if not bot_alive and not oppo_alive else 1 if bot_alive else -1), True
+
+        entry = self.memo.get(field_hash)
+        if entry is not None and (entry[1] or entry[2] == turns_left):
+            return entry[0], entry[1]
+
+        # The 1v1 positions in the tablebase are already solved
+        stored = None
+        if self.tablebase is not None and len(bot_alive) == 1 and len(oppo_alive) == 1:
+            stored = self.tablebase.lookup_field(field)
+
+        if field.active_pokemon_bot.non_volatile_status is StatusType.Fnt:
+            results = [self.switch_value(field, field_hash, 1, index, turns_left) for index in bot_alive]
+            result = EndgameSolver.decided(max(value for value, _ in results), all(exact for _, exact in results))
+        elif field.active_pokemon_oppo.non_volatile_status is StatusType.Fnt:
+            results = [self.switch_value(field, field_hash, 2, index, turns_left) for index in oppo_alive]
+            result = EndgameSolver.decided(min(value for value, _ in results), all(exact for _, exact in results))
+        elif stored is not None:
+            # An approximation like the horizon, it never decides the line
+            result = (HORIZON_BOUND * stored, False)
+        elif turns_left == 0:
+            result = (HORIZON_BOUND * math.tanh(self.eval_fn(field) / self.reward_scale), False)
+        else:
+            value, _, exact = self.turn_value(field, field_hash, IterativeDeepeningMinMax.bot_actions(field),
+                                              turns_left)
+            result = (value, exact)
+        self.memo[field_hash] = (result[0], result[1], turns_left)
+        return result
+
+    def switch_value(self, field, field_hash, player, pokemon_in, turns_left):
+        """Value of the replacement of a fainted pokemon, it doesn't take a turn"""
+        record = field.apply_switch(player, pokemon_in)
+        try:
+            return self.value(field, self.hasher.update(field_hash, field, record), turns_left)
+        finally:
+            field.undo(record)
+
+    def turn_value(self, field, field_hash, bot_actions, turns_left):
+        """Value of a turn, the value of the matrix game of the expected values of the pairs of actions
+        :return: A tuple (value, strategy of the bot, exact)
+        """
+        oppo_actions = IterativeDeepeningMinMax.oppo_actions(field)
+        exact = True
+        matrix = []
+        for bot_action in bot_actions:
+            row = []
+            for oppo_action in oppo_actions:
+                expected = 0
+                for probability, outcomes in field.turn_outcomes(bot_action, oppo_action):
+                    # The fainted pokemons are replaced in the next node, by a choice of their player
+                    record = field.apply_actions(bot_action, oppo_action, None, outcomes)
+                    try:
+                        value, child_exact = self.value(field, self.hasher.update(field_hash, field, record),
+                                                        turns_left - 1)
+                    finally:
+                        field.undo(record)
+                    expected += probability * value
+                    exact = exact and child_exact
+                row.append(expected)
+            matrix.append(row)
+        value, strategy, _ = solve_matrix_game(matrix)
+        value, exact = EndgameSolver.decided(value, exact)
+        return value, strategy, exact
+
+    @staticmethod
+    def decided(value, exact):
+        """A value of 1 or -1 is exact even if some lines are open, the horizon values are inside the bounds so those
+        lines are never chosen"""
+        return value, exact or abs(value) > 1 - WIN_TOLERANCE
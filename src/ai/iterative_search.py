@@ -1,166 +1,544 @@
+import logging
 import math
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from model.stats_type import StatsType
 from model.status_type import StatusType
 from ai.SwitchHelper import switch_help
+from ai.move_ordering import MoveOrdering
+from ai.search_stats import SearchStats
+from ai.transposition import Bound, TranspositionTable, ZobristHasher
+
+logger = logging.getLogger("IterativeDeepening")
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget of the decision is over"""
+    pass
+
+
+# Search of the worker process, created once when the worker starts, and the decision its table belongs to
+_worker_search = None
+_worker_decision = None
+_worker_generation = None
+
+
+def _init_worker(table_size, chance_nodes, batch_evaluator, worker_caches=None):
+    global _worker_search
+    stats = SearchStats(worker_caches() if worker_caches is not None else None)
+    _worker_search = IterativeDeepeningMinMax(table_size, chance_nodes, batch_evaluator=batch_evaluator, stats=stats)
+
+
+def _search_pair(decision, generation, field, eval_fn, bot_action, oppo_action, depth_limit, deadline):
+    """Job of a worker: value of a pair of root actions, the counters of its search and the hits and lookups of its
+    caches, None if the deadline is over before the end"""
+    global _worker_decision, _worker_generation
+    # Like in make_decision the table is kept between the iterations of a decision, and across the decisions while
+    # the generation of the tables doesn't change
+    if decision != _worker_decision:
+        if generation != _worker_generation:
+            _worker_search.transposition_table.clear()
+            _worker_generation = generation
+        _worker_search.move_ordering.new_turn()
+        if _worker_search.batch_evaluator is not None:
+            _worker_search.batch_evaluator.reset()
+        _worker_decision = decision
+    _worker_search.eval_fn = eval_fn
+    _worker_search.deadline = deadline
+    _worker_search.stats.start()
+    try:
+        return _worker_search.pair_value(field, _worker_search.hasher.hash_field(field), bot_action, oppo_action,
+                                         depth_limit), _worker_search.stats.counters(), \
+            _worker_search.stats.cache_deltas()
+    except SearchTimeout:
+        return None
 
 
 class IterativeDeepeningMinMax:
+    """Depth limited search over the battle field.
+    Each turn is a simultaneous-move node: the bot takes the max over its actions of the min over the opponent
+    replies, with alpha-beta bounds so that replies which can't change the choice above are cut off.
+    An action is a tuple (index, is_move): a move index if is_move is True, a bench index otherwise.
+    Searched nodes are kept in a transposition table indexed by the Zobrist hash of the field.
+    The actions of both players are visited in the order given by MoveOrdering, that learns from the cutoffs of
+    the previous searches.
+    With a batch evaluator the chance nodes one turn above the frontier play all their outcomes, encode the leaves
+    reached and evaluate them together instead of calling the evaluation function once per leaf.
+    With more than one worker the pairs of root actions are searched in parallel by a pool of processes that
+    lives as long as the search, each worker with its own transposition table. The workers keep their tables across
+    the decisions like keep_table does, but promote can't reach them and does nothing.
+    With chance nodes every turn is expanded in the weighted outcomes of its moves (hit or miss, damage roll and
+    secondary effect) and valued with their expected value, so the search doesn't depend on random draws.
+    Each decision fills a SearchStats with the nodes, the leaves, the times and the hit rates of the caches and
+    logs it as one JSON line.
+    """
 
-    @staticmethod
-    def make_decision(field, eval_fn):
-        value = (-math.inf, None, None)
-        curr_depth_limit = 1
-        # Loop through possible moves
-        if len(field.all_pkmns_oppo) == 1:
-            # For each bot move
-            for bot_move in field.active_pokemon_bot.moves:
-                # For each opponent known move
-                for oppo_moves in field.active_pokemon_oppo.moves:
-                    new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, oppo_moves, True)
-                    # BOTH MOVES
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
-
-                    if to_compare > value[0]:
-                        value = (to_compare, bot_move, True)
-
-                # For each not known move of the opponent
-                for possible_oppo_moves in field.active_pokemon_oppo.possible_moves:
-                    new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, possible_oppo_moves, True)
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
-                    if to_compare > value[0]:
-                        value = (to_compare, bot_move, True)
-
-            # All possibles switch WE SWITCH HE ATTACC
-            for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                    field.active_pokemon_bot.name != x[1].name,
-                                          field.all_pkmns_bot.items())):
-                # For each kno
-                for oppo_moves in field.active_pokemon_oppo.moves:
-                    new_state = IterativeDeepeningMinMax.create_state(field, index_pkmn, False, oppo_moves, True)
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
-
-                    if to_compare > value[0]:
-                        value = (to_compare, index_pkmn, False)
-
-                # For each not known move of the opponent
-                for possible_oppo_moves in field.active_pokemon_oppo.possible_moves:
-                    new_state = IterativeDeepeningMinMax.create_state(field, index_pkmn, False, possible_oppo_moves, True)
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
-
-                    if to_compare > value[0]:
-                        value = (to_compare, index_pkmn, False)
+    def __init__(self, table_size=100000, chance_nodes=False, workers=1, batch_evaluator=None, stats=None,
+                 worker_caches=None):
+        """
+        :param table_size: Max number of entries of the transposition table
+        :param chance_nodes: True to expand the random outcomes of the moves instead of drawing them
+        :param workers: Number of processes that search the root, 1 to search in this process
+        :param batch_evaluator: BatchEvaluator with the same values of the evaluation function used by the chance
+        nodes above the leaves, None to evaluate the leaves one at a time
+        :param stats: SearchStats of the decisions with the caches to log, None for one with the transposition
+        table only
+        :param worker_caches: Picklable function that returns the dict name -> cache to log of a worker process,
+        None for the transposition table only
+        """
+        self.table_size = table_size
+        self.chance_nodes = chance_nodes
+        self.workers = workers
+        self.batch_evaluator = batch_evaluator
+        self.worker_caches = worker_caches
+        self.executor = None
+        self.decisions = 0
+        # Incremented when the tables of the workers must be cleared at the next decision
+        self.table_generation = 0
+        self.hasher = ZobristHasher()
+        self.transposition_table = TranspositionTable(table_size)
+        self.move_ordering = MoveOrdering()
+        self.stats = stats if stats is not None else SearchStats()
+        self.stats.caches["transposition"] = self.transposition_table
+        self.eval_fn = None
+        self.deadline = None
+        # Depth of the last iteration completed by the last decision
+        self.depth_reached = 0
+        # Root of the last decision, its hash and what was known of the teams when the table was filled
+        self.last_root = None
+        self.last_root_hash = None
+        self.table_knowledge = None
+
+    def make_decision(self, field, eval_fn, depth_limit=2, time_budget=None, keep_table=False):
+        """Method that searches the best action for the bot.
+        Without a time budget the search runs once at depth_limit, otherwise it deepens one turn at a time up to
+        depth_limit and returns the best action of the last iteration completed before the deadline.
+        :param field: The current battle field
+        :param eval_fn: Function that evaluates a battle field from the bot point of view
+        :param depth_limit: Number of turns to look ahead
+        :param time_budget: Seconds available for the decision
+        :param keep_table: True to keep the entries of the transposition table stored before the decision, like
+        the ones of the previous turns and of the pondering, with the same eval_fn. They are dropped anyway if
+        something new is known about the teams, since the hash doesn't cover the moves
+        :return: A tuple (value, index, is_move)
+        """
+        self.stats.start(field.turn_number)
+        if self.workers > 1:
+            value = self.make_parallel_decision(field, eval_fn, depth_limit, time_budget, keep_table)
+            self.stats.finish(self.depth_reached)
+            self.stats.log()
+            return value
+
+        self.eval_fn = eval_fn
+        self.deadline = None
+        # The search plays the turns on its own copy of the field
+        start = time.perf_counter()
+        field = field.deepcopy()
+        self.stats.make_time += time.perf_counter() - start
+        knowledge = IterativeDeepeningMinMax.knowledge(field)
+        if not keep_table or knowledge != self.table_knowledge:
+            self.transposition_table.clear()
+        self.table_knowledge = knowledge
+        self.transposition_table.reset_stats()
+        self.last_root = field
+        self.last_root_hash = self.hasher.hash_field(field)
+        self.move_ordering.new_turn()
+        if self.batch_evaluator is not None:
+            self.batch_evaluator.reset()
+
+        if time_budget is None:
+            value = self.search_root(field, depth_limit)
+            self.depth_reached = depth_limit
         else:
-            # HE SWITCH AND WE ATTAC
-            for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                    field.active_pokemon_bot.name != x[1].name,
-                                          field.all_pkmns_oppo.items())):
+            deadline = time.monotonic() + time_budget
+            # The first iteration is always completed so that there is an action to return
+            value = self.search_root(field, 1)
+            self.depth_reached = 1
+            self.deadline = deadline
+            for curr_depth_limit in range(2, depth_limit + 1):
+                try:
+                    value = self.search_root(field, curr_depth_limit)
+                except SearchTimeout:
+                    break
+                self.depth_reached = curr_depth_limit
+        logger.info("Transposition table: {}".format(self.transposition_table))
+        self.stats.finish(self.depth_reached)
+        self.stats.log()
+        return value
 
-                for bot_move in field.active_pokemon_bot.moves:
-                    new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, index_pkmn, False)
+    def make_parallel_decision(self, field, eval_fn, depth_limit=2, time_budget=None, keep_table=False):
+        """Same as make_decision, but every pair (bot action, opponent action) of the root is searched by a worker
+        of the pool. eval_fn must be picklable, so a function defined at module or class level.
+        The tables are in the workers: keep_table keeps them, but there is no last root for promote.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                initargs=(self.table_size, self.chance_nodes,
+                                                          self.batch_evaluator, self.worker_caches))
+        self.decisions += 1
+        knowledge = IterativeDeepeningMinMax.knowledge(field)
+        if not keep_table or knowledge != self.table_knowledge:
+            self.table_generation += 1
+        self.table_knowledge = knowledge
+        self.last_root = None
+        self.last_root_hash = None
 
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
+        if time_budget is None:
+            value = self.split_root(field, eval_fn, depth_limit, None)
+            self.depth_reached = depth_limit
+        else:
+            deadline = time.monotonic() + time_budget
+            value = self.split_root(field, eval_fn, 1, None)
+            self.depth_reached = 1
+            for curr_depth_limit in range(2, depth_limit + 1):
+                result = self.split_root(field, eval_fn, curr_depth_limit, deadline)
+                if result is None:
+                    break
+                value = result
+                self.depth_reached = curr_depth_limit
+        return value
 
-                    if to_compare > value[0]:
-                        value = (to_compare, bot_move, True)
+    def promote(self, field, bot_action, oppo_name, oppo_is_move):
+        """Keeps the subtree of the turn actually played after the last decision.
+        The children of the two actions, one for each outcome, are moved at the end of the table so that they are
+        the last entries evicted, and the best action of the child closest to the new position is stored as the
+        hint for the ordering of its root. If the position is exactly one of the children, its whole subtree is
+        in the table already.
+        :param field: The battle field after the turn
+        :param bot_action: Tuple (index, is_move) played by the bot
+        :param oppo_name: Name of the move or of the pokemon chosen by the opponent
+        :param oppo_is_move: True if the opponent used a move, False if it switched
+        :return: True if the turn matches the last decision, always False with more than one worker
+        """
+        root = self.last_root
+        if root is None or IterativeDeepeningMinMax.knowledge(field) != self.table_knowledge:
+            return False
+        oppo_action = IterativeDeepeningMinMax.action_by_name(root, 2, oppo_name, oppo_is_move)
+        if oppo_action is None or bot_action not in IterativeDeepeningMinMax.bot_actions(root):
+            return False
 
-                # BOTH SWITCH
-                for index_bot_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                            field.active_pokemon_bot.name != x[1].name,
-                                                  field.all_pkmns_bot.items())):
-                    new_state = IterativeDeepeningMinMax.create_state(field, index_bot_pkmn, False, index_pkmn, False)
+        field_hash = self.hasher.hash_field(field)
+        closest = None
+        for _, outcomes in root.turn_outcomes(bot_action, oppo_action):
+            record = root.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement, outcomes)
+            try:
+                child_hash = self.hasher.update(self.last_root_hash, root, record)
+                entry = self.transposition_table.promote(child_hash)
+                if entry is not None and entry.best_action is not None:
+                    distance = IterativeDeepeningMinMax.distance(root, field)
+                    if closest is None or distance < closest[0]:
+                        # The bench of the real field can have other indexes
+                        closest = (distance, IterativeDeepeningMinMax.translate_action(root, field,
+                                                                                      entry.best_action))
+            finally:
+                root.undo(record)
 
-                    to_compare = IterativeDeepeningMinMax.max_value(new_state, eval_fn, curr_depth_limit)
+        if closest is not None and closest[0] < math.inf and closest[1] in IterativeDeepeningMinMax.bot_actions(
+                field) and self.transposition_table.probe(field_hash) is None:
+            # An entry that can't cut anything, it only gives the first action to try
+            self.transposition_table.store(field_hash, -math.inf, 0, Bound.Lower, closest[1])
+        logger.info("Promoted turn {} {} {}".format(bot_action, oppo_action, closest))
+        return True
 
-                    if to_compare > value[0]:
-                        value = (to_compare, index_bot_pkmn, False)
-        return value
+    @staticmethod
+    def knowledge(field):
+        """What the search knows of the teams and that the hash of a field doesn't cover: the pokemons and the
+        moves of both teams, with the possible moves of the opponent that are searched, in an order that doesn't
+        depend on the indexes of the benches"""
+        return tuple(sorted((side, pokemon.name, tuple(pokemon.moves), tuple(
+            pokemon.possible_moves if pokemon.likely_moves is None else pokemon.likely_moves))
+                            for side, bench in ((1, field.all_pkmns_bot), (2, field.all_pkmns_oppo))
+                            for pokemon in bench.values()))
+
+    @staticmethod
+    def translate_action(field, other_field, action):
+        """Returns the action of the bot in other_field that is the same as action in field, the switches are
+        matched by the name of the pokemon"""
+        index, is_move = action
+        if is_move:
+            return action
+        return other_field.get_pokemon_index_by_name(1, field.all_pkmns_bot[index].name), False
 
     @staticmethod
-    def max_value(field, eval_fn, depth_limit):
+    def action_by_name(field, player, name, is_move):
+        """Returns the action (index, is_move) of a player with the given move or pokemon name, None if unknown"""
+        if not is_move:
+            index = field.get_pokemon_index_by_name(player, name)
+            return None if index is None else (index, False)
+        active = field.active_selector_side[player]
+        for moves in (active.moves, active.possible_moves):
+            for index, move in moves.items():
+                if move.move_name == name:
+                    return index, True
+        return None
+
+    @staticmethod
+    def distance(field, other_field):
+        """Difference of hp between the pokemons of two fields, infinite if the active pokemons or the statuses
+        are not the same"""
+        distance = 0
+        for side in (1, 2):
+            if field.active_selector_side[side].name != other_field.active_selector_side[side].name:
+                return math.inf
+            for pokemon in field.bench_selector_side[side].values():
+                index = other_field.get_pokemon_index_by_name(side, pokemon.name)
+                if index is None:
+                    return math.inf
+                other = other_field.bench_selector_side[side][index]
+                if pokemon.non_volatile_status is not other.non_volatile_status:
+                    return math.inf
+                distance += abs(pokemon.stats.get_actual_hp() - other.stats.get_actual_hp())
+        return distance
+
+    def split_root(self, field, eval_fn, depth_limit, deadline):
+        """Searches the root at a fixed depth with the pool, the value of a bot action is the min over the values
+        of its pairs and the bot takes the max like in search_root
+        :return: A tuple (value, index, is_move), None if a worker didn't finish before the deadline
+        """
+        bot_actions = IterativeDeepeningMinMax.bot_actions(field)
+        oppo_actions = IterativeDeepeningMinMax.oppo_actions(field)
+        futures = {(bot_action, oppo_action): self.executor.submit(_search_pair, self.decisions,
+                                                                   self.table_generation, field, eval_fn,
+                                                                   bot_action, oppo_action, depth_limit, deadline)
+                   for bot_action in bot_actions for oppo_action in oppo_actions}
+
+        value = (-math.inf, None, None)
+        for bot_action in bot_actions:
+            to_compare = math.inf
+            for oppo_action in oppo_actions:
+                result = futures[(bot_action, oppo_action)].result()
+                if result is None:
+                    for future in futures.values():
+                        future.cancel()
+                    return None
+                self.stats.add(result[1])
+                self.stats.add_cache_counts(result[2])
+                to_compare = min(to_compare, result[0])
+            if to_compare > value[0] or value[1] is None:
+                value = (to_compare, bot_action[0], bot_action[1])
+        return value
+
+    def shutdown(self):
+        """Stops the workers of the pool"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def search_root(self, field, depth_limit):
+        """Searches the root of the tree at a fixed depth
+        :param field: The current battle field
+        :param depth_limit: Number of turns to look ahead
+        :return: A tuple (value, index, is_move)
+        """
+        root_hash = self.hasher.hash_field(field)
+        entry = self.transposition_table.probe(root_hash)
+        bot_actions = self.move_ordering.order(field, 1, IterativeDeepeningMinMax.bot_actions(field), 0,
+                                               entry and entry.best_action)
+        value = (-math.inf, None, None)
+        alpha = -math.inf
+        for bot_action in bot_actions:
+            to_compare = self.min_value(field, root_hash, bot_action, 0, depth_limit, alpha, math.inf)
+            if to_compare > value[0] or value[1] is None:
+                value = (to_compare, bot_action[0], bot_action[1])
+            alpha = max(alpha, to_compare)
+        self.transposition_table.store(root_hash, value[0], depth_limit, Bound.Exact, (value[1], value[2]))
+        return value
+
+    def max_value(self, field, field_hash, depth, depth_limit, alpha, beta):
+        """Value of a turn node, max over the bot actions of the min over the opponent replies
+        :param field: The battle field of the node
+        :param field_hash: The Zobrist hash of the field
+        :param depth: Depth of the node
+        :param depth_limit: Max depth of the search
+        :param alpha: Best value already guaranteed to the bot above this node
+        :param beta: Best value already guaranteed to the opponent above this node
+        :return: The value of the node
+        """
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        stats = self.stats
+        stats.nodes += 1
+
+        entry, value = self.transposition_table.lookup(field_hash, depth_limit - depth, alpha, beta)
+        if value is not None:
+            return value
+
+        if IterativeDeepeningMinMax.is_terminal(field, depth, depth_limit):
+            start = time.perf_counter()
+            value = self.eval_fn(field)
+            stats.eval_time += time.perf_counter() - start
+            stats.leaves += 1
+            self.transposition_table.store(field_hash, value, depth_limit - depth, Bound.Exact)
+            return value
+
+        bot_actions = self.move_ordering.order(field, 1, IterativeDeepeningMinMax.bot_actions(field), depth,
+                                               entry and entry.best_action)
+        alpha_start = alpha
         value = -math.inf
-        if depth_limit == 2 or field.active_pokemon_oppo.non_volatile_status == StatusType.Fnt or len(
-                dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                      field.active_pokemon_bot.name != x[1].name,
-                            field.all_pkmns_oppo.items()))) == 0:
+        best_action = None
+        for bot_action in bot_actions:
+            to_compare = self.min_value(field, field_hash, bot_action, depth, depth_limit, alpha, beta)
+            if to_compare > value:
+                value = to_compare
+                best_action = bot_action
+            # The opponent will never let the game reach this node
+            if value >= beta:
+                self.move_ordering.cutoff(field, 1, bot_action, depth, depth_limit - depth)
+                break
+            alpha = max(alpha, value)
 
-            return eval_fn(field)
+        if value <= alpha_start:
+            bound = Bound.Upper
+        elif value >= beta:
+            bound = Bound.Lower
         else:
-            # If there is not pokemon known from the oppo
-            if len(field.all_pkmns_oppo) == 1:
-                # For each bot move
-                for bot_move in field.active_pokemon_bot.moves:
-                    # For each opponent known move
-
-                    for oppo_moves in field.active_pokemon_oppo.moves:
-                        new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, oppo_moves, True)
-                        # BOTH MOVES
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
-
-                    # For each not known move of the opponent
-                    for possible_oppo_moves in field.active_pokemon_oppo.possible_moves:
-                        new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, possible_oppo_moves, True)
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
-
-                # All possibles switch WE SWITCH HE ATTACC
-                for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                        field.active_pokemon_bot.name != x[1].name,
-                                              field.all_pkmns_bot.items())):
-                    # For each kno
-                    for oppo_moves in field.active_pokemon_oppo.moves:
-                        new_state = IterativeDeepeningMinMax.create_state(field, index_pkmn, False, oppo_moves, True)
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
-                    # For each not known move of the opponent
-                    for possible_oppo_moves in field.active_pokemon_oppo.possible_moves:
-                        new_state = IterativeDeepeningMinMax.create_state(field, index_pkmn, False, possible_oppo_moves, True)
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
+            bound = Bound.Exact
+        self.transposition_table.store(field_hash, value, depth_limit - depth, bound, best_action)
+        return value
+
+    def min_value(self, field, field_hash, bot_action, depth, depth_limit, alpha, beta):
+        """Value of a bot action, min over the opponent replies
+        :param field: The battle field of the node
+        :param field_hash: The Zobrist hash of the field
+        :param bot_action: The action chosen by the bot
+        :param depth: Depth of the node
+        :param depth_limit: Max depth of the search
+        :param alpha: Best value already guaranteed to the bot above this node
+        :param beta: Best value already guaranteed to the opponent above this node
+        :return: The value of the bot action
+        """
+        value = math.inf
+        for oppo_action in self.move_ordering.order(field, 2, IterativeDeepeningMinMax.oppo_actions(field), depth):
+            if self.chance_nodes:
+                value = min(value, self.expected_value(field, field_hash, bot_action, oppo_action, depth,
+                                                       depth_limit))
             else:
+                value = min(value, self.turn_value(field, field_hash, bot_action, oppo_action, None, depth,
+                                                   depth_limit, alpha, beta))
+            # The bot already has a better action, the other replies can't change its choice
+            if value <= alpha:
+                self.move_ordering.cutoff(field, 2, oppo_action, depth, depth_limit - depth)
+                return value
+            beta = min(beta, value)
+        return value
 
-                # HE SWITCH AND WE ATTAC
-                for index_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                        field.active_pokemon_bot.name != x[1].name,
-                                              field.all_pkmns_oppo.items())):
+    def expected_value(self, field, field_hash, bot_action, oppo_action, depth, depth_limit):
+        """Value of a chance node, the average of the values of all the outcomes of the turn weighted by their
+        probability. The outcomes are searched with a full window since their values are summed.
+        """
+        if self.batch_evaluator is not None and depth + 1 >= depth_limit:
+            return self.expected_leaf_value(field, bot_action, oppo_action)
+        value = 0
+        for probability, outcomes in field.turn_outcomes(bot_action, oppo_action):
+            value += probability * self.turn_value(field, field_hash, bot_action, oppo_action, outcomes, depth,
+                                                   depth_limit, -math.inf, math.inf)
+        return value
 
-                    for bot_move in field.active_pokemon_bot.moves:
-                        new_state = IterativeDeepeningMinMax.create_state(field, bot_move, True, index_pkmn, False)
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
+    def pair_value(self, field, field_hash, bot_action, oppo_action, depth_limit):
+        """Value of a pair of root actions searched with a full window"""
+        if self.chance_nodes:
+            return self.expected_value(field, field_hash, bot_action, oppo_action, 0, depth_limit)
+        return self.turn_value(field, field_hash, bot_action, oppo_action, None, 0, depth_limit, -math.inf,
+                               math.inf)
 
-                    # BOTH SWITCH
-                    for index_bot_pkmn in dict(filter(lambda x: x[1].non_volatile_status is not StatusType.Fnt and
-                                                                field.active_pokemon_bot.name != x[1].name,
-                                                      field.all_pkmns_bot.items())):
-                        new_state = IterativeDeepeningMinMax.create_state(field, index_bot_pkmn, False, index_pkmn, False)
-                        value = max(IterativeDeepeningMinMax.max_value(new_state, eval_fn, depth_limit + 1), value)
+    def expected_leaf_value(self, field, bot_action, oppo_action):
+        """Value of a chance node whose children are all leaves: every outcome of the turn is played and the field
+        reached is encoded, then all the leaves are evaluated together by the batch evaluator
+        """
+        stats = self.stats
+        rows = []
+        probabilities = []
+        for probability, outcomes in field.turn_outcomes(bot_action, oppo_action):
+            start = time.perf_counter()
+            record = field.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement, outcomes)
+            played = time.perf_counter()
+            try:
+                rows.append(self.batch_evaluator.encode(field))
+            finally:
+                encoded = time.perf_counter()
+                field.undo(record)
+                stats.make_time += played - start + time.perf_counter() - encoded
+                stats.eval_time += encoded - played
+            probabilities.append(probability)
 
-            return value
+        # Summed in the same order of expected_value
+        start = time.perf_counter()
+        leaf_values = self.batch_evaluator.evaluate(rows)
+        stats.eval_time += time.perf_counter() - start
+        stats.nodes += len(rows)
+        stats.leaves += len(rows)
+        value = 0
+        for probability, leaf_value in zip(probabilities, leaf_values):
+            value += probability * leaf_value
+        return value
+
+    def turn_value(self, field, field_hash, bot_action, oppo_action, outcomes, depth, depth_limit, alpha, beta):
+        """Plays a turn on the field, searches the resulting node and rolls the turn back
+        :param outcomes: Dict player -> MoveOutcome of the moves, None for random moves
+        :return: The value of the resulting node
+        """
+        stats = self.stats
+        start = time.perf_counter()
+        record = field.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement, outcomes)
+        stats.make_time += time.perf_counter() - start
+        try:
+            new_hash = self.hasher.update(field_hash, field, record)
+            return self.max_value(field, new_hash, depth + 1, depth_limit, alpha, beta)
+        finally:
+            start = time.perf_counter()
+            field.undo(record)
+            stats.make_time += time.perf_counter() - start
+
+    @staticmethod
+    def is_terminal(field, depth, depth_limit):
+        return depth >= depth_limit or field.active_pokemon_oppo.non_volatile_status == StatusType.Fnt or \
+               not IterativeDeepeningMinMax.alive(field.all_pkmns_oppo) or \
+               not IterativeDeepeningMinMax.alive(field.all_pkmns_bot)
+
+    @staticmethod
+    def alive(bench):
+        """Returns the indexes of the pokemons in the bench that are not fainted"""
+        return [index for index in bench if bench[index].non_volatile_status is not StatusType.Fnt]
+
+    @staticmethod
+    def switches(bench, active):
+        """Returns the indexes of the pokemons that can replace the active one"""
+        return [index for index in bench if bench[index].non_volatile_status is not StatusType.Fnt and
+                active.name != bench[index].name]
+
+    @staticmethod
+    def bot_actions(field):
+        """Returns all the actions of the bot, usable moves first and then switches"""
+        moves = field.active_pokemon_bot.get_usable_moves() or field.active_pokemon_bot.moves
+        actions = [(index_move, True) for index_move in moves]
+        actions.extend((index_pkmn, False) for index_pkmn in IterativeDeepeningMinMax.switches(
+            field.all_pkmns_bot, field.active_pokemon_bot))
+        return actions
+
+    @staticmethod
+    def oppo_actions(field):
+        """Returns all the actions of the opponent: known moves, possible moves and switches to known pokemons.
+        Only the likely possible moves are returned if a MovesetBelief has chosen them.
+        If nothing is known about the opponent it returns a single empty action.
+        """
+        active = field.active_pokemon_oppo
+        actions = [(index_move, True) for index_move in active.moves]
+        actions.extend((index_move, True) for index_move in (
+            active.possible_moves if active.likely_moves is None else active.likely_moves))
+        actions.extend((index_pkmn, False) for index_pkmn in IterativeDeepeningMinMax.switches(
+            field.all_pkmns_oppo, active))
+        return actions or [(None, True)]
 
     @staticmethod
     def create_state(field, move1, is_move1, move2, is_move_2):
+        """Returns a copy of the field after a turn, the field itself is not changed"""
         new_field = field.deepcopy()
-        if not is_move1 and not is_move_2:
-            new_field.switch_pokemon(1, move1)
-            new_field.switch_pokemon(2, move2)
-        elif is_move1 and not is_move_2:
-            new_field.switch_pokemon(2, move2)
-            new_field.do_move(1, move1)
-            # check fainted
-        elif not is_move1 and is_move_2:
-            new_field.switch_pokemon(1, move1)
-            new_field.do_move(2, move2)
-            # check fainted
-        else:
-            if field.active_pokemon_bot.stats.get_actual(StatsType.Spe) > field.active_pokemon_oppo.stats.get_actual(
-                    StatsType.Spe):
-                new_field.do_move(1, move1)
-                new_field.do_move(2, move2)
-                if field.active_pokemon_bot.non_volatile_status == StatusType.Fnt:
-                    new_field.switch_pokemon(1, switch_help(field))
-            else:
-                new_field.do_move(2, move2)
-                if field.active_pokemon_bot.non_volatile_status == StatusType.Fnt:
-                    new_field.switch_pokemon(1, switch_help(field))
-                else:
-                    new_field.do_move(1, move1)
+        new_field.apply_actions((move1, is_move1), (move2, is_move_2), IterativeDeepeningMinMax.replacement)
         return new_field
 
-
+    @staticmethod
+    def replacement(field):
+        """Returns the bench index of the pokemon that replaces the fainted active pokemon of the bot, or None"""
+        if IterativeDeepeningMinMax.switches(field.all_pkmns_bot, field.active_pokemon_bot):
+            return switch_help(field)
+        return None
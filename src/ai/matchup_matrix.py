@@ -0,0 +1,139 @@
+import logging
+
+from model.damage_calculator import DamageCalculator
+from model.status_type import StatusType
+
+logger = logging.getLogger("MatchupMatrix")
+
+
+class MatchupMatrix:
+    """Switch scores of each pokemon of the bot against each known pokemon of the opponent.
+    A score only depends on the types of the two pokemons and on the types of the moves of the bot pokemon, so the
+    matrix is built when the team is parsed and a row or a column is computed again only when the profile of its
+    pokemon changes. Pokemons are stored by name: the team of the bot is parsed again at every request and its indexes
+    can change.
+    Each entry is a tuple (easy score, normal score), the easy score only counts the types.
+    """
+
+    def __init__(self):
+        self.bot = {}
+        self.oppo = {}
+        self.scores = {}
+
+    def copy(self):
+        """Returns a new matrix with the same scores, the profiles are tuples and can be shared"""
+        matrix = MatchupMatrix()
+        matrix.bot = dict(self.bot)
+        matrix.oppo = dict(self.oppo)
+        matrix.scores = dict(self.scores)
+        return matrix
+
+    @staticmethod
+    def of(field):
+        """Returns the matrix of a battle field, a new one is attached if it doesn't have one"""
+        if field.matchups is None:
+            field.matchups = MatchupMatrix()
+        return field.matchups
+
+    @staticmethod
+    def bot_profile(pokemon):
+        """Returns the part of a pokemon of the bot that the scores depend on"""
+        return tuple(pokemon.types), tuple(move.move_type for move in pokemon.moves.values())
+
+    @staticmethod
+    def oppo_profile(pokemon):
+        """Returns the part of a pokemon of the opponent that the scores depend on"""
+        return tuple(pokemon.types)
+
+    @staticmethod
+    def score(bot_profile, oppo_profile):
+        """Computes the scores of a pokemon of the bot against a pokemon of the opponent
+        :param bot_profile: The bot_profile of the pokemon of the bot
+        :param oppo_profile: The oppo_profile of the pokemon of the opponent
+        :return: Tuple (easy score, normal score)
+        """
+        types, move_types = bot_profile
+        easy = 0
+        for pkmn_type in types:
+            for pkmn_type_oppo in oppo_profile:
+                if DamageCalculator.weak_to(pkmn_type_oppo, pkmn_type):
+                    easy += 1
+
+                if DamageCalculator.weak_to(pkmn_type, pkmn_type_oppo):
+                    easy -= 1
+
+                if DamageCalculator.resists_to(pkmn_type_oppo, pkmn_type):
+                    easy -= 1
+
+                if DamageCalculator.resists_to(pkmn_type, pkmn_type_oppo):
+                    easy += 1
+
+                if DamageCalculator.immune_to(pkmn_type, pkmn_type_oppo):
+                    easy += 2
+
+                if DamageCalculator.immune_to(pkmn_type_oppo, pkmn_type):
+                    easy -= 2
+
+        normal = easy * 2
+        for move_type in move_types:
+            for pkmn_type_oppo in oppo_profile:
+                if DamageCalculator.resists_to(pkmn_type_oppo, move_type):
+                    normal -= 1
+
+                if DamageCalculator.weak_to(pkmn_type_oppo, move_type):
+                    normal += 2
+
+                if DamageCalculator.immune_to(pkmn_type_oppo, move_type):
+                    normal -= 1
+        return easy, normal
+
+    def build(self, field):
+        """Adds all the pokemons of a battle field"""
+        for pokemon in field.all_pkmns_bot.values():
+            self.update_bot(pokemon)
+        for pokemon in field.all_pkmns_oppo.values():
+            self.update_oppo(pokemon)
+
+    def update_bot(self, pokemon):
+        """Adds a pokemon of the bot or computes its row again if its types or moves changed"""
+        profile = MatchupMatrix.bot_profile(pokemon)
+        if self.bot.get(pokemon.name) == profile:
+            return
+        self.bot[pokemon.name] = profile
+        for oppo_name, oppo_profile in self.oppo.items():
+            self.scores[pokemon.name, oppo_name] = MatchupMatrix.score(profile, oppo_profile)
+
+    def update_oppo(self, pokemon):
+        """Adds a pokemon of the opponent or computes its column again if its types changed"""
+        profile = MatchupMatrix.oppo_profile(pokemon)
+        if self.oppo.get(pokemon.name) == profile:
+            return
+        self.oppo[pokemon.name] = profile
+        for bot_name, bot_profile in self.bot.items():
+            self.scores[bot_name, pokemon.name] = MatchupMatrix.score(bot_profile, profile)
+        logger.debug("Matchups against {}: {}".format(pokemon.name, {bot_name: self.scores[bot_name, pokemon.name]
+                                                                      for bot_name in self.bot}))
+
+    def get(self, bot_pokemon, oppo_pokemon):
+        """Returns the scores of a pokemon of the bot against a pokemon of the opponent, the pokemons that are not in
+        the matrix yet are added"""
+        scores = self.scores.get((bot_pokemon.name, oppo_pokemon.name))
+        if scores is None:
+            self.update_bot(bot_pokemon)
+            self.update_oppo(oppo_pokemon)
+            scores = self.scores[bot_pokemon.name, oppo_pokemon.name]
+        return scores
+
+    def best_switch(self, field, easy=False):
+        """Returns the index of the pokemon of the bench of the bot with the best score against the active pokemon of
+        the opponent, the first one in the bench if more have the same score
+        :param field: The battle field
+        :param easy: True to use the easy scores
+        :return: The index of the pokemon in the bench
+        """
+        kind = 0 if easy else 1
+        valid_switch = {}
+        for index_pkmn, pokemon in field.all_pkmns_bot.items():
+            if pokemon.non_volatile_status is not StatusType.Fnt and field.active_pokemon_bot.name != pokemon.name:
+                valid_switch[index_pkmn] = self.get(pokemon, field.active_pokemon_oppo)[kind]
+        return max(valid_switch.keys(), key=lambda x: valid_switch[x])
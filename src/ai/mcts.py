@@ -0,0 +1,178 @@
+import logging
+import math
+import random
+import time
+
+from ai.iterative_search import IterativeDeepeningMinMax
+from model.damage_calculator import DamageCalculator
+
+logger = logging.getLogger("MonteCarlo")
+
+
+class DecoupledNode:
+    """Node of the tree of the decoupled UCT.
+    The two players choose simultaneously, so each of them keeps its own statistics of the actions it tried in the
+    node and selects with UCB1 without looking at the choice of the other. The children are indexed by the pair of
+    actions played in the turn.
+    The tree is open loop: the turns are played again from the root at each iteration with new random draws, so
+    a node is the sequence of actions that leads to it and its legal actions are the ones seen while visiting it.
+    """
+
+    def __init__(self):
+        self.visits = 0
+        # action -> [visits, total reward from the bot point of view]
+        self.bot_stats = {}
+        self.oppo_stats = {}
+        self.children = {}
+
+    def child(self, bot_action, oppo_action):
+        """Returns the child of the pair of actions and True if it has just been created"""
+        node = self.children.get((bot_action, oppo_action))
+        if node is None:
+            node = DecoupledNode()
+            self.children[(bot_action, oppo_action)] = node
+            return node, True
+        return node, False
+
+    def update(self, bot_action, oppo_action, reward):
+        self.visits += 1
+        self.bot_stats[bot_action][0] += 1
+        self.bot_stats[bot_action][1] += reward
+        self.oppo_stats[oppo_action][0] += 1
+        self.oppo_stats[oppo_action][1] += reward
+
+
+class MonteCarloTreeSearch:
+    """Monte Carlo tree search over the battle field with decoupled UCT for the simultaneous turns.
+    Each iteration plays the turns chosen by the tree from the root, adds one node, plays a few more turns with a
+    cheap rollout policy and backs up the evaluation of the field reached. The search stops after a number of
+    iterations or when the time budget is over, so it always has an answer and it gets better with more time.
+    """
+
+    def __init__(self, exploration=1.4, rollout_depth=3, reward_scale=100, epsilon=0.2, seed=None):
+        """
+        :param exploration: Constant of the exploration term of UCB1
+        :param rollout_depth: Number of turns played by the rollout policy after the tree
+        :param reward_scale: Value of the evaluation function mapped to a reward of about 0.76
+        :param epsilon: Probability that the rollout policy plays a random action
+        :param seed: Seed of the random choices of the search
+        """
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.reward_scale = reward_scale
+        self.epsilon = epsilon
+        self.random = random.Random(seed)
+        self.eval_fn = None
+        self.iterations = 0
+
+    def make_decision(self, field, eval_fn, time_budget=None, iterations=None):
+        """Method that searches the best action for the bot.
+        Without budgets it runs 1000 iterations.
+        :param field: The current battle field
+        :param eval_fn: Function that evaluates a battle field from the bot point of view
+        :param time_budget: Seconds available for the decision
+        :param iterations: Max number of iterations
+        :return: A tuple (value, index, is_move), value is the mean reward in [-1, 1] of the action
+        """
+        self.eval_fn = eval_fn
+        self.iterations = 0
+        if time_budget is None and iterations is None:
+            iterations = 1000
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+
+        # The search plays the turns on its own copy of the field
+        field = field.deepcopy()
+        root = DecoupledNode()
+        # At least one iteration is done so that there is an action to return
+        while self.iterations == 0 or ((iterations is None or self.iterations < iterations) and
+                                       (deadline is None or time.monotonic() < deadline)):
+            self.iterate(field, root)
+            self.iterations += 1
+
+        best_action = max(root.bot_stats, key=lambda action: root.bot_stats[action][0])
+        visits, total = root.bot_stats[best_action]
+        logger.info("{} iterations, action {} visited {} times".format(self.iterations, best_action, visits))
+        return total / visits, best_action[0], best_action[1]
+
+    def iterate(self, field, root):
+        """Runs one iteration of the search, the field is left as it was"""
+        records = []
+        path = []
+        node = root
+        try:
+            is_new = False
+            while not is_new and not MonteCarloTreeSearch.is_over(field):
+                bot_action = self.select(node.bot_stats, IterativeDeepeningMinMax.bot_actions(field), node.visits,
+                                         1)
+                oppo_action = self.select(node.oppo_stats, IterativeDeepeningMinMax.oppo_actions(field),
+                                          node.visits, -1)
+                path.append((node, bot_action, oppo_action))
+                records.append(field.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement))
+                node, is_new = node.child(bot_action, oppo_action)
+
+            reward = self.rollout(field, records)
+            for node, bot_action, oppo_action in path:
+                node.update(bot_action, oppo_action, reward)
+        finally:
+            for record in reversed(records):
+                field.undo(record)
+
+    def select(self, stats, actions, visits, sign):
+        """Chooses the action of a player in a node with UCB1, the actions never tried go first
+        :param stats: Statistics of the player in the node
+        :param actions: Legal actions of the player in the current field
+        :param visits: Visits of the node
+        :param sign: 1 for the bot, -1 for the opponent that minimizes the reward
+        :return: The chosen action
+        """
+        untried = [action for action in actions if action not in stats]
+        if untried:
+            action = self.random.choice(untried)
+            stats[action] = [0, 0]
+            return action
+
+        log_visits = math.log(max(visits, 1))
+
+        def ucb(action):
+            action_visits, total = stats[action]
+            if action_visits == 0:
+                return math.inf
+            return sign * total / action_visits + self.exploration * math.sqrt(log_visits / action_visits)
+
+        return max(actions, key=ucb)
+
+    def rollout(self, field, records):
+        """Plays some turns with the rollout policy and returns the reward of the field reached.
+        The records of the turns are appended to records so that the caller can undo them.
+        """
+        for _ in range(self.rollout_depth):
+            if MonteCarloTreeSearch.is_over(field):
+                break
+            records.append(field.apply_actions(self.policy(field, 1), self.policy(field, 2),
+                                               IterativeDeepeningMinMax.replacement))
+        return math.tanh(self.eval_fn(field) / self.reward_scale)
+
+    def policy(self, field, player):
+        """Rollout policy of the easy mode: the move with more damage against the active pokemon of the other
+        player, or a random action with probability epsilon
+        :param field: The battle field
+        :param player: 1 for the bot, 2 for the opponent
+        :return: An action (index, is_move)
+        """
+        if player == 1:
+            actions = IterativeDeepeningMinMax.bot_actions(field)
+            attacker, defender = field.active_pokemon_bot, field.active_pokemon_oppo
+        else:
+            actions = IterativeDeepeningMinMax.oppo_actions(field)
+            attacker, defender = field.active_pokemon_oppo, field.active_pokemon_bot
+
+        moves = [action for action in actions if action[1] and action[0] is not None]
+        if not moves or self.random.random() < self.epsilon:
+            return self.random.choice(actions)
+        return max(moves, key=lambda action: DamageCalculator.calculate(field.weather, field.field, attacker,
+                                                                        field.get_move(player, action[0]),
+                                                                        defender, 1))
+
+    @staticmethod
+    def is_over(field):
+        return IterativeDeepeningMinMax.is_terminal(field, 0, math.inf)
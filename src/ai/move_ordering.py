@@ -0,0 +1,71 @@
+from model.damage_calculator import DamageCalculator
+
+# Number of killer actions kept for each depth
+KILLERS_PER_DEPTH = 2
+
+
+class MoveOrdering:
+    """Orders the actions of a node of the search so that the ones more likely to cause a cutoff come first:
+    the best action found by the previous iteration, the killer actions that caused a cutoff at the same depth,
+    then the actions with the highest history score and, among them, the moves with the highest damage estimate.
+    Killers and history are indexed by the name of the active pokemon and the action, so that the same index of
+    two different pokemons is not mixed up. They are kept across the turns of the battle: at every new turn the
+    killers move up one depth and the history scores are halved.
+    """
+
+    def __init__(self):
+        # player -> depth -> list of (pokemon name, action)
+        self.killers = {1: {}, 2: {}}
+        # (player, pokemon name, action) -> score
+        self.history = {}
+
+    def order(self, field, player, actions, depth, best_action=None):
+        """Sorts the actions of a player in a node
+        :param field: The battle field of the node
+        :param player: 1 for the bot, 2 for the opponent
+        :param actions: List of actions (index, is_move)
+        :param depth: Depth of the node
+        :param best_action: Best action stored in the transposition table for the node, if any
+        :return: The sorted list of actions
+        """
+        attacker = field.active_selector_side[player]
+        defender = field.active_selector_side[3 - player]
+        killers = self.killers[player].get(depth, ())
+
+        def key(action):
+            return (action == best_action, (attacker.name, action) in killers,
+                    self.history.get((player, attacker.name, action), 0),
+                    MoveOrdering.damage_estimate(field, player, attacker, defender, action))
+
+        return sorted(actions, key=key, reverse=True)
+
+    def cutoff(self, field, player, action, depth, remaining):
+        """Records the action of a player that caused a cutoff
+        :param field: The battle field of the node
+        :param player: 1 for the bot, 2 for the opponent
+        :param action: The action that caused the cutoff
+        :param depth: Depth of the node
+        :param remaining: Number of turns searched below the node, deeper cutoffs get a higher score
+        """
+        killer = (field.active_selector_side[player].name, action)
+        killers = self.killers[player].setdefault(depth, [])
+        if killer not in killers:
+            killers.insert(0, killer)
+            del killers[KILLERS_PER_DEPTH:]
+        history_key = (player, killer[0], action)
+        self.history[history_key] = self.history.get(history_key, 0) + remaining * remaining
+
+    def new_turn(self):
+        """Ages the tables when a turn is played: the nodes at depth d of the new search were at depth d + 1"""
+        for player in self.killers:
+            self.killers[player] = {depth - 1: killers for depth, killers in self.killers[player].items() if depth}
+        self.history = {key: score // 2 for key, score in self.history.items() if score > 1}
+
+    @staticmethod
+    def damage_estimate(field, player, attacker, defender, action):
+        """Damage of a move with the average roll, 0 for switches and unknown moves"""
+        index, is_move = action
+        if not is_move or index is None:
+            return 0
+        return DamageCalculator.calculate(field.weather, field.field, attacker, field.get_move(player, index),
+                                          defender, 0.925)
@@ -0,0 +1,96 @@
+import logging
+from itertools import combinations
+
+logger = logging.getLogger("MovesetBelief")
+
+
+def move_id(move_name):
+    """Returns the id of a move name, the same form of the moves in the Randomsets table"""
+    return move_name.lower().replace(" ", "").replace("-", "").replace(".", "").replace("'", "")
+
+
+class MovesetBelief:
+    """Probability of each possible move of an opponent given the moves it has already revealed.
+    The Randomsets table only has the pool of moves of each species, not the actual sets, so the co-occurrence of
+    two moves is the number of pools that contain both: moves that are often in the same pools, like a setup move
+    and the attacks that use it, support each other.
+    The search expands only the most likely moves, the top_k ones and, if mass is given, only the ones needed to
+    reach that probability mass.
+    """
+
+    def __init__(self, pools, top_k=None, mass=None):
+        """
+        :param pools: Iterable of the move pools of the species, each one an iterable of move names
+        :param top_k: Max number of possible moves to expand, None for no limit
+        :param mass: Probability mass of the possible moves to expand, None for all of them
+        """
+        self.top_k = top_k
+        self.mass = mass
+        self.pools = 0
+        self.move_counts = {}
+        self.pair_counts = {}
+        for pool in pools:
+            moves = sorted(set(move_id(move) for move in pool))
+            self.pools += 1
+            for move in moves:
+                self.move_counts[move] = self.move_counts.get(move, 0) + 1
+            for pair in combinations(moves, 2):
+                self.pair_counts[pair] = self.pair_counts.get(pair, 0) + 1
+
+    @staticmethod
+    def from_data_source(db_con, top_k=None, mass=None, battle_type="Single"):
+        """Builds the belief from the Randomsets table of a data source"""
+        pools = db_con.get_random_pools(battle_type)
+        logger.info("Loaded {} move pools".format(len(pools)))
+        return MovesetBelief(pools.values(), top_k, mass)
+
+    def pair_count(self, move1, move2):
+        """Returns the number of pools that contain both the moves"""
+        return self.pair_counts.get((move1, move2) if move1 < move2 else (move2, move1), 0)
+
+    def probabilities(self, pokemon):
+        """Returns the probability of each possible move of a pokemon, given its known moves.
+        It is a naive Bayes estimate: each move gets the smoothed share of pools that contain it times, for each known
+        move, the smoothed share of its own pools that also contain the known move, then the values are normalized
+        :param pokemon: The opponent pokemon
+        :return: Dict index of the possible move -> probability, the known moves get 0
+        """
+        revealed = [move_id(move.move_name) for move in pokemon.moves.values()]
+        scores = {}
+        for index, move in pokemon.possible_moves.items():
+            candidate = move_id(move.move_name)
+            if candidate in revealed:
+                scores[index] = 0
+                continue
+            score = (self.move_counts.get(candidate, 0) + 1) / (self.pools + 2)
+            for known in revealed:
+                score *= (self.pair_count(candidate, known) + 1) / (self.move_counts.get(candidate, 0) + 2)
+            scores[index] = score
+        total = sum(scores.values())
+        if total == 0:
+            return scores
+        return {index: score / total for index, score in scores.items()}
+
+    def likely_moves(self, pokemon):
+        """Returns the indexes of the possible moves of a pokemon that the search expands, most likely first
+        :param pokemon: The opponent pokemon
+        :return: A list of indexes of pokemon.possible_moves
+        """
+        probabilities = self.probabilities(pokemon)
+        ranked = sorted((index for index in probabilities if probabilities[index] > 0),
+                        key=lambda index: probabilities[index], reverse=True)
+        if self.top_k is not None:
+            ranked = ranked[:self.top_k]
+        if self.mass is not None:
+            covered = 0
+            for position, index in enumerate(ranked):
+                covered += probabilities[index]
+                if covered >= self.mass:
+                    return ranked[:position + 1]
+        return ranked
+
+    def update(self, pokemon):
+        """Stores in the pokemon the possible moves to expand, to call after its moves change"""
+        pokemon.likely_moves = self.likely_moves(pokemon)
+        logger.debug("Likely moves of {}: {}".format(pokemon.name, [pokemon.possible_moves[index].move_name
+                                                                    for index in pokemon.likely_moves]))
@@ -0,0 +1,146 @@
+import logging
+import math
+import threading
+
+from model.search_state import SearchLayout, SearchState
+from model.stats_type import StatsType
+from model.status_type import StatusType
+from ai.iterative_search import IterativeDeepeningMinMax, SearchTimeout
+
+logger = logging.getLogger("Ponder")
+
+# Number of opponent replies, the most likely ones for the move ordering, whose next positions are searched
+PONDER_REPLIES = 3
+# Width in percent of the hp ranges that make two positions match
+HP_BUCKET = 10
+
+
+class PonderResult:
+    """
+    Action found for a predicted position
+    Args:
+        value (tuple): the result of the search, (value, index, is_move)
+        depth (int): number of turns of the last iteration completed
+    """
+
+    def __init__(self, value, depth):
+        self.value = value
+        self.depth = depth
+
+    def __repr__(self):
+        return "PonderResult({}, {})".format(self.value, self.depth)
+
+
+class Ponderer:
+    """Searches the positions that the next turn will probably reach while the opponent is choosing its action.
+    After the bot sends its action, the most likely replies of the opponent are played on a copy of the field with
+    their most likely outcomes, and a background thread deepens the search of all those positions one turn at a
+    time until stop is called.
+    The real position never has the exact hp of the predicted one, so the positions match by position_key, that
+    only keeps ranges of hp. The search shares its transposition table with the decisions, so the entries of the
+    positions that match exactly are reused too.
+    """
+
+    def __init__(self, search, eval_fn, max_depth, replies=PONDER_REPLIES):
+        """
+        :param search: The IterativeDeepeningMinMax of the decisions
+        :param eval_fn: Function that evaluates a battle field from the bot point of view
+        :param max_depth: Max number of turns to look ahead
+        :param replies: Number of opponent replies to ponder
+        """
+        self.search = search
+        self.eval_fn = eval_fn
+        self.max_depth = max_depth
+        self.replies = replies
+        self.results = {}
+        self.thread = None
+
+    def start(self, field, bot_action):
+        """Starts pondering the positions after the action of the bot, the field itself is not changed
+        :param field: The current battle field
+        :param bot_action: Tuple (index, is_move) sent by the bot
+        """
+        self.stop()
+        self.results = {}
+        field, positions = self.predict(field, bot_action)
+        if not positions:
+            return
+        self.search.eval_fn = self.eval_fn
+        self.search.deadline = math.inf
+        if self.search.batch_evaluator is not None:
+            self.search.batch_evaluator.reset()
+        self.thread = threading.Thread(target=self.run, args=(field, positions), daemon=True)
+        self.thread.start()
+
+    def predict(self, field, bot_action):
+        """Returns the working copy of the field and the SearchStates of the positions reached after the most likely
+        replies of the opponent"""
+        field = Ponderer.private_copy(field)
+        layout = SearchLayout(field)
+        replies = self.search.move_ordering.order(field, 2, IterativeDeepeningMinMax.oppo_actions(field), 0)
+        positions = []
+        for oppo_action in replies[:self.replies]:
+            _, outcomes = max(field.turn_outcomes(bot_action, oppo_action), key=lambda outcome: outcome[0])
+            record = field.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement, outcomes)
+            try:
+                # After a knock out the next request is a switch, not a turn
+                if field.active_pokemon_bot.non_volatile_status is not StatusType.Fnt and \
+                        field.active_pokemon_oppo.non_volatile_status is not StatusType.Fnt:
+                    positions.append(SearchState.from_field(field, layout))
+            finally:
+                field.undo(record)
+        return field, positions
+
+    def run(self, field, positions):
+        """Body of the thread, every depth is completed for all the positions before going deeper.
+        The positions are written in turn into the same working field"""
+        keys = [Ponderer.position_key(position.restore(field)) for position in positions]
+        try:
+            for depth_limit in range(1, self.max_depth + 1):
+                for key, position in zip(keys, positions):
+                    value = self.search.search_root(position.restore(field), depth_limit)
+                    self.results[key] = PonderResult(value, depth_limit)
+        except SearchTimeout:
+            pass
+        logger.info("Pondered {} positions: {}".format(len(positions), list(self.results.values())))
+
+    def stop(self):
+        """Stops the thread and waits for it, the results found so far are kept"""
+        if self.thread is not None:
+            self.search.deadline = -math.inf
+            self.thread.join()
+            self.thread = None
+            self.search.deadline = None
+
+    def lookup(self, field):
+        """Returns the PonderResult of the position that matches the field or None, stop must be called before"""
+        result = self.results.get(Ponderer.position_key(field))
+        if result is None or (result.value[1], result.value[2]) not in IterativeDeepeningMinMax.bot_actions(field):
+            return None
+        return result
+
+    @staticmethod
+    def private_copy(field):
+        """Returns a copy of the field that shares nothing mutable with it. The thread keeps running while the
+        messages of the turn of the opponent update the field, and a deepcopy still shares the possible moves and the
+        matchups"""
+        field = field.deepcopy()
+        for pokemon in list(field.all_pkmns_bot.values()) + list(field.all_pkmns_oppo.values()):
+            pokemon.possible_moves = {index: move.deepcopy() for index, move in pokemon.possible_moves.items()}
+        if field.matchups is not None:
+            field.matchups = field.matchups.copy()
+        return field
+
+    @staticmethod
+    def position_key(field):
+        """Coarse signature of a position: weather, terrain, active pokemons and their boosts, names, hp ranges and
+        status of all the pokemons"""
+        key = [field.weather, field.field]
+        for active, bench in ((field.active_pokemon_bot, field.all_pkmns_bot),
+                              (field.active_pokemon_oppo, field.all_pkmns_oppo)):
+            key.append(active.name)
+            key.append(tuple(active.stats.mul_stats.values()))
+            for pokemon in bench.values():
+                hp = 100 * pokemon.stats.get_actual_hp() / pokemon.stats.real_stats[StatsType.HP]
+                key.append((pokemon.name, round(hp / HP_BUCKET), pokemon.non_volatile_status))
+        return tuple(key)
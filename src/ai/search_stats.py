@@ -0,0 +1,117 @@
+import json
+import logging
+import time
+
+logger = logging.getLogger("SearchStats")
+
+
+def cache_counts(cache):
+    """Returns the hits and the lookups of a cache, the transposition table counts its lookups as probes"""
+    lookups = cache.probes if hasattr(cache, "probes") else cache.hits + cache.misses
+    return cache.hits, lookups
+
+
+class SearchStats:
+    """Counters of a decision of the search, filled while it runs and logged as one JSON line per turn.
+    nodes are the turn nodes searched and leaves the fields evaluated. make_time are the seconds spent copying the
+    root and playing and rolling back the turns, eval_time the seconds spent in the evaluation function and in the
+    batch evaluator. The effective branching factor is nodes ** (1 / depth), the branching of a uniform tree with
+    the same nodes at the depth reached.
+    The hit rates are the ones of the given caches during the decision: each cache counts hits and misses, or
+    probes like the transposition table. The workers of a parallel search have their own caches, their hits and
+    lookups are added by name to the ones of this process.
+    """
+
+    def __init__(self, caches=None):
+        """
+        :param caches: Dict name -> cache whose hit rate is logged
+        """
+        self.caches = dict(caches) if caches else {}
+        self.turn = None
+        self.depth = 0
+        self.nodes = 0
+        self.leaves = 0
+        self.make_time = 0
+        self.eval_time = 0
+        self.elapsed = 0
+        self.hit_rates = {}
+        self.start_time = None
+        self.start_counts = {}
+        # Name -> (hits, lookups) of the caches during the decision, the workers add theirs as their jobs end
+        self.added_counts = {}
+
+    def start(self, turn=None):
+        """Resets the counters at the start of a decision
+        :param turn: Number of the turn of the battle
+        """
+        self.turn = turn
+        self.depth = 0
+        self.nodes = 0
+        self.leaves = 0
+        self.make_time = 0
+        self.eval_time = 0
+        self.elapsed = 0
+        self.hit_rates = {}
+        self.added_counts = {}
+        self.start_counts = {name: cache_counts(cache) for name, cache in self.caches.items()}
+        self.start_time = time.perf_counter()
+
+    def finish(self, depth):
+        """Stops the counters at the end of a decision
+        :param depth: Depth of the last iteration completed
+        """
+        self.elapsed = time.perf_counter() - self.start_time
+        self.depth = depth
+        self.add_cache_counts(self.cache_deltas())
+        for name, (hits, lookups) in self.added_counts.items():
+            self.hit_rates[name] = hits / lookups if lookups > 0 else 0
+
+    def counters(self):
+        """Returns the counters that a worker process adds to the ones of the decision"""
+        return self.nodes, self.leaves, self.make_time, self.eval_time
+
+    def cache_deltas(self):
+        """Returns the hits and the lookups of each cache since the start, that a worker process adds to the ones of
+        the decision"""
+        deltas = {}
+        for name, cache in self.caches.items():
+            hits, lookups = cache_counts(cache)
+            start_hits, start_lookups = self.start_counts[name]
+            deltas[name] = (hits - start_hits, lookups - start_lookups)
+        return deltas
+
+    def add_cache_counts(self, counts):
+        for name, (hits, lookups) in counts.items():
+            added_hits, added_lookups = self.added_counts.get(name, (0, 0))
+            self.added_counts[name] = (added_hits + hits, added_lookups + lookups)
+
+    def add(self, counters):
+        nodes, leaves, make_time, eval_time = counters
+        self.nodes += nodes
+        self.leaves += leaves
+        self.make_time += make_time
+        self.eval_time += eval_time
+
+    def branching_factor(self):
+        return self.nodes ** (1 / self.depth) if self.nodes and self.depth else 0
+
+    def to_dict(self):
+        return {
+            "turn": self.turn,
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "leaves": self.leaves,
+            "branching_factor": round(self.branching_factor(), 3),
+            "time": round(self.elapsed, 6),
+            "make_time": round(self.make_time, 6),
+            "eval_time": round(self.eval_time, 6),
+            "nodes_per_second": round(self.nodes / self.elapsed) if self.elapsed else 0,
+            "hit_rates": {name: round(rate, 4) for name, rate in self.hit_rates.items()}
+        }
+
+    def log(self):
+        """Writes the counters of the last decision as one JSON line"""
+        logger.info(json.dumps(self.to_dict(), sort_keys=True))
+
+    def __repr__(self):
+        return "SearchStats({})".format(self.to_dict())
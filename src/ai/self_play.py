@@ -0,0 +1,354 @@
+import logging
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.matchup_matrix import MatchupMatrix
+from ai.moveset_belief import MovesetBelief, move_id
+from model.field import BattleFieldSingle
+from model.status_type import StatusType
+
+logger = logging.getLogger("SelfPlay")
+
+# Number of pokemons of a team and of moves of a pokemon in the random battles
+TEAM_SIZE = 6
+MOVESET_SIZE = 4
+# Level of the generated pokemons
+LEVEL = 80
+# Turns after which a game is a draw
+MAX_TURNS = 200
+# Index of the first possible move of an opponent, like the ones of the data source
+POSSIBLE_MOVES_START = 5
+# Percentiles of the latency of the decisions in the report
+PERCENTILES = (50, 95, 99)
+
+
+class TeamGenerator:
+    """Random teams of the random battles built from a data source: distinct species of the Randomsets table, each
+    one with MOVESET_SIZE random moves of its pool.
+    The data source must have get_random_pools, get_pokemon_by_name and get_move_by_name, like
+    DatabaseDataSource.
+    """
+
+    def __init__(self, data_source, level=LEVEL, seed=None, battle_type="Single"):
+        """
+        :param data_source: The data source of the pokemons and moves
+        :param level: Level of the pokemons
+        :param seed: Seed of the choice of the species and moves
+        :param battle_type: Battle type of the Randomsets table
+        """
+        self.data_source = data_source
+        self.level = level
+        self.random = random.Random(seed)
+        self.pools = data_source.get_random_pools(battle_type)
+        self.species = sorted(self.pools)
+        # Name -> moves of its pool that the data source knows, and the species missing from the Pokemon table
+        self.pool_moves = {}
+        self.missing = set()
+
+    def moves_of(self, name):
+        """Returns the moves of the pool of a species"""
+        if name not in self.pool_moves:
+            moves = (self.data_source.get_move_by_name(move) for move in sorted(set(self.pools[name])))
+            self.pool_moves[name] = [move for move in moves if move is not None]
+        return self.pool_moves[name]
+
+    def pokemon(self, name):
+        """Returns a new pokemon of a species with random moves of its pool, None if it is not in the data source"""
+        if name in self.missing:
+            return None
+        try:
+            pokemon = self.data_source.get_pokemon_by_name(name, self.level)
+        except IndexError:
+            logger.warning("{} is not in the Pokemon table".format(name))
+            self.missing.add(name)
+            return None
+        moves = self.moves_of(name)
+        if not moves:
+            self.missing.add(name)
+            return None
+        for index, move in enumerate(self.random.sample(moves, min(MOVESET_SIZE, len(moves))), 1):
+            pokemon.moves[index] = move.deepcopy()
+        return pokemon
+
+    def team(self, size=TEAM_SIZE):
+        """Returns a bench dict index -> pokemon of distinct random species, the first one is the active"""
+        team = {}
+        for name in self.random.sample(self.species, len(self.species)):
+            pokemon = self.pokemon(name)
+            if pokemon is not None:
+                team[len(team) + 1] = pokemon
+                if len(team) == size:
+                    break
+        return team
+
+    def possible_moves(self, pokemon, revealed):
+        """Returns the moves of the pool of a pokemon that it has not revealed, indexed like the data source"""
+        pool = self.moves_of(self.species_of(pokemon))
+        names = set(move_id(move.move_name) for move in revealed)
+        return {index: move.deepcopy() for index, move in enumerate(
+            (move for move in pool if move_id(move.move_name) not in names), POSSIBLE_MOVES_START)}
+
+    def species_of(self, pokemon):
+        """Returns the name of the Randomsets pool of a pokemon"""
+        name = move_id(pokemon.name)
+        return name if name in self.pools else pokemon.name
+
+
+class GameResult:
+    """Result of a self-play game
+    winner (int): 0 or 1, the position of the winning chooser in the game, None for a draw
+    turns (int): number of turns played
+    latencies (list): for each chooser the seconds of its decisions
+    """
+
+    def __init__(self, winner, turns, latencies):
+        self.winner = winner
+        self.turns = turns
+        self.latencies = latencies
+
+    def __repr__(self):
+        return "GameResult(winner {}, {} turns)".format(self.winner, self.turns)
+
+
+class SelfPlayBattle:
+    """Headless battle between two choosers on the model of the search, without the server.
+    The true state is a BattleFieldSingle where side 1 is the first player. Before each decision a player gets its
+    own view: its team on the bot side and, on the opponent side, only the pokemons that the other player has shown,
+    with the moves they have used and the rest of their Randomsets pool as possible moves, like GameLoop builds it
+    from the messages of the server. The turns are played by BattleFieldSingle.apply_actions with random outcomes,
+    then the fainted pokemons are replaced by the choice of their player.
+    """
+
+    def __init__(self, choosers, teams, generator, belief=None, max_turns=MAX_TURNS):
+        """
+        :param choosers: The two Choosers, the first one plays on side 1
+        :param teams: The two bench dicts, the first pokemon of each is the active one
+        :param generator: The TeamGenerator of the teams, for the pools of the possible moves
+        :param belief: The MovesetBelief that chooses the possible moves to search, None to search all of them
+        :param max_turns: Turns after which the game is a draw
+        """
+        self.choosers = choosers
+        self.generator = generator
+        self.belief = belief
+        self.max_turns = max_turns
+        self.field = BattleFieldSingle(teams[0][1], teams[1][1], teams[0], teams[1])
+        # For each side, name -> names of the revealed moves of its pokemons shown to the other side
+        self.revealed = {1: {}, 2: {}}
+        self.matchups = {1: MatchupMatrix(), 2: MatchupMatrix()}
+        self.latencies = ([], [])
+        self.turns = 0
+        for side in (1, 2):
+            self.reveal(side)
+
+    def reveal(self, side, move_index=None):
+        """Shows the active pokemon of a side to the other side, with the move it is using"""
+        active = self.field.active_selector_side[side]
+        moves = self.revealed[side].setdefault(active.name, set())
+        if move_index is not None:
+            moves.add(active.moves[move_index].move_name)
+
+    def view(self, side):
+        """Returns the battle field seen by the player of a side, with its team on the bot side"""
+        own = {index: pokemon.deepcopy() for index, pokemon in self.field.bench_selector_side[side].items()}
+        other_side = 3 - side
+        other_active = self.field.active_selector_side[other_side]
+        shown = [other_active] + [pokemon for pokemon in self.field.bench_selector_side[other_side].values()
+                                  if pokemon is not other_active and pokemon.name in self.revealed[other_side]]
+        other = {}
+        for index, pokemon in enumerate(shown, 1):
+            copy = pokemon.deepcopy()
+            names = self.revealed[other_side][pokemon.name]
+            copy.moves = {move_index: move for move_index, move in copy.moves.items() if move.move_name in names}
+            copy.possible_moves = self.generator.possible_moves(copy, copy.moves.values())
+            if self.belief is not None:
+                self.belief.update(copy)
+            other[index] = copy
+        view = BattleFieldSingle(own[1], other[1], own, other)
+        view.weather = self.field.weather
+        view.field = self.field.field
+        view.speed_control = self.field.speed_control
+        view.turn_number = self.turns
+        view.matchups = self.matchups[side]
+        view.matchups.build(view)
+        return view
+
+    def decide(self, side, switch=False):
+        """Asks the player of a side for an action, the illegal ones are replaced by the first legal action
+        :return: A tuple (index, is_move) in the indexes of the true field
+        """
+        view = self.view(side)
+        chooser = self.choosers[side - 1]
+        start = time.perf_counter()
+        if switch:
+            action = (chooser.choose_switch(view), False)
+        else:
+            action = chooser.choose_move(view)
+        self.latencies[side - 1].append(time.perf_counter() - start)
+        if switch:
+            legal = [(index, False) for index in IterativeDeepeningMinMax.switches(view.all_pkmns_bot,
+                                                                                   view.active_pokemon_bot)]
+        else:
+            legal = IterativeDeepeningMinMax.bot_actions(view)
+        if action not in legal:
+            logger.warning("Illegal action {} of player {}, {} instead".format(action, side, legal[0]))
+            action = legal[0]
+        # The bench of the bot side of the view has the indexes of the true field
+        return action
+
+    def replace_fainted(self):
+        """Lets the players replace their fainted active pokemons
+        :return: True if both players still have pokemons"""
+        for side in (1, 2):
+            bench = self.field.bench_selector_side[side]
+            if not IterativeDeepeningMinMax.alive(bench):
+                return False
+            if self.field.active_selector_side[side].non_volatile_status is StatusType.Fnt:
+                self.field.switch_pokemon(side, self.decide(side, switch=True)[0])
+                self.reveal(side)
+        return True
+
+    def play(self):
+        """Plays the game until a player has no pokemons left or max_turns
+        :return: A GameResult
+        """
+        while self.turns < self.max_turns:
+            self.turns += 1
+            actions = {side: self.decide(side) for side in (1, 2)}
+            names = {}
+            for side, (index, is_move) in actions.items():
+                active = self.field.active_selector_side[side]
+                if is_move:
+                    names[side] = active.moves[index].move_name
+                    self.reveal(side, index)
+                else:
+                    names[side] = self.field.bench_selector_side[side][index].name
+            self.field.apply_actions(actions[1], actions[2])
+            for side in (1, 2):
+                self.reveal(side)
+            for side in (1, 2):
+                # The hard mode keeps the subtree of the turn played
+                self.choosers[side - 1].promote(self.view(side), actions[side], names[3 - side],
+                                                actions[3 - side][1])
+            if not self.replace_fainted():
+                break
+
+        alive = [bool(IterativeDeepeningMinMax.alive(self.field.bench_selector_side[side])) for side in (1, 2)]
+        winner = None
+        if alive[0] != alive[1]:
+            winner = 0 if alive[0] else 1
+        return GameResult(winner, self.turns, self.latencies)
+
+
+class SelfPlayReport:
+    """Win rates and latency of the decisions of the two choosers over many games"""
+
+    def __init__(self, names):
+        """
+        :param names: Names of the two choosers
+        """
+        self.names = names
+        self.games = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.turns = 0
+        self.latencies = ([], [])
+
+    def add(self, result):
+        self.games += 1
+        if result.winner is None:
+            self.draws += 1
+        else:
+            self.wins[result.winner] += 1
+        self.turns += result.turns
+        for player in (0, 1):
+            self.latencies[player].extend(result.latencies[player])
+
+    def win_rate(self, player):
+        return self.wins[player] / self.games if self.games else 0
+
+    def latency(self, player):
+        """Returns the mean and the percentiles of the latency in seconds of the decisions of a chooser"""
+        latencies = sorted(self.latencies[player])
+        if not latencies:
+            return {}
+        result = {"mean": sum(latencies) / len(latencies), "max": latencies[-1]}
+        for percentile in PERCENTILES:
+            result["p{}".format(percentile)] = latencies[min(len(latencies) - 1,
+                                                             len(latencies) * percentile // 100)]
+        return result
+
+    def __repr__(self):
+        lines = ["{} games, {} draws, {:.1f} turns per game".format(self.games, self.draws,
+                                                                   self.turns / self.games if self.games else 0)]
+        for player in (0, 1):
+            latency = self.latency(player)
+            lines.append("{}: {} wins ({:.1%}), {} decisions, latency {}".format(
+                self.names[player], self.wins[player], self.win_rate(player), len(self.latencies[player]),
+                ", ".join("{} {:.1f} ms".format(key, value * 1000) for key, value in latency.items())))
+        return "\n".join(lines)
+
+
+# Choosers, team generator and belief of the worker process, created once when the worker starts
+_worker = None
+
+
+def _init_worker(data_source_factory, difficulties, time_budget, seed, top_moves):
+    global _worker
+    data_source = data_source_factory()
+    generator = TeamGenerator(data_source, seed=seed)
+    belief = MovesetBelief(generator.pools.values(), top_moves)
+    choosers = [Chooser(difficulty, time_budget) for difficulty in difficulties]
+    _worker = (generator, belief, choosers)
+
+
+def _play_game(game, seed, max_turns):
+    """Job of a worker: plays a game with new random teams, the choosers swap sides every other game"""
+    generator, belief, choosers = _worker
+    # The teams and the random outcomes of the moves only depend on the seed and the game
+    game_seed = seed * 1000003 + game
+    generator.random.seed(game_seed)
+    random.seed(game_seed)
+    # The damage tensors of the normal mode roll with numpy
+    np.random.seed(game_seed % 2 ** 32)
+    teams = [generator.team(), generator.team()]
+    swapped = game % 2 == 1
+    battle = SelfPlayBattle(choosers[::-1] if swapped else choosers, teams, generator, belief, max_turns)
+    result = battle.play()
+    if swapped:
+        result.winner = None if result.winner is None else 1 - result.winner
+        result.latencies = result.latencies[::-1]
+    return result
+
+
+def run_games(games, data_source_factory, difficulties=("hard", "normal"), time_budget=1, workers=1, seed=0,
+              top_moves=4, max_turns=MAX_TURNS):
+    """Plays many self-play games between two choosers, in a pool of processes if workers > 1
+    :param games: Number of games
+    :param data_source_factory: Picklable function that returns a new data source, one for each process
+    :param difficulties: Difficulties of the two choosers
+    :param time_budget: Seconds of the hard and mcts modes for each decision
+    :param workers: Number of processes
+    :param seed: Seed of the teams, the same seed plays the same teams
+    :param top_moves: Max number of unrevealed moves of the opponent that the search expands
+    :param max_turns: Turns after which a game is a draw
+    :return: A SelfPlayReport
+    """
+    report = SelfPlayReport(["{} (1)".format(difficulties[0]), "{} (2)".format(difficulties[1])])
+    initargs = (data_source_factory, difficulties, time_budget, seed, top_moves)
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+            for result in executor.map(_play_game, range(games), [seed] * games, [max_turns] * games):
+                report.add(result)
+                logger.info("Game {}: {}".format(report.games, result))
+    else:
+        _init_worker(*initargs)
+        for game in range(games):
+            result = _play_game(game, seed, max_turns)
+            report.add(result)
+            logger.info("Game {}: {}".format(report.games, result))
+    return report
@@ -0,0 +1,239 @@
+import logging
+import math
+import mmap
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from ai.endgame import EndgameSolver
+from model.field import BattleFieldSingle
+from model.field_type import Weather, Field
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+logger = logging.getLogger("Tablebase")
+
+# Identifier and version of the file format
+MAGIC = b"SDTB"
+VERSION = 2
+# Header: magic, version, number of hp buckets, number of statuses, number of species
+HEADER = struct.Struct("<4sHBBI")
+# Entry of a species after the header: length of the name, the name in utf-8, the level, then the number of moves
+# and the name of each move, like the name
+NAME_LENGTH = struct.Struct("<B")
+LEVEL = struct.Struct("<B")
+MOVE_COUNT = struct.Struct("<B")
+# Number of buckets of the remaining hp, bucket b holds the fractions in (b / buckets, (b + 1) / buckets]
+HP_BUCKETS = 4
+# Non volatile statuses of the tables, the position in this list is the status bucket
+STATUSES = [StatusType.Normal, StatusType.Psn, StatusType.Tox, StatusType.Brn, StatusType.Par, StatusType.Frz,
+            StatusType.Slp]
+STATUS_BUCKETS = {status: index for index, status in enumerate(STATUSES)}
+# Values are stored as signed bytes, value * VALUE_SCALE
+VALUE_SCALE = 127
+# Seconds and turns of the solver for each entry of the tables
+ENTRY_TIME_BUDGET = 0.5
+ENTRY_MAX_TURNS = 4
+
+
+class Tablebase:
+    """Precomputed values of the 1v1 endgames between the species of a list, read from a memory-mapped file.
+    For each ordered pair of species (bot, opponent) the file holds a table indexed by the hp bucket and the status
+    of both pokemons, with the value for the bot of the position solved by the EndgameSolver in [-1, 1].
+    The pairs are stored densely in the order of the species, so a lookup is two dict accesses and one byte read.
+    The tables assume no boosts, no volatile statuses and no weather or terrain, and the movesets used by the build,
+    stored with each species: lookup and lookup_field return None for the positions that they don't cover, also when
+    the pokemon has other moves or not all of them are revealed yet. The stored moveset has the size of a full one, or
+    the whole pool of the species, so a pokemon whose moves match it has no other moves left in its pool.
+    An entry is solved with the hp in the middle of its buckets and a limited time, so it is an approximation of the
+    position and not an exact value.
+
+    The file is built offline by build_tablebase, the format is:
+    header (magic, version, hp buckets, statuses, species), for each species its name, level and moves, then the
+    tables of the pairs, one signed byte for each entry.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the file built by build_tablebase
+        """
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.hp_buckets, statuses, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION or statuses != len(STATUSES):
+            self.close()
+            raise ValueError("{} is not a tablebase of version {}".format(path, VERSION))
+        # Name -> (position, level, moveset) of the species
+        self.species = {}
+        offset = HEADER.size
+        for index in range(count):
+            name, offset = self.read_name(offset)
+            level = LEVEL.unpack_from(self.data, offset)[0]
+            offset += LEVEL.size
+            moves_count = MOVE_COUNT.unpack_from(self.data, offset)[0]
+            offset += MOVE_COUNT.size
+            moves = []
+            for _ in range(moves_count):
+                move, offset = self.read_name(offset)
+                moves.append(move)
+            self.species[name] = (index, level, tuple(moves))
+        self.tables_offset = offset
+        # Size of the part of a table for one bot state and of a whole table
+        self.oppo_size = self.hp_buckets * len(STATUSES)
+        self.table_size = self.oppo_size * self.oppo_size
+        self.pair_stride = count * self.table_size
+
+    def read_name(self, offset):
+        """Returns a length-prefixed name at an offset of the file and the offset after it"""
+        length = NAME_LENGTH.unpack_from(self.data, offset)[0]
+        offset += NAME_LENGTH.size
+        return self.data[offset:offset + length].decode("utf-8"), offset + length
+
+    @staticmethod
+    def moveset(pokemon):
+        """Returns the signature of the moves of a pokemon, the names in alphabetical order"""
+        return tuple(sorted(move.move_name for move in pokemon.moves.values()))
+
+    def covers(self, pokemon):
+        """Returns the position of the species of a pokemon in the tablebase, None if its species, level or moves are
+        not the ones of the tables. The possible moves are not checked, the pool of an opponent is not cleared when its
+        last move is revealed but the revealed moves already make the whole stored moveset"""
+        species = self.species.get(pokemon.name)
+        if species is None or species[1] != pokemon.level or species[2] != Tablebase.moveset(pokemon):
+            return None
+        return species[0]
+
+    def lookup(self, bot_pokemon, oppo_pokemon):
+        """Returns the value for the bot of the 1v1 between two pokemons, None if their species, levels or moves are
+        not the ones of the tablebase or a status is not in the tables
+        :param bot_pokemon: The pokemon of the bot
+        :param oppo_pokemon: The pokemon of the opponent
+        :return: The value in [-1, 1] or None
+        """
+        bot = self.covers(bot_pokemon)
+        oppo = self.covers(oppo_pokemon)
+        if bot is None or oppo is None:
+            return None
+        bot_status = STATUS_BUCKETS.get(bot_pokemon.non_volatile_status)
+        oppo_status = STATUS_BUCKETS.get(oppo_pokemon.non_volatile_status)
+        if bot_status is None or oppo_status is None:
+            return None
+        offset = self.tables_offset + bot * self.pair_stride + oppo * self.table_size + \
+            Tablebase.state_index(bot_pokemon, bot_status, self.hp_buckets) * self.oppo_size + \
+            Tablebase.state_index(oppo_pokemon, oppo_status, self.hp_buckets)
+        value = self.data[offset]
+        return (value - 256 if value > 127 else value) / VALUE_SCALE
+
+    def lookup_field(self, field):
+        """Returns the value for the bot of the 1v1 between the active pokemons of a field, None if the tables
+        don't cover it"""
+        if field.weather is not Weather.Normal or field.field is not Field.Normal:
+            return None
+        for pokemon in (field.active_pokemon_bot, field.active_pokemon_oppo):
+            if pokemon.volatile_status or any(pokemon.stats.mul_stats.values()) or \
+                    any(value != 1 for value in pokemon.stats.volatile_mul.values()):
+                return None
+        return self.lookup(field.active_pokemon_bot, field.active_pokemon_oppo)
+
+    @staticmethod
+    def hp_bucket(pokemon, hp_buckets):
+        """Returns the bucket of the remaining hp of a pokemon that is not fainted"""
+        fraction = pokemon.stats.get_actual_hp() / pokemon.stats.real_stats[StatsType.HP]
+        return min(hp_buckets - 1, max(0, math.ceil(fraction * hp_buckets) - 1))
+
+    @staticmethod
+    def state_index(pokemon, status, hp_buckets):
+        return Tablebase.hp_bucket(pokemon, hp_buckets) * len(STATUSES) + status
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        """Number of pairs of species"""
+        return len(self.species) ** 2
+
+    def __repr__(self):
+        return "Tablebase({} species, {} hp buckets)".format(len(self.species), self.hp_buckets)
+
+
+def pack_name(name):
+    """Returns a name as length-prefixed utf-8 bytes"""
+    name = name.encode("utf-8")
+    return NAME_LENGTH.pack(len(name)) + name
+
+
+def set_state(pokemon, hp_bucket, status, hp_buckets):
+    """Gives a pokemon the hp in the middle of a bucket and a status"""
+    max_hp = pokemon.stats.real_stats[StatsType.HP]
+    pokemon.stats.damage = max_hp - max(1, round(max_hp * (hp_bucket + 0.5) / hp_buckets))
+    pokemon.non_volatile_status = status
+    pokemon.bad_poison_turn = 0
+
+
+def solve_pair(bot_pokemon, oppo_pokemon, eval_fn, hp_buckets=HP_BUCKETS, time_budget=ENTRY_TIME_BUDGET,
+               max_turns=ENTRY_MAX_TURNS):
+    """Solves the table of a pair of species
+    :param bot_pokemon: The pokemon of the bot, with its moves
+    :param oppo_pokemon: The pokemon of the opponent, with its moves
+    :param eval_fn: Function that evaluates a battle field from the bot point of view
+    :param hp_buckets: Number of hp buckets
+    :param time_budget: Seconds of the solver for each entry
+    :param max_turns: Max number of turns of the solver for each entry
+    :return: The table as bytes, in the order of the file
+    """
+    bot_pokemon = bot_pokemon.deepcopy()
+    oppo_pokemon = oppo_pokemon.deepcopy()
+    field = BattleFieldSingle(bot_pokemon, oppo_pokemon, {1: bot_pokemon}, {1: oppo_pokemon})
+    # The entries of a pair share the positions reached by the solver, so it keeps its values between them
+    solver = EndgameSolver(threshold=1, max_turns=max_turns, team_size=1)
+    table = bytearray()
+    for bot_hp in range(hp_buckets):
+        for bot_status in STATUSES:
+            set_state(bot_pokemon, bot_hp, bot_status, hp_buckets)
+            for oppo_hp in range(hp_buckets):
+                for oppo_status in STATUSES:
+                    set_state(oppo_pokemon, oppo_hp, oppo_status, hp_buckets)
+                    value = solver.solve(field, eval_fn, time_budget, keep_memo=True)[0]
+                    table.append(round(value * VALUE_SCALE) & 0xFF)
+    return bytes(table)
+
+
+def solve_pair_task(task):
+    return task[0], task[1], solve_pair(*task[2:])
+
+
+def build_tablebase(path, pokemons, eval_fn, hp_buckets=HP_BUCKETS, time_budget=ENTRY_TIME_BUDGET,
+                    max_turns=ENTRY_MAX_TURNS, workers=1):
+    """Builds the tablebase file of the 1v1 endgames between all the ordered pairs of a list of pokemons
+    :param path: Path of the file, it is overwritten
+    :param pokemons: List of pokemons with their moves, one for each species, the tables only cover these movesets
+    :param eval_fn: Function that evaluates a battle field from the bot point of view, it must be picklable
+    :param hp_buckets: Number of hp buckets
+    :param time_budget: Seconds of the solver for each entry
+    :param max_turns: Max number of turns of the solver for each entry
+    :param workers: Number of processes that solve the pairs
+    """
+    header = bytearray(HEADER.pack(MAGIC, VERSION, hp_buckets, len(STATUSES), len(pokemons)))
+    for pokemon in pokemons:
+        header += pack_name(pokemon.name) + LEVEL.pack(pokemon.level)
+        moveset = Tablebase.moveset(pokemon)
+        header += MOVE_COUNT.pack(len(moveset))
+        for move in moveset:
+            header += pack_name(move)
+    table_size = (hp_buckets * len(STATUSES)) ** 2
+    tasks = [(bot, oppo, pokemons[bot], pokemons[oppo], eval_fn, hp_buckets, time_budget, max_turns)
+             for bot in range(len(pokemons)) for oppo in range(len(pokemons))]
+    with open(path, "wb") as file:
+        file.write(header)
+        file.truncate(len(header) + len(tasks) * table_size)
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        results = executor.map(solve_pair_task, tasks) if executor is not None else map(solve_pair_task, tasks)
+        try:
+            for done, (bot, oppo, table) in enumerate(results, 1):
+                file.seek(len(header) + (bot * len(pokemons) + oppo) * table_size)
+                file.write(table)
+                logger.info("Solved {} vs {}, {}/{}".format(pokemons[bot].name, pokemons[oppo].name, done,
+                                                            len(tasks)))
+        finally:
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,193 @@
+import random
+from enum import Enum, auto
+
+from model.stats_type import StatsType
+
+
+class Bound(Enum):
+    """Kind of value stored in a transposition entry"""
+    Exact = auto()
+    Lower = auto()
+    Upper = auto()
+
+
+class ZobristHasher:
+    """Zobrist hashing of a BattleFieldSingle.
+    Every feature of the state (active pokemons, hp, boosts, statuses, weather and terrain) gets a random 64 bit
+    key, the hash of a field is the xor of the keys of its features. Keys are generated the first time a feature
+    is seen.
+    """
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.keys = {}
+
+    def key(self, feature):
+        """Returns the key of a feature
+        :param feature: A hashable tuple that describes the feature
+        :return: A 64 bit int
+        """
+        key = self.keys.get(feature)
+        if key is None:
+            key = self.random.getrandbits(64)
+            self.keys[feature] = key
+        return key
+
+    def pokemon_hash(self, side, pokemon, is_active):
+        """Returns the xor of the keys of a single pokemon
+        :param side: 1 for the bot, 2 for the opponent
+        :param pokemon: The pokemon
+        :param is_active: True if the pokemon is on the field
+        :return: A 64 bit int
+        """
+        return self.state_hash(side, pokemon.name, pokemon.stats.get_actual_hp(), pokemon.non_volatile_status,
+                               pokemon.stats.mul_stats, pokemon.volatile_status, is_active)
+
+    def state_hash(self, side, name, hp, non_volatile_status, mul_stats, volatile_status, is_active):
+        state_hash = self.key((side, name, "hp", hp))
+        state_hash ^= self.key((side, name, "status", non_volatile_status))
+        for stat, stage in mul_stats.items():
+            if stage:
+                state_hash ^= self.key((side, name, stat, stage))
+        for status in volatile_status or ():
+            state_hash ^= self.key((side, name, status))
+        if is_active:
+            state_hash ^= self.key((side, name, "active"))
+        return state_hash
+
+    def side_hash(self, field, side, name):
+        """Returns the hash of the pokemon with the given name on a side of the field, 0 if it is not there"""
+        index = field.get_pokemon_index_by_name(side, name)
+        if index is None:
+            return 0
+        pokemon = field.bench_selector_side[side][index]
+        return self.pokemon_hash(side, pokemon, pokemon.name == field.active_selector_side[side].name)
+
+    def hash_field(self, field):
+        """Computes the full hash of a field
+        :param field: The battle field
+        :return: A 64 bit int
+        """
+        field_hash = self.key(("weather", field.weather)) ^ self.key(("terrain", field.field))
+        for side in (1, 2):
+            for index in field.bench_selector_side[side]:
+                field_hash ^= self.side_hash(field, side, field.bench_selector_side[side][index].name)
+        return field_hash
+
+    def update(self, field_hash, field, record):
+        """Computes the hash of a field after a turn from the hash it had before.
+        Only the pokemons that took part in the turn are hashed again.
+        :param field_hash: The hash of the field before the turn
+        :param field: The field after the turn
+        :param record: The FieldUndo returned by BattleFieldSingle.apply_actions
+        :return: The hash of the field after the turn
+        """
+        for side, pokemon, state in record.saved:
+            field_hash ^= self.state_hash(side, pokemon.name, pokemon.stats.real_stats[StatsType.HP] - state.damage,
+                                          state.non_volatile_status, state.mul_stats, state.volatile_status,
+                                          pokemon is record.active[side])
+            field_hash ^= self.pokemon_hash(side, pokemon, pokemon is field.active_selector_side[side])
+        if record.weather != field.weather:
+            field_hash ^= self.key(("weather", record.weather)) ^ self.key(("weather", field.weather))
+        if record.field != field.field:
+            field_hash ^= self.key(("terrain", record.field)) ^ self.key(("terrain", field.field))
+        return field_hash
+
+
+class TranspositionEntry:
+    """Result of the search of a node
+    value: value found for the node
+    depth: number of turns searched below the node
+    bound: Bound.Exact if value is the real value, Lower/Upper if the search was cut by alpha/beta
+    best_action: best action of the bot in the node
+    """
+
+    def __init__(self, value, depth, bound, best_action):
+        self.value = value
+        self.depth = depth
+        self.bound = bound
+        self.best_action = best_action
+
+
+class TranspositionTable:
+    """Bounded table of the already searched nodes, indexed by Zobrist hash.
+    When full the oldest entry is evicted.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = {}
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def probe(self, field_hash):
+        """Returns the entry of a node or None"""
+        self.probes += 1
+        entry = self.entries.get(field_hash)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def lookup(self, field_hash, depth, alpha, beta):
+        """Returns the stored value of a node if it is deep enough and usable within the alpha-beta window
+        :param field_hash: The hash of the node
+        :param depth: Number of turns that the search would do below the node
+        :param alpha: Best value already guaranteed to the bot
+        :param beta: Best value already guaranteed to the opponent
+        :return: A tuple (entry, value), value is None if the node must be searched
+        """
+        entry = self.probe(field_hash)
+        if entry is None or entry.depth < depth:
+            return entry, None
+        if entry.bound is Bound.Exact or (entry.bound is Bound.Lower and entry.value >= beta) or \
+                (entry.bound is Bound.Upper and entry.value <= alpha):
+            self.cutoffs += 1
+            return entry, entry.value
+        return entry, None
+
+    def store(self, field_hash, value, depth, bound, best_action=None):
+        """Stores the result of the search of a node, a deeper entry of the same node is never replaced"""
+        old_entry = self.entries.get(field_hash)
+        if old_entry is not None:
+            if old_entry.depth > depth:
+                return
+        elif len(self.entries) >= self.max_size:
+            if not self.entries:
+                return
+            self.entries.pop(next(iter(self.entries)))
+            self.evictions += 1
+        self.entries[field_hash] = TranspositionEntry(value, depth, bound, best_action)
+        self.stores += 1
+
+    def promote(self, field_hash):
+        """Moves the entry of a node at the end of the table, so that it is the last one to be evicted
+        :return: The entry or None
+        """
+        entry = self.entries.pop(field_hash, None)
+        if entry is not None:
+            self.entries[field_hash] = entry
+        return entry
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "{} entries, {} probes, {:.1%} hits, {} cutoffs, {} evictions".format(len(self.entries), self.probes,
+                                                                                   self.hit_rate(), self.cutoffs,
+                                                                                   self.evictions)
@@ -0,0 +1,68 @@
+import argparse
+import time
+from ai.chooser import Chooser
+from ai.moveset_belief import MovesetBelief
+from ai.tablebase import build_tablebase, HP_BUCKETS, ENTRY_TIME_BUDGET, ENTRY_MAX_TURNS
+from protocol.data_source import DatabaseDataSource
+import model.setup_logger
+import logging
+
+logger = logging.getLogger("BuildTablebase")
+
+# Number of moves of a pokemon in the random battles
+MOVESET_SIZE = 4
+
+
+def load_pokemons(db, species, level):
+    """Builds the pokemons of the tablebase, each one with the most common moves of its Randomsets pool
+    :param db: The data source
+    :param species: Names of the species, None for all the species of the Randomsets table
+    :param level: Level of the pokemons
+    :return: List of pokemons
+    """
+    pools = db.get_random_pools()
+    belief = MovesetBelief(pools.values(), MOVESET_SIZE)
+    pokemons = []
+    for name in (species if species else sorted(pools)):
+        try:
+            pokemon = db.get_pokemon_by_name(name, level)
+        except IndexError:
+            logger.warning("{} is not in the Pokemon table".format(name))
+            continue
+        pokemon.possible_moves = {index: move for index, move in db.get_possible_moves_by_name(name).items()
+                                  if move is not None}
+        pokemon.moves = {position: pokemon.possible_moves[index]
+                         for position, index in enumerate(belief.likely_moves(pokemon), 1)}
+        pokemon.possible_moves = {}
+        pokemons.append(pokemon)
+    return pokemons
+
+
+def main():
+    """
+    Offline build of the 1v1 endgame tablebase used by the hard mode.
+    """
+    parser = argparse.ArgumentParser(description="Pokemon Showdown Bot endgame tablebase")
+    parser.add_argument("path", type=str, help="The file of the tablebase")
+    parser.add_argument("-s", "--species", type=str, nargs="*",
+                        help="Names of the species of the Randomsets table to include", default=None)
+    parser.add_argument("-l", "--level", type=int,
+                        help="The level of the pokemons, the battles use the tablebase only at this level", default=80)
+    parser.add_argument("-b", "--hp_buckets", type=int, help="Number of buckets of the remaining hp",
+                        default=HP_BUCKETS)
+    parser.add_argument("-t", "--time_budget", type=float, help="Seconds of the solver for each entry",
+                        default=ENTRY_TIME_BUDGET)
+    parser.add_argument("-x", "--max_turns", type=int, help="Max number of turns of the solver for each entry",
+                        default=ENTRY_MAX_TURNS)
+    parser.add_argument("-w", "--workers", type=int, help="Number of processes that solve the pairs", default=1)
+    args = parser.parse_args()
+    pokemons = load_pokemons(DatabaseDataSource(), args.species, args.level)
+    print("Building the tablebase of {} pairs of species".format(len(pokemons) ** 2))
+    start = time.monotonic()
+    build_tablebase(args.path, pokemons, Chooser.valuation_action, args.hp_buckets, args.time_budget,
+                    args.max_turns, args.workers)
+    print("Tablebase {} built in {:.0f} seconds".format(args.path, time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()
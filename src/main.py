@@ -3,6 +3,7 @@ import argparse
 import getpass
 from websocket._core import create_connection
 from protocol.game_control import GameLoop
+from ai.endgame import ENDGAME_THRESHOLD
 import ssl
 import model.setup_logger
 import logging
@@ -21,18 +22,37 @@ async def main(password):
     parser.add_argument("-u", "--username", type=str, help="The username of your Pokemon Showdown account",
                         required=True)
     parser.add_argument("-d", "--difficulty", type=str, help="The difficulty", default="easy",
-                        choices={"easy", "normal", "hard"})
+                        choices={"easy", "normal", "hard", "mcts"})
     parser.add_argument("-m", "--mode", type=str, help="The way to use the bot, 'searching' or 'challenging'",
                         required=True, choices={"searching", "challenging"})
     parser.add_argument("-g", "--gen", type=int, help="The pokemon generation chosen for the random battle", default=7,
                         choices={1, 2, 3, 4, 5, 6, 7})
     parser.add_argument("-s", "--sex", type=str, help="The sex choosen for your account", default="m",
                         choices={"m", "f"})
+    parser.add_argument("-t", "--time_budget", type=float,
+                        help="Seconds that the hard and mcts modes can spend on each turn", default=3)
+    parser.add_argument("-i", "--iterations", type=int,
+                        help="Max number of iterations of the mcts mode on each turn", default=None)
+    parser.add_argument("-w", "--workers", type=int, help="Number of processes that the hard mode uses to search",
+                        default=1)
+    parser.add_argument("-k", "--top_moves", type=int,
+                        help="Max number of unrevealed moves of the opponent that the search expands", default=4)
+    parser.add_argument("-p", "--move_mass", type=float,
+                        help="Probability mass of the unrevealed moves of the opponent that the search expands",
+                        default=None)
+    parser.add_argument("-P", "--ponder", action="store_true",
+                        help="Let the hard mode search the next turn while the opponent is choosing its action")
+    parser.add_argument("-e", "--endgame", type=int,
+                        help="Max number of pokemons alive on each side to let the hard mode solve the endgame, 0 to "
+                             "disable it", default=ENDGAME_THRESHOLD)
+    parser.add_argument("-T", "--tablebase", type=str,
+                        help="The file of the 1v1 endgame tablebase built by build_tablebase.py", default=None)
     args = parser.parse_args()
     # websocket = create_connection('ws://sim.smogon.com:8000/showdown/websocket')
     websocket = create_connection('wss://sim.smogon.com/showdown/websocket', sslopt={"cert_reqs": ssl.CERT_NONE})
     gl = GameLoop(websocket, args.username, password, args.sex, args.gen, args.difficulty, args.mode,
-                               args.opponent_name)
+                               args.opponent_name, args.time_budget, args.iterations,
+                               args.workers, args.top_moves, args.move_mass, args.ponder, args.endgame, args.tablebase)
 
     print("Starting bot with username {} vs {}".format(args.username, args.opponent_name))
     print("-----------------------------------------------------------------------")
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class DamageCache:
+    """Bounded cache of the deterministic part of the damage of a move, everything but the roll.
+    The keys are built from the signatures of the stats of the pokemons, so a change of the boosts or of the volatile
+    multipliers gives a new key and the old entries are never used again, when full the least recently used entry is
+    evicted.
+    The moves are in the keys by their MoveTemplate, so the copies of a move made by the search and by every
+    Pokemon.deepcopy share the entries across the turns"""
+
+    def __init__(self, max_size=20000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the value stored for the key or None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "{} entries, {} hits, {} misses, {:.1%} hits".format(len(self.entries), self.hits, self.misses,
+                                                                    self.hit_rate())
@@ -1,66 +1,227 @@
 from random import uniform
 
+import numpy as np
+
+from model.damage_cache import DamageCache
 from model.move_type import MoveCategory
 from model.pokemon_type import TypeMultiplier
+from model.stats_type import StatsType
 from model.status_type import StatusType
-from model.weather_type import WeatherModifiers, FieldModifiers
+
+# Category id of the moves that deal no damage
+STATUS_CATEGORY = MoveCategory.Status.category_id
+# Stat id of the first column of the defense matrix of damage_tensor
+DEFENSE_OFFSET = StatsType.Atk.stat_id
 
 
 class DamageCalculator:
     """This class contains a static method for damage calculation"""
 
+    # Quantiles of the damage roll used instead of the random roll when the outcomes of a move are expanded,
+    # as (probability, roll)
+    roll_buckets = [(1 / 3, 0.875), (1 / 3, 0.925), (1 / 3, 0.975)]
+
+    # Deterministic part of the damage of calculate
+    cache = DamageCache()
+
+    # Tables of damage_tensor: the type charts as arrays and the stats that a move can be defended with, in the
+    # order of the columns of the defense matrix
+    type_chart = np.array(TypeMultiplier.chart, dtype=np.float64)
+    dual_type_chart = np.array(TypeMultiplier.dual_chart, dtype=np.float64)
+    defense_stats = [StatsType.Atk, StatsType.Def, StatsType.Spa, StatsType.Spd, StatsType.Spe]
+
     # Pokemon1 assumiamo sia bot
     # Pokemon2 assumiamo sia oppo
     @staticmethod
     def weak_to(pokemon1_type, pokemon2_type):
-        return pokemon2_type in TypeMultiplier.weakTo[pokemon1_type]
+        return TypeMultiplier.weak[pokemon1_type.type_id][pokemon2_type.type_id]
 
     @staticmethod
     def resists_to(pokemon1_type, pokemon2_type):
-        return pokemon2_type in TypeMultiplier.resistsTo[pokemon1_type]
+        return TypeMultiplier.resists[pokemon1_type.type_id][pokemon2_type.type_id]
 
     @staticmethod
     def immune_to(pokemon1_type, pokemon2_type):
-        return pokemon2_type in TypeMultiplier.immuneTo[pokemon1_type]
+        return TypeMultiplier.immune[pokemon1_type.type_id][pokemon2_type.type_id]
 
     @staticmethod
-    def calculate(weather, terrain, user, move, target) -> int:
+    def calculate(weather, terrain, user, move, target, roll=None) -> int:
         """Method to predict the damage
         :param weather: The current weather
         :param terrain: The current terrain
         :param user: The pokemon who casts the move
         :param move: The move object
         :param target: The target pokemon
+        :param roll: The damage roll between 0.85 and 1, random if not given
         :return: An int that represents the predicted damage dealt
         """
 
-        if move.category is MoveCategory.Status:
+        if move.category_id == STATUS_CATEGORY:
             return 0
-        if DamageCalculator.immune_to(target.types[0], move.move_type) or \
-                (len(target.types) > 1 and DamageCalculator.immune_to(target.types[1], move.move_type)):
+        effectiveness = TypeMultiplier.effectiveness(move.move_type, target.types)
+        if effectiveness == 0:
             return 0
 
-        else:
-            base_damage = (((2*user.level +10)*user.stats.get_actual(move.scale_with)*move.calculate_base_power(
-                user.types))/(
-                    250*target.stats.get_actual(move.defends_on))+2)
+        # Everything but the roll only depends on the key, weather and terrain are singletons so they are in it by id.
+        # The move is in it by its template, the immutable part shared by all the copies of the move
+        stab = move.move_type in user.types
+        burned = user.non_volatile_status is StatusType.Brn
+        key = (move.template, stab, effectiveness, user.level, user.stats.signature(), user.damage_output_multiplier,
+               burned, target.stats.signature(), target.damage_input_multiplier, id(weather), id(terrain))
+        cached = DamageCalculator.cache.get(key)
+        if cached is None:
+            cached = (DamageCalculator.kernel(user.level, user.stats.get_actual(move.scale_with), move.powers[stab],
+                                              target.stats.get_actual(move.defends_on),
+                                              move.weather_mults[weather.weather_id], effectiveness,
+                                              move.field_mults[terrain.field_id], user.damage_output_multiplier,
+                                              target.damage_input_multiplier),
+                      move.burn_multiplier if burned else 1)
+            DamageCalculator.cache.put(key, cached)
+
+        if roll is None:
+            roll = uniform(0.85, 1)
+
+        # Same order of the products as before the cache, so the result doesn't change
+        return int(cached[0] * roll * cached[1])
+
+    @staticmethod
+    def kernel(level, attack, power, defense, weather_mult, effectiveness, terrain_mult, output_mult,
+               input_mult) -> float:
+        """Deterministic part of the damage, before the roll and the burn multiplier, only on ints and floats.
+        The operations are the ones of the damage formula in the same order, so the result is the same to the bit
+        :param level: The level of the user
+        :param attack: The actual stat the move scales with
+        :param power: The base power of the move with the STAB
+        :param defense: The actual stat of the target the move is defended with
+        :param weather_mult: The multiplier of the weather
+        :param effectiveness: The type multiplier against the target
+        :param terrain_mult: The multiplier of the terrain
+        :param output_mult: The damage output multiplier of the user
+        :param input_mult: The damage input multiplier of the target
+        :return: The damage as a float
+        """
+        base_damage = (((2*level + 10)*attack*power)/(250*defense)+2)
+        mult = weather_mult * effectiveness
+        return base_damage * mult * terrain_mult * output_mult * input_mult
+
+    @staticmethod
+    def damage_tensor(weather, terrain, attackers, defenders, roll=None, possible_moves=False):
+        """Computes the damage of every move of a team against every pokemon of another team in one vectorized pass,
+        every entry is the value that calculate would return with the same roll
+        :param weather: The current weather
+        :param terrain: The current terrain
+        :param attackers: Dict index -> pokemon of the team that casts the moves
+        :param defenders: Dict index -> pokemon of the team hit by the moves
+        :param roll: The damage roll between 0.85 and 1, a random roll for each entry if not given
+        :param possible_moves: True to add the possible moves of the attackers after their known moves
+        :return: A DamageTensor
+        """
+        attacker_indexes = list(attackers)
+        defender_indexes = list(defenders)
+        move_indexes = []
+        for index in attacker_indexes:
+            indexes = list(attackers[index].moves)
+            if possible_moves:
+                indexes.extend(attackers[index].possible_moves)
+            move_indexes.append(indexes)
+        slots = max((len(indexes) for indexes in move_indexes), default=0)
+        shape = (len(attacker_indexes), slots)
+
+        # Terms of each move of each attacker, the empty slots deal no damage
+        numerator = np.zeros(shape)
+        defends_on = np.zeros(shape, dtype=np.int64)
+        move_type = np.zeros(shape, dtype=np.int64)
+        weather_mult = np.ones(shape)
+        terrain_mult = np.ones(shape)
+        output_mult = np.ones(shape)
+        burn_mult = np.ones(shape)
+        damaging = np.zeros(shape, dtype=bool)
+        for position, index in enumerate(attacker_indexes):
+            user = attackers[index]
+            for slot, move_index in enumerate(move_indexes[position]):
+                if move_index in user.moves:
+                    move = user.moves[move_index]
+                else:
+                    move = user.possible_moves[move_index]
+                if move.category_id == STATUS_CATEGORY:
+                    continue
+                damaging[position, slot] = True
+                numerator[position, slot] = (2 * user.level + 10) * user.stats.get_actual(move.scale_with) * \
+                    move.powers[move.move_type in user.types]
+                defends_on[position, slot] = move.defends_on_id - DEFENSE_OFFSET
+                move_type[position, slot] = move.type_id
+                weather_mult[position, slot] = move.weather_mults[weather.weather_id]
+                terrain_mult[position, slot] = move.field_mults[terrain.field_id]
+                output_mult[position, slot] = user.damage_output_multiplier
+                if user.non_volatile_status is StatusType.Brn:
+                    burn_mult[position, slot] = move.burn_multiplier
+
+        # Terms of each defender
+        defense = np.array([[defenders[index].stats.get_actual(stat) for stat in DamageCalculator.defense_stats]
+                            for index in defender_indexes], dtype=np.float64).reshape(-1, len(
+                                DamageCalculator.defense_stats))
+        first_type = np.array([defenders[index].types[0].type_id for index in defender_indexes], dtype=np.int64)
+        second_type = np.array([defenders[index].types[-1].type_id for index in defender_indexes], dtype=np.int64)
+        input_mult = np.array([defenders[index].damage_input_multiplier for index in defender_indexes],
+                              dtype=np.float64)
+
+        effectiveness = DamageCalculator.dual_type_chart[move_type[:, :, None], first_type, second_type]
+        for position, index in enumerate(defender_indexes):
+            if len(defenders[index].types) > 2:
+                type_ids = [pokemon_type.type_id for pokemon_type in defenders[index].types]
+                effectiveness[:, :, position] = DamageCalculator.type_chart[move_type][:, :, type_ids].prod(axis=-1)
 
-        # Try to get the multiplier based on the weather, if is not in the dict get '1'
-        mult = WeatherModifiers.modifiers.get((weather, move.move_type), 1)
-        terrain_mult = FieldModifiers.modifiers.get((move.move_type, terrain), 1)
+        if roll is None:
+            roll = np.random.uniform(0.85, 1, shape + (len(defender_indexes),))
 
-        roll = uniform(0.85, 1)
+        # Same operations of calculate, in the same order
+        base_damage = numerator[:, :, None] / (250 * defense[:, defends_on]).transpose(1, 2, 0) + 2
+        mult = weather_mult[:, :, None] * effectiveness
+        damage = base_damage * mult * terrain_mult[:, :, None] * output_mult[:, :, None] * input_mult * roll * \
+            burn_mult[:, :, None]
+        damage = np.where(damaging[:, :, None] & (effectiveness != 0), np.trunc(damage), 0).astype(np.int64)
+        return DamageTensor(damage, attacker_indexes, move_indexes, defender_indexes)
+
+    @staticmethod
+    def damage_tensors(field, roll=None):
+        """Computes the damage tensors of a battle field
+        :param field: The battle field
+        :param roll: The damage roll between 0.85 and 1, random if not given
+        :return: A tuple with the DamageTensor of the bot team against the opponent team and the DamageTensor of
+        the opponent team, known and possible moves, against the bot team
+        """
+        return (DamageCalculator.damage_tensor(field.weather, field.field, field.all_pkmns_bot, field.all_pkmns_oppo,
+                                               roll),
+                DamageCalculator.damage_tensor(field.weather, field.field, field.all_pkmns_oppo, field.all_pkmns_bot,
+                                               roll, True))
 
-        # Multiple calculation
-        for pkmn_type in target.types:
-            if move.move_type in TypeMultiplier.weakTo[pkmn_type]:
-                mult *= 2
-            elif move.move_type in TypeMultiplier.resistsTo[pkmn_type]:
-                mult *= 0.5
 
-        burn_multiplier = 1
-        if user.non_volatile_status == StatusType.Brn and move.scale_with.name == "Atk":
-            burn_multiplier = 0.5
+class DamageTensor:
+    """Damage of every move of a team against every pokemon of another team
+    Args:
+        damage (numpy.ndarray): int array (attacker, move, defender), 0 for the empty move slots
+        attackers (list): bench indexes of the attackers along the first axis
+        moves (list): for each attacker, the move indexes along the second axis
+        defenders (list): bench indexes of the defenders along the last axis
+    """
 
-        return int(base_damage * mult * terrain_mult * user.damage_output_multiplier * target.damage_input_multiplier *
-                   roll * burn_multiplier)
+    def __init__(self, damage, attackers, moves, defenders):
+        self.damage = damage
+        self.attackers = attackers
+        self.moves = moves
+        self.defenders = defenders
+        self.attacker_position = {index: position for position, index in enumerate(attackers)}
+        self.defender_position = {index: position for position, index in enumerate(defenders)}
+        self.move_slot = [{move_index: slot for slot, move_index in enumerate(indexes)} for indexes in moves]
+
+    def get(self, attacker, move, defender):
+        """Returns the damage of a move of an attacker against a defender, all given by index"""
+        position = self.attacker_position[attacker]
+        return int(self.damage[position, self.move_slot[position][move], self.defender_position[defender]])
+
+    def max_damage(self, attacker, defender):
+        """Returns the highest damage of the moves of an attacker against a defender"""
+        position = self.attacker_position[attacker]
+        if not self.moves[position]:
+            return 0
+        return int(self.damage[position, :, self.defender_position[defender]].max())
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from model.pokemon import Pokemon
+from model.pokemon import Pokemon, PokemonState
 from model.stats_type import StatsType
 from model.status import Status
 from model.status_type import StatusType
@@ -72,6 +72,8 @@ class BattleFieldSingle(BattleField):
         self.all_pkmns_oppo = bench_oppo
         self.active_selector_side = {1: self.active_pokemon_bot, 2: self.active_pokemon_oppo}
         self.bench_selector_side = {1: self.all_pkmns_bot, 2: self.all_pkmns_oppo}
+        # MatchupMatrix of the battle, the copies share it
+        self.matchups = None
 
 
     def deepcopy(self):
@@ -81,7 +83,127 @@ class BattleFieldSingle(BattleField):
             bot_bench[element] = self.all_pkmns_bot[element].deepcopy()
         for element in self.all_pkmns_oppo:
             oppo_bench[element] = self.all_pkmns_oppo[element].deepcopy()
-        return BattleFieldSingle(bot_bench[1], oppo_bench[1], bot_bench, oppo_bench)
+        new_field = BattleFieldSingle(bot_bench[1], oppo_bench[1], bot_bench, oppo_bench)
+        new_field.weather = self.weather
+        new_field.field = self.field
+        new_field.speed_control = self.speed_control
+        new_field.matchups = self.matchups
+        return new_field
+
+    def get_move(self, player: int, move_index: int):
+        """Returns the move object of the active pokemon of a player"""
+        if move_index < 5:
+            return self.active_selector_side[player].moves[move_index]
+        return self.active_selector_side[player].possible_moves[move_index]
+
+    def turn_outcomes(self, bot_action, oppo_action):
+        """Returns all the possible random outcomes of a turn
+        :param bot_action: Tuple (index, is_move) of the bot
+        :param oppo_action: Tuple (index, is_move) of the opponent
+        :return: A list of (probability, outcomes) where outcomes is a dict player -> MoveOutcome to pass to
+        apply_actions
+        """
+        player_outcomes = []
+        for player, (index, is_move) in ((1, bot_action), (2, oppo_action)):
+            if is_move and index is not None:
+                player_outcomes.append(self.get_move(player, index).outcomes())
+            else:
+                player_outcomes.append([None])
+        return [((bot_outcome.probability if bot_outcome else 1) * (oppo_outcome.probability if oppo_outcome else 1),
+                 {1: bot_outcome, 2: oppo_outcome})
+                for bot_outcome in player_outcomes[0] for oppo_outcome in player_outcomes[1]]
+
+    def apply_actions(self, bot_action, oppo_action, replace_fainted=None, outcomes=None):
+        """Plays a turn in place and records what it changes, so that it can be rolled back with undo.
+        The faster pokemon moves first, switches happen before moves.
+        :param bot_action: Tuple (index, is_move) of the bot, a move index or a bench index
+        :param oppo_action: Tuple (index, is_move) of the opponent, index is None if the opponent does nothing
+        :param replace_fainted: Function that takes the field and returns the bench index of the pokemon that
+        replaces the active pokemon of the bot when it faints, or None
+        :param outcomes: Dict player -> MoveOutcome from turn_outcomes, if None the moves are random
+        :return: A FieldUndo
+        """
+        record = FieldUndo(self)
+        record.outcomes = outcomes or {}
+        move1, is_move1 = bot_action
+        move2, is_move_2 = oppo_action
+        if move2 is None:
+            if is_move1:
+                self._record_move(record, 1, move1)
+            else:
+                self._record_switch(record, 1, move1)
+        elif not is_move1 and not is_move_2:
+            self._record_switch(record, 1, move1)
+            self._record_switch(record, 2, move2)
+        elif is_move1 and not is_move_2:
+            self._record_switch(record, 2, move2)
+            self._record_move(record, 1, move1)
+        elif not is_move1 and is_move_2:
+            self._record_switch(record, 1, move1)
+            self._record_move(record, 2, move2)
+            self._replace_fainted_bot(record, replace_fainted)
+        else:
+            if self.active_pokemon_bot.stats.get_actual(StatsType.Spe) > self.active_pokemon_oppo.stats.get_actual(
+                    StatsType.Spe):
+                self._record_move(record, 1, move1)
+                if self.active_pokemon_oppo.non_volatile_status != StatusType.Fnt:
+                    self._record_move(record, 2, move2)
+                    self._replace_fainted_bot(record, replace_fainted)
+            else:
+                self._record_move(record, 2, move2)
+                if not self._replace_fainted_bot(record, replace_fainted):
+                    self._record_move(record, 1, move1)
+        return record
+
+    def apply_switch(self, player, pokemon_in):
+        """Switches in a pokemon out of a turn, like the replacement of a fainted one, and records it for undo
+        :param player: 1 for the bot, 2 for the opponent
+        :param pokemon_in: Bench index of the pokemon
+        :return: A FieldUndo
+        """
+        record = FieldUndo(self)
+        self._record_switch(record, player, pokemon_in)
+        return record
+
+    def undo(self, record):
+        """Rolls back the turn played by apply_actions
+        :param record: The FieldUndo returned by apply_actions
+        :return:
+        """
+        for side, pokemon, state in reversed(record.saved):
+            state.restore(pokemon)
+        for move, pp in reversed(record.pp):
+            move.pp = pp
+        for side in (1, 2):
+            self.bench_selector_side[side].clear()
+            self.bench_selector_side[side].update(record.bench[side])
+        self.active_pokemon_bot = record.active[1]
+        self.active_pokemon_oppo = record.active[2]
+        self.active_selector_side[1] = self.active_pokemon_bot
+        self.active_selector_side[2] = self.active_pokemon_oppo
+        self.weather = record.weather
+        self.field = record.field
+
+    def _record_move(self, record, player, move_index):
+        move = self.get_move(player, move_index)
+        record.pp.append((move, move.pp))
+        self.do_move(player, move_index, record.outcomes.get(player))
+
+    def _record_switch(self, record, player, pokemon_in):
+        record.save(player, self.bench_selector_side[player][pokemon_in])
+        self.switch_pokemon(player, pokemon_in)
+
+    def _replace_fainted_bot(self, record, replace_fainted):
+        """Switches in a new pokemon if the active one of the bot fainted
+        :return: True if the active pokemon of the bot fainted
+        """
+        if self.active_pokemon_bot.non_volatile_status != StatusType.Fnt:
+            return False
+        if replace_fainted is not None:
+            pokemon_in = replace_fainted(self)
+            if pokemon_in is not None:
+                self._record_switch(record, 1, pokemon_in)
+        return True
 
     def update_turn(self, value=2):
         self.turn_number += value
@@ -94,25 +216,26 @@ class BattleFieldSingle(BattleField):
                     return index
         else:
             for index in self.all_pkmns_oppo:
-                if self.all_pkmns_bot[index].name == pkmn_name:
+                if self.all_pkmns_oppo[index].name == pkmn_name:
                     return index
 
-    def do_move(self, player: int, move_index: int):
+    def do_move(self, player: int, move_index: int, outcome=None):
         """Apply move to the target
         :param player: player id
         :param pokemon_caster:
         :param move_index: Index of the move
         :param pokemon_target: Target
+        :param outcome: The MoveOutcome of the move, random if None
         :return:
         """
         if player == 1:
 
             self.active_pokemon_bot.use_move(move_index, self.active_pokemon_oppo,
-                                             self.weather, self.field)
+                                             self.weather, self.field, outcome)
         else:
 
             self.active_pokemon_oppo.use_move(move_index, self.active_pokemon_bot,
-                                              self.weather, self.field)
+                                              self.weather, self.field, outcome)
 
     def switch_pokemon(self, player: int, pokemon_in: int):
         """Switch pokemon
@@ -189,3 +312,31 @@ class BattleFieldSingle(BattleField):
         :return:
         """
         self.active_selector_side[side].stats.increase_hp(heal)
+
+
+class FieldUndo:
+    """Record of the changes done by BattleFieldSingle.apply_actions
+    active: active pokemons before the turn for each side
+    bench: bench dicts before the turn for each side
+    saved: list of (side, pokemon, PokemonState) for the pokemons changed by the turn
+    pp: list of (move, pp) for the moves used in the turn
+    outcomes: dict player -> MoveOutcome used for the moves of the turn
+    """
+
+    def __init__(self, field: BattleFieldSingle):
+        self.active = {1: field.active_pokemon_bot, 2: field.active_pokemon_oppo}
+        self.bench = {1: dict(field.all_pkmns_bot), 2: dict(field.all_pkmns_oppo)}
+        self.weather = field.weather
+        self.field = field.field
+        self.saved = []
+        self.pp = []
+        self.outcomes = {}
+        self.save(1, field.active_pokemon_bot)
+        self.save(2, field.active_pokemon_oppo)
+
+    def save(self, side, pokemon):
+        """Saves the state of a pokemon the first time it takes part in the turn"""
+        for saved_side, saved_pokemon, state in self.saved:
+            if saved_pokemon is pokemon:
+                return
+        self.saved.append((side, pokemon, PokemonState(pokemon)))
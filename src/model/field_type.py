@@ -17,6 +17,10 @@ class Weather(Enum):
     Primordialsea = auto()
     Desolateland = auto()
 
+    def __init__(self, value):
+        # Index of the weather in the tables of the moves
+        self.weather_id = value - 1
+
 
 class Field(Enum):
     """Enum for the possible fields in game"""
@@ -26,4 +30,7 @@ class Field(Enum):
     Misty = auto()
     Normal = auto()
 
+    def __init__(self, value):
+        # Index of the field in the tables of the moves
+        self.field_id = value - 1
 
@@ -1,15 +1,85 @@
-import copy
 import random
 from abc import ABC, abstractmethod
+from operator import attrgetter
 
 from model.damage_calculator import DamageCalculator
-from model.move_type import MoveStatus
+from model.field_type import Weather, Field
+from model.move_type import MoveCategory, MoveStatus
 from model.status import Status
+from model.weather_type import WeatherModifiers, FieldModifiers
+
+
+class MoveTemplate:
+    """
+    The part of a move that never changes in a battle, shared by reference by all the instances and copies of the move
+    Args:
+        move_name (str): The name of the move
+        accuracy (int) or (bool): The accuracy of the move, if true the move is secured to hit.
+        base_power (int): The base power of the move
+        category (str): Physical if the move is a physical move or special if is a special one
+        max_pp (int): Power points of the move when it is retrieved
+        priority (int): The level of move's priority
+        crit_ratio (int): Critical ratio of the move
+        move_type (PokemonType): Type of the move
+        on_user_stats: stat of the user modified by the move
+        on_target_stats: stat of the opponent modified by the move
+        chance: probability that the change of the stat or of the status occurs
+        volatile_status: volatile_status added by the move
+        non_volatile_status: non_volatile_status added by the move
+    """
+    __slots__ = ("move_name", "accuracy", "base_power", "category", "scale_with", "max_pp", "priority", "crit_ratio",
+                 "move_type", "on_user_stats", "on_target_stats", "defends_on", "chance", "volatile_status",
+                 "non_volatile_status", "category_id", "type_id", "scale_with_id", "defends_on_id", "powers",
+                 "weather_mults", "field_mults", "burn_multiplier")
+
+    def __init__(self, move_name: str, accuracy: int, base_power: int, category, max_pp: int, priority: int,
+                 crit_ratio: int, move_type, scale_with, on_user_stats, on_target_stats, defends_on, chance: int,
+                 volatile_status, non_volatile_status):
+        self.move_name = move_name
+        self.accuracy = accuracy
+        self.base_power = base_power
+        self.category = category
+        self.scale_with = scale_with
+        self.max_pp = max_pp
+        self.priority = priority
+        self.crit_ratio = crit_ratio
+        self.move_type = move_type
+        self.on_user_stats = on_user_stats
+        self.on_target_stats = on_target_stats
+
+        if defends_on:
+            self.defends_on = self.scale_with
+        else:
+            self.defends_on = defends_on
+
+        self.chance = chance
+        self.volatile_status = volatile_status
+        self.non_volatile_status = non_volatile_status
+        self.resolve_damage_terms()
+
+    def resolve_damage_terms(self):
+        """Turns the enums used by the damage calculation into numbers, once when the move is built, so
+        DamageCalculator.kernel works only on ints and floats"""
+        self.category_id = self.category.category_id
+        self.type_id = self.move_type.type_id
+        self.scale_with_id = self.scale_with.stat_id
+        self.defends_on_id = self.defends_on.stat_id if self.defends_on else None
+        # Power without and with STAB, the same values of calculate_base_power
+        self.powers = (self.base_power * 1, self.base_power * 1.5)
+        # Multipliers of each weather and field, by id, with the same lookups that calculate did on every call
+        self.weather_mults = [WeatherModifiers.modifiers.get((weather, self.move_type), 1) for weather in Weather]
+        self.field_mults = [FieldModifiers.modifiers.get((self.move_type, field), 1) for field in Field]
+        self.burn_multiplier = 0.5 if self.scale_with.name == "Atk" else 1
+
+
+def template_property(name):
+    """Returns a read only property that reads a field of the template of the move"""
+    return property(attrgetter("template." + name))
 
 
 class Move(ABC):
     """
-    This class represents a move of a pokemon
+    This class represents a move of a pokemon, the data that never changes is in its MoveTemplate
     Args:
         move_name (str): The name of the move
         accuracy (int) or (bool): The accuracy of the move, if true the move is secured to hit.
@@ -32,48 +102,93 @@ class Move(ABC):
         #TODO forse bisogna aggiungere una distinzione tra status on user e on target
 
     """
+    __slots__ = ("template", "pp", "is_Z", "moveStatus", "power_multiply", "is_usable", "is_locked")
+
+    move_name = template_property("move_name")
+    accuracy = template_property("accuracy")
+    base_power = template_property("base_power")
+    category = template_property("category")
+    scale_with = template_property("scale_with")
+    priority = template_property("priority")
+    crit_ratio = template_property("crit_ratio")
+    move_type = template_property("move_type")
+    on_user_stats = template_property("on_user_stats")
+    on_target_stats = template_property("on_target_stats")
+    defends_on = template_property("defends_on")
+    chance = template_property("chance")
+    volatile_status = template_property("volatile_status")
+    non_volatile_status = template_property("non_volatile_status")
+    category_id = template_property("category_id")
+    type_id = template_property("type_id")
+    scale_with_id = template_property("scale_with_id")
+    defends_on_id = template_property("defends_on_id")
+    powers = template_property("powers")
+    weather_mults = template_property("weather_mults")
+    field_mults = template_property("field_mults")
+    burn_multiplier = template_property("burn_multiplier")
 
     def __init__(self, move_name: str, accuracy: int,
                  base_power: int, category, pp: int, priority: int,
                  is_Z: bool, crit_ratio: int, move_type, scale_with, on_user_stats,
                  on_target_stats, defends_on, chance: int, volatile_status, non_volatile_status):
 
-        self.move_name = move_name
-        self.accuracy = accuracy
-        self.base_power = base_power
-        self.category = category
-        self.scale_with = scale_with
+        self.init_state(MoveTemplate(move_name, accuracy, base_power, category, pp, priority, crit_ratio, move_type,
+                                     scale_with, on_user_stats, on_target_stats, defends_on, chance, volatile_status,
+                                     non_volatile_status), pp, is_Z)
+
+    def init_state(self, template: MoveTemplate, pp: int, is_Z: bool):
+        """Sets the template and the initial values of the part of the move that changes in a battle"""
+        self.template = template
         self.pp = pp
-        self.priority = priority
         self.is_Z = is_Z
-        self.crit_ratio = crit_ratio
-        self.move_type = move_type
-        self.on_user_stats = on_user_stats
-        self.on_target_stats = on_target_stats
         self.moveStatus = MoveStatus.Available
         self.power_multiply = 1
         self.is_usable = True
         self.is_locked = False
 
-        if defends_on:
-            self.defends_on = self.scale_with
-        else:
-            self.defends_on = defends_on
-
-        self.chance = chance
-        self.volatile_status = volatile_status
-        self.non_volatile_status = non_volatile_status
-
     @abstractmethod
-    def invoke_move(self, caster_pokemon, target_pokemon, weather, field):
+    def invoke_move(self, caster_pokemon, target_pokemon, weather, field, outcome=None):
         """
         Args:
         caster_pokemon(Pokemon): the pokemon that does the move
         targetPokemon(Pokemon): the pokemon hit by the move
+        outcome(MoveOutcome): the result of the move, if None it is random
 
         """
         pass
 
+    def outcomes(self):
+        """Returns the possible results of the move with their probability: miss, one hit for each damage roll
+        bucket and, if the secondary effect is not sure, the hits with and without the effect.
+        :return: A list of MoveOutcome
+        """
+        if self.accuracy is True or self.accuracy >= 100:
+            hit_chance = 1
+        else:
+            hit_chance = self.accuracy / 100
+
+        if self.category is MoveCategory.Status:
+            rolls = [(1, None)]
+        else:
+            rolls = DamageCalculator.roll_buckets
+
+        has_effect = self.on_user_stats or self.on_target_stats or (self.volatile_status and self.volatile_status[1]) \
+            or (self.non_volatile_status and self.non_volatile_status[1])
+        if has_effect and self.chance < 100:
+            effects = [(self.chance / 100, True), (1 - self.chance / 100, False)]
+        else:
+            effects = [(1, True)]
+
+        outcomes = []
+        if hit_chance < 1:
+            outcomes.append(MoveOutcome(1 - hit_chance, False))
+        for roll_probability, roll in rolls:
+            for effect_probability, effect in effects:
+                probability = hit_chance * roll_probability * effect_probability
+                if probability > 0:
+                    outcomes.append(MoveOutcome(probability, True, roll, effect))
+        return outcomes
+
     def calculate_base_power(self, types):
         stab = 1
         if self.move_type in types:
@@ -96,12 +211,33 @@ class Move(ABC):
         return self.move_name
 
 
+class MoveOutcome:
+    """
+    One of the possible results of a move
+    Args:
+        probability (float): probability of the result
+        hit (bool): if the move hits
+        roll (float): damage roll, None for the status moves
+        effect (bool): if the secondary effect of the move triggers
+    """
+
+    def __init__(self, probability: float, hit: bool, roll=None, effect=False):
+        self.probability = probability
+        self.hit = hit
+        self.roll = roll
+        self.effect = effect
+
+    def __repr__(self):
+        return "MoveOutcome({}, {}, {}, {})".format(self.probability, self.hit, self.roll, self.effect)
+
+
 class SingleMove(Move):
     """
     Subclass of the Move class.
     It represents a move with only one target.
 
     """
+    __slots__ = ()
 
     def __init__(self, move_name: str, accuracy: int,
                  base_power: int, category, pp: int, priority: int,
@@ -114,12 +250,22 @@ class SingleMove(Move):
                          is_Z, crit_ratio, move_type, scale_with,
                          on_user_stats, on_target_stats, defends_on, chance, volatile_status, non_volatile_status)
 
-    def invoke_move(self, caster_pokemon, target_pokemon, weather, field):
-        damage = DamageCalculator.calculate(weather, field, caster_pokemon, self, target_pokemon)
+    def invoke_move(self, caster_pokemon, target_pokemon, weather, field, outcome=None):
+        if outcome is not None and not outcome.hit:
+            self.pp -= 1
+            return
+
+        damage = DamageCalculator.calculate(weather, field, caster_pokemon, self, target_pokemon,
+                                            outcome.roll if outcome is not None else None)
         target_pokemon.stats.decrease_hp(target_pokemon.stats.get_actual_hp()-damage)
         self.pp -= 1
 
-        if random.randint(0, 100) <= self.chance:
+        if outcome is not None:
+            triggered = outcome.effect
+        else:
+            triggered = random.randint(0, 100) <= self.chance
+
+        if triggered:
 
             for tupla in self.on_user_stats:
                 caster_pokemon.stats.modify(tupla[0], tupla[1])
@@ -140,8 +286,12 @@ class SingleMove(Move):
                     else:
                         Status.apply_non_volatile_status(self.non_volatile_status[1], target_pokemon)
 
+    @staticmethod
+    def from_template(template: MoveTemplate, pp=None, is_Z=False):
+        """Returns a new move that shares the template, with the given pp or the full ones"""
+        move = SingleMove.__new__(SingleMove)
+        move.init_state(template, template.max_pp if pp is None else pp, is_Z)
+        return move
+
     def deepcopy(self):
-        return SingleMove(self.move_name, self.accuracy, self.base_power, self.category, self.pp, self.priority,
-                          self.is_Z, self.crit_ratio, self.move_type, self.scale_with, copy.deepcopy(
-                self.on_user_stats), copy.deepcopy(self.on_target_stats), self.defends_on, self.chance,
-                          self.volatile_status, self.non_volatile_status)
+        return SingleMove.from_template(self.template, self.pp, self.is_Z)
@@ -7,6 +7,10 @@ class MoveCategory(Enum):
     Physical = auto()
     Special = auto()
 
+    def __init__(self, value):
+        # Index of the category, in the order of the declaration
+        self.category_id = value - 1
+
 
 class MoveStatus(Enum):
     Locked = auto()
@@ -1,3 +1,4 @@
+from operator import attrgetter
 from typing import Dict
 
 from model.item import Item
@@ -5,9 +6,35 @@ from model.stats_type import StatsType
 from model.status import StatusType, Status
 
 
+class PokemonSpecies:
+    """
+    The part of a pokemon that never changes in a battle: name, types and weight.
+    Species are interned, all the pokemons built with the same values share the same species object and its types list.
+    """
+    __slots__ = ("name", "types", "weight")
+
+    # (name, types, weight) -> PokemonSpecies
+    interned = {}
+
+    def __init__(self, name: str, types: list, weight: float):
+        self.name = name
+        self.types = types
+        self.weight = weight
+
+    @staticmethod
+    def get(name: str, types: list, weight: float):
+        """Returns the species with the given values, built the first time they are seen"""
+        key = (name, tuple(types), weight)
+        species = PokemonSpecies.interned.get(key)
+        if species is None:
+            species = PokemonSpecies(name, types, weight)
+            PokemonSpecies.interned[key] = species
+        return species
+
+
 class Pokemon:
     """
-    This class represents a Pokémon.
+    This class represents a Pokémon, name, types and weight are read from its PokemonSpecies.
     name (str) = pokemon's name
     types (list) = pokemon's types (or type)
     gender( str) = pokemon's gender (male, female or neutral)
@@ -21,15 +48,20 @@ class Pokemon:
     moves(list) = pokemon's moves
 
     """
+    __slots__ = ("species", "gender", "stats", "abilities", "non_volatile_status", "volatile_status", "item", "level",
+                 "moves", "damage_output_multiplier", "damage_input_multiplier", "bad_poison_turn", "blocked",
+                 "can_mega", "possible_moves", "likely_moves")
+
+    name = property(attrgetter("species.name"))
+    types = property(attrgetter("species.types"))
+    weight = property(attrgetter("species.weight"))
 
     def __init__(self, name: str, types: list, gender: str, stats, moves: Dict, abilities: list, weight: float,
-                 non_volatile_status, volatile_status: list, item: Item, level: int, possible_moves={}):
-        self.name = name
-        self.types = types
+                 non_volatile_status, volatile_status: list, item: Item, level: int, possible_moves=None):
+        self.species = PokemonSpecies.get(name, types, weight)
         self.gender = gender
         self.stats = stats
         self.abilities = abilities
-        self.weight = weight
         self.non_volatile_status = non_volatile_status
         self.volatile_status = volatile_status
         self.item = item
@@ -40,20 +72,23 @@ class Pokemon:
         self.bad_poison_turn = 0
         self.blocked = False
         self.can_mega = False
-        self.possible_moves = possible_moves
+        # A new dict for each pokemon, a default {} would be shared by all of them
+        self.possible_moves = possible_moves if possible_moves is not None else {}
+        # Indexes of the possible moves that the search expands, most likely first, None for all of them
+        self.likely_moves = None
 
     def get_usable_moves(self):
         """Methods that returns all usable moves"""
         return {key: self.moves[key] for key in self.moves if self.moves[key].is_usable and self.moves[key].pp != 0}
 
-    def use_move(self, move_index: int, target, weather, field):
-        """Methods that apply a move"""
+    def use_move(self, move_index: int, target, weather, field, outcome=None):
+        """Methods that apply a move, outcome is the MoveOutcome to use instead of the random draws"""
         if move_index < 5:
-            self.moves[move_index].invoke_move(self, target, weather, field)
+            self.moves[move_index].invoke_move(self, target, weather, field, outcome)
             if target.stats.get_actual_hp() <= 0:
                 Status.apply_non_volatile_status(StatusType.Fnt, target)
         else:
-            self.possible_moves[move_index].invoke_move(self, target, weather, field)
+            self.possible_moves[move_index].invoke_move(self, target, weather, field, outcome)
             if target.stats.get_actual_hp() <= 0:
                 Status.apply_non_volatile_status(StatusType.Fnt, target)
 
@@ -105,9 +140,53 @@ class Pokemon:
         new_moves = {}
         for move in self.moves:
             new_moves[move] = self.moves[move].deepcopy()
-        return Pokemon(self.name, self.types, self.gender, self.stats.deepcopy(), new_moves, self.abilities,
-                       self.weight,
-                       self.non_volatile_status, self.volatile_status, self.item, self.level, self.possible_moves)
+        new_pokemon = Pokemon.__new__(Pokemon)
+        new_pokemon.species = self.species
+        new_pokemon.gender = self.gender
+        new_pokemon.stats = self.stats.deepcopy()
+        new_pokemon.abilities = self.abilities
+        new_pokemon.non_volatile_status = self.non_volatile_status
+        new_pokemon.volatile_status = list(self.volatile_status)
+        new_pokemon.item = self.item
+        new_pokemon.level = self.level
+        new_pokemon.moves = new_moves
+        new_pokemon.damage_output_multiplier = self.damage_output_multiplier
+        new_pokemon.damage_input_multiplier = self.damage_input_multiplier
+        new_pokemon.bad_poison_turn = self.bad_poison_turn
+        new_pokemon.blocked = self.blocked
+        new_pokemon.can_mega = self.can_mega
+        new_pokemon.possible_moves = self.possible_moves
+        new_pokemon.likely_moves = self.likely_moves
+        return new_pokemon
 
     def __eq__(self, other_pokemon):
         return self.name == other_pokemon.name
+
+
+class PokemonState:
+    """Mutable part of a pokemon that a turn can change, saved to undo the turn during the search"""
+    __slots__ = ("damage", "mul_stats", "volatile_mul", "non_volatile_status", "volatile_status", "blocked",
+                 "bad_poison_turn", "damage_output_multiplier", "damage_input_multiplier")
+
+    def __init__(self, pokemon: Pokemon):
+        self.damage = pokemon.stats.damage
+        self.mul_stats = pokemon.stats.mul_stats.copy()
+        self.volatile_mul = pokemon.stats.volatile_mul.copy()
+        self.non_volatile_status = pokemon.non_volatile_status
+        self.volatile_status = list(pokemon.volatile_status)
+        self.blocked = pokemon.blocked
+        self.bad_poison_turn = pokemon.bad_poison_turn
+        self.damage_output_multiplier = pokemon.damage_output_multiplier
+        self.damage_input_multiplier = pokemon.damage_input_multiplier
+
+    def restore(self, pokemon: Pokemon):
+        """Puts the saved state back in the pokemon"""
+        pokemon.stats.damage = self.damage
+        pokemon.stats.mul_stats.update(self.mul_stats)
+        pokemon.stats.volatile_mul.update(self.volatile_mul)
+        pokemon.non_volatile_status = self.non_volatile_status
+        pokemon.volatile_status[:] = self.volatile_status
+        pokemon.blocked = self.blocked
+        pokemon.bad_poison_turn = self.bad_poison_turn
+        pokemon.damage_output_multiplier = self.damage_output_multiplier
+        pokemon.damage_input_multiplier = self.damage_input_multiplier
@@ -22,6 +22,10 @@ class PokemonType(Enum):
     Steel = auto()
     Fairy = auto()
 
+    def __init__(self, value):
+        # Index of the type in the tables of TypeMultiplier
+        self.type_id = value - 1
+
 
 class TypeMultiplier:
     """
@@ -95,3 +99,57 @@ class TypeMultiplier:
         PokemonType.Steel: [PokemonType.Poison],
         PokemonType.Fairy: [PokemonType.Dragon]
     }
+
+    # The same relations as tables indexed by type_id, built once at import
+    # weak[pokemon1][pokemon2] is True if pokemon2 is in weakTo[pokemon1], the same for resists and immune
+    weak = None
+    resists = None
+    immune = None
+    # chart[move][pokemon] is the multiplier of a move type against a pokemon type
+    chart = None
+    # dual_chart[move][pokemon1][pokemon2] is the multiplier of a move type against a pokemon with the two types,
+    # pokemon1 == pokemon2 for the pokemons with one type, so it covers all the 171 combinations
+    dual_chart = None
+
+    @staticmethod
+    def build_tables():
+        types = list(PokemonType)
+        TypeMultiplier.weak = [[other in TypeMultiplier.weakTo[pokemon_type] for other in types]
+                               for pokemon_type in types]
+        TypeMultiplier.resists = [[other in TypeMultiplier.resistsTo[pokemon_type] for other in types]
+                                  for pokemon_type in types]
+        TypeMultiplier.immune = [[other in TypeMultiplier.immuneTo[pokemon_type] for other in types]
+                                 for pokemon_type in types]
+
+        chart = [[1] * len(types) for _ in types]
+        for move_type in types:
+            for pokemon_type in types:
+                if TypeMultiplier.immune[pokemon_type.type_id][move_type.type_id]:
+                    chart[move_type.type_id][pokemon_type.type_id] = 0
+                elif TypeMultiplier.weak[pokemon_type.type_id][move_type.type_id]:
+                    chart[move_type.type_id][pokemon_type.type_id] = 2
+                elif TypeMultiplier.resists[pokemon_type.type_id][move_type.type_id]:
+                    chart[move_type.type_id][pokemon_type.type_id] = 0.5
+        TypeMultiplier.chart = chart
+        TypeMultiplier.dual_chart = [[[row[first] if first == second else row[first] * row[second]
+                                       for second in range(len(types))] for first in range(len(types))]
+                                     for row in chart]
+
+    @staticmethod
+    def effectiveness(move_type, pokemon_types):
+        """Returns the multiplier of a move type against a pokemon
+        :param move_type: The type of the move
+        :param pokemon_types: The list of the types of the pokemon
+        :return: 0, 0.25, 0.5, 1, 2 or 4
+        """
+        if len(pokemon_types) == 1:
+            return TypeMultiplier.chart[move_type.type_id][pokemon_types[0].type_id]
+        if len(pokemon_types) == 2:
+            return TypeMultiplier.dual_chart[move_type.type_id][pokemon_types[0].type_id][pokemon_types[1].type_id]
+        multiplier = 1
+        for pokemon_type in pokemon_types:
+            multiplier *= TypeMultiplier.chart[move_type.type_id][pokemon_type.type_id]
+        return multiplier
+
+
+TypeMultiplier.build_tables()
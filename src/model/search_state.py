@@ -0,0 +1,210 @@
+from array import array
+
+from model.field_type import Weather, Field, SpeedCriterion
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+# Position of each status in the ints of a state, the volatile ones are bits of a mask
+STATUSES = list(StatusType)
+STATUS_IDS = {status: index for index, status in enumerate(STATUSES)}
+WEATHERS = list(Weather)
+FIELDS = list(Field)
+SPEED_CRITERIA = list(SpeedCriterion)
+# Stats with a boost stage and a volatile multiplier, in the order of the dicts of Stats
+BOOSTED_STATS = [StatsType.Atk, StatsType.Def, StatsType.Spa, StatsType.Spd, StatsType.Spe, StatsType.Accuracy,
+                 StatsType.Evasion]
+
+# Ints of a pokemon: damage, status, volatile mask, bad poison turn, blocked, the stages, then the pp of its moves
+DAMAGE = 0
+STATUS = 1
+VOLATILE = 2
+BAD_POISON = 3
+BLOCKED = 4
+STAGES = 5
+POKEMON_INTS = STAGES + len(BOOSTED_STATS)
+# Floats of a pokemon: the volatile multipliers, the damage output and input multipliers
+OUTPUT_MULTIPLIER = len(BOOSTED_STATS)
+INPUT_MULTIPLIER = OUTPUT_MULTIPLIER + 1
+POKEMON_FLOATS = INPUT_MULTIPLIER + 1
+# Ints of the field before the sides: weather, terrain, speed criterion
+HEADER = 3
+
+
+class SearchLayout:
+    """Fixed positions of the values of a battle in the buffers of a SearchState.
+    It is built once for a field and shared by all the states of that field: for each side the pokemons, in the
+    order of the bench when the layout is built, and the indexes of their moves and possible moves. The layout keeps
+    a copy of the field as template to build new fields from the states.
+    """
+    __slots__ = ("names", "bench_keys", "move_keys", "int_offsets", "float_offsets", "int_size", "float_size",
+                 "template")
+
+    def __init__(self, field):
+        """
+        :param field: The BattleFieldSingle, it is copied and not changed
+        """
+        self.names = {}
+        self.bench_keys = {}
+        self.move_keys = {}
+        self.int_offsets = {}
+        self.float_offsets = {}
+        offset = HEADER
+        float_offset = 0
+        for side in (1, 2):
+            bench = field.bench_selector_side[side]
+            self.names[side] = tuple(pokemon.name for pokemon in bench.values())
+            self.bench_keys[side] = tuple(bench.keys())
+            # The bench of a side: the position in names of the pokemon in each bench slot
+            offset += len(bench)
+        for side in (1, 2):
+            for pokemon in field.bench_selector_side[side].values():
+                key = (side, pokemon.name)
+                self.move_keys[key] = (tuple(pokemon.moves.keys()), tuple(pokemon.possible_moves.keys()))
+                self.int_offsets[key] = offset
+                self.float_offsets[key] = float_offset
+                offset += POKEMON_INTS + len(pokemon.moves) + len(pokemon.possible_moves)
+                float_offset += POKEMON_FLOATS
+        self.int_size = offset
+        self.float_size = float_offset
+        self.template = field.deepcopy()
+
+    def bench_offset(self, side):
+        """Returns the position of the bench of a side in the ints"""
+        return HEADER if side == 1 else HEADER + len(self.names[1])
+
+
+class SearchState:
+    """Compact copy of the part of a battle field that the turns change, stored in two flat arrays.
+    The ints keep weather, terrain, the bench arrangement and, for each pokemon, damage, status, volatile statuses,
+    boost stages and pp, the floats keep the multipliers. Everything else, names, types, stats and moves, is in the
+    SearchLayout shared by the states. Copying or hashing a state only copies or hashes the two buffers.
+    A state is built from a field with from_field and written back with restore, into the same field or into any copy
+    of it, or into a new field with to_field.
+    """
+    __slots__ = ("layout", "ints", "floats")
+
+    def __init__(self, layout, ints, floats):
+        self.layout = layout
+        self.ints = ints
+        self.floats = floats
+
+    @staticmethod
+    def from_field(field, layout=None):
+        """Builds the state of a field
+        :param field: The BattleFieldSingle
+        :param layout: The SearchLayout of the field, a new one is built if None
+        :return: A SearchState
+        """
+        if layout is None:
+            layout = SearchLayout(field)
+        ints = array("q", bytes(8 * layout.int_size))
+        floats = array("d", bytes(8 * layout.float_size))
+        ints[0] = WEATHERS.index(field.weather)
+        ints[1] = FIELDS.index(field.field)
+        ints[2] = SPEED_CRITERIA.index(field.speed_control)
+        for side in (1, 2):
+            names = layout.names[side]
+            offset = layout.bench_offset(side)
+            bench = field.bench_selector_side[side]
+            for position, bench_key in enumerate(layout.bench_keys[side]):
+                ints[offset + position] = names.index(bench[bench_key].name)
+            for pokemon in bench.values():
+                key = (side, pokemon.name)
+                SearchState.write_pokemon(ints, layout.int_offsets[key], layout.move_keys[key], pokemon)
+                # At the fixed position of the pokemon, the bench order changes with the switches
+                float_offset = layout.float_offsets[key]
+                for position, stat in enumerate(BOOSTED_STATS):
+                    floats[float_offset + position] = pokemon.stats.volatile_mul[stat]
+                floats[float_offset + OUTPUT_MULTIPLIER] = pokemon.damage_output_multiplier
+                floats[float_offset + INPUT_MULTIPLIER] = pokemon.damage_input_multiplier
+        return SearchState(layout, ints, floats)
+
+    @staticmethod
+    def write_pokemon(ints, offset, move_keys, pokemon):
+        stats = pokemon.stats
+        ints[offset + DAMAGE] = stats.damage
+        ints[offset + STATUS] = STATUS_IDS[pokemon.non_volatile_status]
+        mask = 0
+        for status in pokemon.volatile_status:
+            mask |= 1 << STATUS_IDS[status]
+        ints[offset + VOLATILE] = mask
+        ints[offset + BAD_POISON] = pokemon.bad_poison_turn
+        ints[offset + BLOCKED] = pokemon.blocked
+        for position, stat in enumerate(BOOSTED_STATS):
+            ints[offset + STAGES + position] = stats.mul_stats[stat]
+        offset += POKEMON_INTS
+        moves, possible_moves = move_keys
+        for position, index in enumerate(moves):
+            ints[offset + position] = pokemon.moves[index].pp
+        offset += len(moves)
+        for position, index in enumerate(possible_moves):
+            ints[offset + position] = pokemon.possible_moves[index].pp
+
+    def restore(self, field):
+        """Writes the state into a field with the same pokemons of the layout, the field itself or a copy of it
+        :param field: The BattleFieldSingle
+        :return: The field
+        """
+        layout = self.layout
+        ints = self.ints
+        floats = self.floats
+        field.weather = WEATHERS[ints[0]]
+        field.field = FIELDS[ints[1]]
+        field.speed_control = SPEED_CRITERIA[ints[2]]
+        for side in (1, 2):
+            bench = field.bench_selector_side[side]
+            pokemons = {pokemon.name: pokemon for pokemon in bench.values()}
+            names = layout.names[side]
+            offset = layout.bench_offset(side)
+            for position, bench_key in enumerate(layout.bench_keys[side]):
+                bench[bench_key] = pokemons[names[ints[offset + position]]]
+            for name, pokemon in pokemons.items():
+                key = (side, name)
+                self.read_pokemon(layout.int_offsets[key], layout.float_offsets[key], layout.move_keys[key], pokemon)
+        field.active_pokemon_bot = field.all_pkmns_bot[1]
+        field.active_pokemon_oppo = field.all_pkmns_oppo[1]
+        field.active_selector_side[1] = field.active_pokemon_bot
+        field.active_selector_side[2] = field.active_pokemon_oppo
+        return field
+
+    def read_pokemon(self, offset, float_offset, move_keys, pokemon):
+        ints = self.ints
+        stats = pokemon.stats
+        stats.damage = ints[offset + DAMAGE]
+        pokemon.non_volatile_status = STATUSES[ints[offset + STATUS]]
+        mask = ints[offset + VOLATILE]
+        pokemon.volatile_status[:] = [status for index, status in enumerate(STATUSES) if mask >> index & 1]
+        pokemon.bad_poison_turn = ints[offset + BAD_POISON]
+        pokemon.blocked = bool(ints[offset + BLOCKED])
+        stats.mul_stats.update(zip(BOOSTED_STATS, ints[offset + STAGES:offset + POKEMON_INTS]))
+        stats.volatile_mul.update(zip(BOOSTED_STATS, self.floats[float_offset:float_offset + OUTPUT_MULTIPLIER]))
+        pokemon.damage_output_multiplier = self.floats[float_offset + OUTPUT_MULTIPLIER]
+        pokemon.damage_input_multiplier = self.floats[float_offset + INPUT_MULTIPLIER]
+        offset += POKEMON_INTS
+        moves, possible_moves = move_keys
+        for position, index in enumerate(moves):
+            pokemon.moves[index].pp = ints[offset + position]
+        offset += len(moves)
+        for position, index in enumerate(possible_moves):
+            pokemon.possible_moves[index].pp = ints[offset + position]
+
+    def to_field(self):
+        """Returns a new BattleFieldSingle in this state, built from the template of the layout"""
+        return self.restore(self.layout.template.deepcopy())
+
+    def copy(self):
+        return SearchState(self.layout, array("q", self.ints), array("d", self.floats))
+
+    def nbytes(self):
+        """Returns the size in bytes of the buffers of the state, the layout is shared"""
+        return self.ints.itemsize * len(self.ints) + self.floats.itemsize * len(self.floats)
+
+    def __eq__(self, other):
+        return isinstance(other, SearchState) and self.layout is other.layout and self.ints == other.ints and \
+            self.floats == other.floats
+
+    def __hash__(self):
+        return hash((self.ints.tobytes(), self.floats.tobytes()))
+
+    def __repr__(self):
+        return "SearchState({} ints, {} floats)".format(len(self.ints), len(self.floats))
@@ -1,9 +1,110 @@
+from collections.abc import MutableMapping
+
 from model.stats_type import StatsType
-import copy
+
+
+class StatsArray(MutableMapping):
+    """Mapping StatsType -> value backed by a list with a fixed position for each statistic, the stat_id.
+    It keeps the dict API used by the rest of the code, in the same order of the keys. The tuple of the values is
+    the compact signature used by the caches and it is kept until a value is changed. If the array belongs to a
+    Stats, a change also drops the effective value of that statistic cached by the Stats.
+    """
+    __slots__ = ("stats_keys", "first", "data", "values_signature", "actual")
+
+    def __init__(self, values: dict, actual=None):
+        """
+        :param values: Dict StatsType -> initial value, its keys are the keys of the array
+        :param actual: The list of the effective values of the Stats that owns the array, None if it has no owner
+        """
+        self.stats_keys = tuple(values)
+        ids = tuple(stat.stat_id for stat in self.stats_keys)
+        # Position of the first value if the keys are the last statistics in order, so the values are a slice
+        self.first = ids[0] if ids and ids == tuple(range(ids[0], len(StatsType))) else None
+        self.data = [None] * len(StatsType)
+        for stat, value in values.items():
+            self.data[stat.stat_id] = value
+        self.values_signature = None
+        self.actual = actual
+
+    def __getitem__(self, stat):
+        value = self.data[stat.stat_id]
+        if value is None:
+            raise KeyError(stat)
+        return value
+
+    def __setitem__(self, stat, value):
+        if self.data[stat.stat_id] is None:
+            raise KeyError(stat)
+        self.data[stat.stat_id] = value
+        self.values_signature = None
+        if self.actual is not None:
+            self.actual[stat.stat_id] = None
+
+    def __delitem__(self, stat):
+        raise TypeError("The statistics of a StatsArray are fixed")
+
+    def __iter__(self):
+        return iter(self.stats_keys)
+
+    def __len__(self):
+        return len(self.stats_keys)
+
+    def __contains__(self, stat):
+        return stat in self.stats_keys
+
+    def keys(self):
+        return self.stats_keys
+
+    def values(self):
+        return self.signature()
+
+    def items(self):
+        return zip(self.stats_keys, self.signature())
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, StatsArray) and other.stats_keys == self.stats_keys:
+            if self.data == other.data:
+                return
+            if self.actual is not None:
+                for stat_id, value in enumerate(other.data):
+                    if value != self.data[stat_id]:
+                        self.actual[stat_id] = None
+            self.data[:] = other.data
+            self.values_signature = other.values_signature
+        else:
+            super(StatsArray, self).update(other, **kwargs)
+
+    def copy(self, actual=None):
+        """Returns a flat copy of the array
+        :param actual: The list of the effective values of the Stats that owns the copy, None if it has no owner
+        """
+        new_array = StatsArray.__new__(StatsArray)
+        new_array.stats_keys = self.stats_keys
+        new_array.first = self.first
+        new_array.data = list(self.data)
+        new_array.values_signature = self.values_signature
+        new_array.actual = actual
+        return new_array
+
+    def signature(self) -> tuple:
+        """Returns the tuple of the values, computed again only after a change"""
+        if self.values_signature is None:
+            if self.first is not None:
+                self.values_signature = tuple(self.data[self.first:])
+            else:
+                self.values_signature = tuple(self.data[stat.stat_id] for stat in self.stats_keys)
+        return self.values_signature
+
+    def __repr__(self):
+        return repr(dict(self.items()))
 
 
 class Stats:
-    """This class contains pokemon's statistics and methods to  change them."""
+    """This class contains pokemon's statistics and methods to  change them.
+    base_stats and real_stats never change after the constructor, so the copies share them.
+    The effective value of each statistic is cached in actual, by stat_id, and computed again only after its
+    multiplier or its volatile multiplier changes."""
+    __slots__ = ("base_stats", "real_stats", "mul_stats", "volatile_mul", "damage", "actual")
 
     """Multipliers for statistics changes"""
     multipliers = {
@@ -42,7 +143,7 @@ class Stats:
     def __init__(self, hp: int, attack: int, defense: int, special_attack: int, special_defense: int, speed: int,
                  level=50, is_base=True, ev_speed=252, nature_speed=1.1):
         # Initial value of each statistic
-        self.base_stats = {
+        self.base_stats = StatsArray({
             StatsType.HP: hp,
             StatsType.Atk: attack,
             StatsType.Def: defense,
@@ -51,10 +152,10 @@ class Stats:
             StatsType.Spe: speed,
             StatsType.Accuracy: 1,
             StatsType.Evasion: 1
-        }
+        })
 
         if is_base:
-            self.real_stats = {
+            self.real_stats = StatsArray({
                 StatsType.HP: round(((31 + (2 * hp) + 0) * level / 100) + 10 + level) + 18,
                 StatsType.Atk: round(((31 + (2 * attack) + 0) * level / 100) + 5) + 18,
                 StatsType.Def: round(((31 + (2 * defense) + 0) * level / 100) + 5) + 18,
@@ -63,12 +164,14 @@ class Stats:
                 StatsType.Spe: round((((31 + (2 * speed) + ev_speed / 4) * level / 100) + 5)) + 18,
                 StatsType.Accuracy: 1,
                 StatsType.Evasion: 1
-            }
+            })
         else:
             self.real_stats = self.base_stats
 
+        # Effective value of each statistic, None until it is computed
+        self.actual = [None] * len(StatsType)
         # Initial value of each statistics' multiplier
-        self.mul_stats = {
+        self.mul_stats = StatsArray({
             StatsType.Atk: 0,
             StatsType.Def: 0,
             StatsType.Spa: 0,
@@ -76,9 +179,9 @@ class Stats:
             StatsType.Spe: 0,
             StatsType.Accuracy: 0,
             StatsType.Evasion: 0
-        }
+        }, self.actual)
         # Initial value of each statistics' volatile multiplier
-        self.volatile_mul = {
+        self.volatile_mul = StatsArray({
             StatsType.Atk: 1,
             StatsType.Def: 1,
             StatsType.Spa: 1,
@@ -86,7 +189,7 @@ class Stats:
             StatsType.Spe: 1,
             StatsType.Accuracy: 1,
             StatsType.Evasion: 1
-        }
+        }, self.actual)
         # Initial value of the damage
         self.damage = 0
 
@@ -112,6 +215,13 @@ class Stats:
 
     def get_actual(self, stat_type: StatsType) -> int:
         """Returns the requested statistic eventually modified"""
+        value = self.actual[stat_type.stat_id]
+        if value is None:
+            value = self.compute_actual(stat_type)
+            self.actual[stat_type.stat_id] = value
+        return value
+
+    def compute_actual(self, stat_type: StatsType) -> int:
         if stat_type is StatsType.Accuracy or stat_type is StatsType.Evasion:
             return round(self.real_stats[stat_type] * self.multipliersAE[self.mul_stats[stat_type]] * self.volatile_mul[
                 stat_type])
@@ -121,7 +231,7 @@ class Stats:
 
     def get_actual_hp(self) -> int:
         """Returns Pokemon's actual HP value by subtracting the damage to the base HP"""
-        return self.real_stats[StatsType.HP] - self.damage
+        return self.real_stats.data[0] - self.damage
 
     def increase_volatile_mul(self, stats_type: StatsType, value: float):
         """Increases the volatile multiplier of the specified stat by the given value"""
@@ -131,11 +241,18 @@ class Stats:
         """Decreases the volatile multiplier of the specified stat by the given value"""
         self.volatile_mul[stats_type] /= value
 
+    def signature(self) -> tuple:
+        """Returns a compact signature of the statistics and of their multipliers, it changes when modify or the
+        volatile multipliers change them, the damage is not part of it"""
+        return self.real_stats.signature(), self.mul_stats.signature(), self.volatile_mul.signature()
+
     def deepcopy(self):
-        new_stats = Stats(0, 0, 0, 0, 0, 0)
-        new_stats.base_stats = copy.deepcopy(self.base_stats)
-        new_stats.real_stats = copy.deepcopy(self.real_stats)
-        new_stats.mul_stats = copy.deepcopy(self.mul_stats)
-        new_stats.volatile_mul = copy.deepcopy(self.volatile_mul)
+        """Returns a flat copy, the fixed statistics are shared and the multipliers and the cache are copied"""
+        new_stats = Stats.__new__(Stats)
+        new_stats.base_stats = self.base_stats
+        new_stats.real_stats = self.real_stats
+        new_stats.actual = list(self.actual)
+        new_stats.mul_stats = self.mul_stats.copy(new_stats.actual)
+        new_stats.volatile_mul = self.volatile_mul.copy(new_stats.actual)
         new_stats.damage = self.damage
         return new_stats
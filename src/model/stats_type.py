@@ -10,4 +10,8 @@ class StatsType(Enum):
     Spd = auto()
     Spe = auto()
     Accuracy = auto()
-    Evasion = auto()
\ No newline at end of file
+    Evasion = auto()
+
+    def __init__(self, value):
+        # Index of the statistic, in the order of the declaration
+        self.stat_id = value - 1
@@ -45,6 +45,10 @@ class DatabaseDataSource(AbstractDataSource):
             database="showdown_db",
             use_pure=True
         )
+        # Name -> MoveTemplate of the moves already retrieved, the moves built from it share it
+        self.move_templates = {}
+        # Name -> list of the types of the pokemons already retrieved
+        self.pokemon_types = {}
 
     def get_pokemon_by_name(self, name, level=50):
         """Method that takes a pokemon name and return a complete pokemon object without moves.
@@ -72,14 +76,18 @@ class DatabaseDataSource(AbstractDataSource):
         :param name: The name of the pokemon
         :return: The list of the pokemon types
         """
+        if name in self.pokemon_types:
+            return self.pokemon_types[name]
         cursor = self.db_connection.cursor(prepared=True)
         parametric_query = "SELECT type_1, type_2 FROM Pokemon as pkmn WHERE pkmn.name = %s"
         cursor.execute(parametric_query, (name,))
         result = cursor.fetchall()
         if not result[0][1]:
-            return [PokemonType[result[0][0]]]
+            types = [PokemonType[result[0][0]]]
         else:
-            return [PokemonType[result[0][0]], PokemonType[result[0][1]]]
+            types = [PokemonType[result[0][0]], PokemonType[result[0][1]]]
+        self.pokemon_types[name] = types
+        return types
 
     # num,name, id_name, acc, base_power, category, pp, priority, chance, volatileStatus, nonvolatileStatus
     # all_boost, target, movetype
@@ -88,6 +96,8 @@ class DatabaseDataSource(AbstractDataSource):
         :param name: The move name
         :return: The move object
         """
+        if name in self.move_templates:
+            return SingleMove.from_template(self.move_templates[name])
         cursor = self.db_connection.cursor(prepared=True)
         has_numbers = re.search(r'\d+$', name)
         if "return102" in name:
@@ -159,16 +169,18 @@ class DatabaseDataSource(AbstractDataSource):
         move_type = PokemonType[result[19]]
 
         if target == 'self':
-            return SingleMove(move_name, accuracy, base_power, category, pp, priority, False, 1, move_type, scale_with,
+            move = SingleMove(move_name, accuracy, base_power, category, pp, priority, False, 1, move_type, scale_with,
                               list(filter(lambda x: x[1] != 0, boosts)), [], defends_on, chance, (target,
                                                                                                   volatile_status),
                               (target,
                                non_volatile_status))
         else:
-            return SingleMove(move_name, accuracy, base_power, category, pp, priority, False, 1, move_type, scale_with,
+            move = SingleMove(move_name, accuracy, base_power, category, pp, priority, False, 1, move_type, scale_with,
                               [], list(filter(lambda x: x[1] != 0, boosts)), defends_on, chance, (target,
                                                                                                   volatile_status),
                               (target, non_volatile_status))
+        self.move_templates[name] = move.template
+        return move
 
     def get_movetype_by_name(self, name):
         """Method that takes a move name as input and returns its type
@@ -197,3 +209,17 @@ class DatabaseDataSource(AbstractDataSource):
             moves_set[index] = self.get_move_by_name(result[0])
             index += 1
         return moves_set
+
+    def get_random_pools(self, battle_type="Single"):
+        """Method that returns the possible moveset of every pokemon of the Randomsets table
+        :param battle_type:
+        :return: Dict pokemon name -> list of move names
+        """
+        pools = {}
+        cursor = self.db_connection.cursor(prepared=True)
+        parametric_query = "SELECT pokemon, move FROM Randomsets WHERE battle_type = %s"
+        cursor.execute(parametric_query, (battle_type,))
+        results = cursor.fetchall()
+        for result in results:
+            pools.setdefault(result[0], []).append(result[1])
+        return pools
@@ -1,13 +1,16 @@
 from model.field import BattleFieldSingle
 
 
-def update_enemy_pokemon(battle_field: BattleFieldSingle, db_con, pokemon_name: str, level: int, gender: str):
+def update_enemy_pokemon(battle_field: BattleFieldSingle, db_con, pokemon_name: str, level: int, gender: str,
+                         belief=None, matchups=None):
     """Function that updates the current available pokemons of the opponet
     :param battle_field: BattleField object
     :param db_con: A db connection
     :param pokemon_name: A pokemon name
     :param level: The pokemon level
     :param gender: The gender
+    :param belief: The MovesetBelief that chooses the possible moves to search, None to search all of them
+    :param matchups: The MatchupMatrix of the battle, None if there is not one
     :return:
     """
     # If the oppo doesn't have pokemons
@@ -18,6 +21,8 @@ def update_enemy_pokemon(battle_field: BattleFieldSingle, db_con, pokemon_name:
                                                                                 .replace("'", "")
                                                                                 .replace("-", ""))
         pokemon.possible_moves = possible_moves
+        if belief:
+            belief.update(pokemon)
         pokemon.gender = gender
         battle_field.active_pokemon_oppo = pokemon
         battle_field.active_selector_side[2] = pokemon
@@ -29,6 +34,8 @@ def update_enemy_pokemon(battle_field: BattleFieldSingle, db_con, pokemon_name:
             pokemon = db_con.get_pokemon_by_name(pokemon_name, level)
             possible_moves = db_con.get_possible_moves_by_name(pokemon_name.lower().replace(" ", "").replace("'", ""))
             pokemon.possible_moves = possible_moves
+            if belief:
+                belief.update(pokemon)
             current_index = max(battle_field.all_pkmns_oppo.keys())
             battle_field.all_pkmns_oppo[current_index + 1] = pokemon
             battle_field.switch_pokemon(2, current_index + 1)
@@ -37,13 +44,17 @@ def update_enemy_pokemon(battle_field: BattleFieldSingle, db_con, pokemon_name:
             for index in battle_field.all_pkmns_oppo:
                 if battle_field.all_pkmns_oppo[index].name == pokemon_name:
                     battle_field.switch_pokemon(2, index)
+    if matchups:
+        matchups.update_oppo(battle_field.active_pokemon_oppo)
 
 
-def update_enemy_move(battle_field: BattleFieldSingle, db_con, move_name):
+def update_enemy_move(battle_field: BattleFieldSingle, db_con, move_name, belief=None, matchups=None):
     """Method that updates the moveset of the opponent's active pokemon.
     :param battle_field: Battlefield object
     :param db_con: A database connection
     :param move_name: A move name
+    :param belief: The MovesetBelief that chooses the possible moves to search, None to search all of them
+    :param matchups: The MatchupMatrix of the battle, None if there is not one
     :return:
     """
     if not battle_field.active_pokemon_oppo.moves:
@@ -62,5 +73,10 @@ def update_enemy_move(battle_field: BattleFieldSingle, db_con, move_name):
             if len(battle_field.active_pokemon_oppo.possible_moves) == 4:
                 battle_field.active_pokemon_oppo.possible_moves.clear()
 
+    if belief:
+        belief.update(battle_field.active_pokemon_oppo)
+    if matchups:
+        matchups.update_oppo(battle_field.active_pokemon_oppo)
+
 
 22
@@ -8,6 +8,9 @@ import protocol.senders as sender
 from ai.chooser import Chooser
 from ai.chooser_type import Difficulty
 from ai.damage_tracker import DamageTracker
+from ai.moveset_belief import MovesetBelief
+from ai.endgame import ENDGAME_THRESHOLD
+from ai.matchup_matrix import MatchupMatrix
 from model.field import BattleFieldSingle
 from model.field_type import Field
 from model.stats_type import StatsType
@@ -24,7 +27,9 @@ logger = logging.getLogger("GameLoop")
 class GameLoop:
     """Main control class"""
 
-    def __init__(self, ws, user_name, password, sex, gen, difficulty, mode, opponent_name):
+    def __init__(self, ws, user_name, password, sex, gen, difficulty, mode, opponent_name, time_budget=3,
+                 iterations=None, workers=1, top_moves=4, move_mass=None, ponder=False,
+                 endgame_threshold=ENDGAME_THRESHOLD, tablebase=None):
         self.ws = ws
         self.user_name = user_name
         self.password = password
@@ -33,13 +38,19 @@ class GameLoop:
         self.mode = mode
         self.opponent_name = opponent_name
         self.battle_field = BattleFieldSingle(None, None, {}, {})
+        self.battle_field.matchups = MatchupMatrix()
         with open("standard_answers", "r") as file:
             self.standard_answers = file.readlines()
         self.db = DatabaseDataSource()
+        self.belief = MovesetBelief.from_data_source(self.db, top_moves, move_mass)
         self.damage_tracker = DamageTracker()
         self.last_move = ""
+        # Action (index, is_move) sent by the bot in this turn and first action (name, is_move) of the opponent
+        self.bot_action = None
+        self.oppo_action = None
         self.counter = 0
-        self.chooser = Chooser(difficulty)
+        self.chooser = Chooser(difficulty, time_budget, iterations, workers, ponder, endgame_threshold,
+                               tablebase)
 
         self.bot_volatile = []
         self.oppo_volatile = []
@@ -164,7 +175,7 @@ class GameLoop:
         time.sleep(3)
         await sender.sender(self.ws, self.battle_field.room_name, "Send go {difficulty} if you want to change "
                                                                   "difficulty. Available difficulties are: easy, "
-                                                                  "normal, hard!\n/timer on")
+                                                                  "normal, hard, mcts!\n/timer on")
         print("-----------------------------------------------------------------------")
 
     async def _handle_player(self, current):
@@ -205,6 +216,8 @@ class GameLoop:
         """
         if self.battle_field.player_id not in current[2]:
             name = current[2].split(":")[1].strip()
+            if self.oppo_action is None:
+                self.oppo_action = (name, False)
             splitted = current[3].split(",")
             # Parsing of details
             if len(splitted) == 3:
@@ -223,7 +236,8 @@ class GameLoop:
                 for stats in self.battle_field.active_pokemon_oppo.stats.mul_stats:
                     self.battle_field.active_pokemon_oppo.stats.mul_stats[stats] = 0
 
-            update_enemy_pokemon(self.battle_field, self.db, name, level, gender)
+            update_enemy_pokemon(self.battle_field, self.db, name, level, gender, self.belief,
+                                 self.battle_field.matchups)
             for key in self.mul_stats_oppo:
                 self.mul_stats_oppo[key] = 0
             self.oppo_volatile.clear()
@@ -241,9 +255,11 @@ class GameLoop:
         if self.battle_field.player_id not in current[2]:
             move_name = current[3].strip()
             self.last_move = move_name
+            if self.oppo_action is None:
+                self.oppo_action = (move_name, True)
             logging.info("{} received {} from {}".format(self.battle_field.active_pokemon_bot, move_name,
                                                          self.battle_field.active_pokemon_oppo))
-            update_enemy_move(self.battle_field, self.db, move_name)
+            update_enemy_move(self.battle_field, self.db, move_name, self.belief, self.battle_field.matchups)
 
     async def _handle_request(self, current):
         """Key method that handles the parsing of our team and saves the id of the next request
@@ -271,6 +287,7 @@ class GameLoop:
                 self.battle_field.all_pkmns_bot = bench
                 self.battle_field.bench_selector_side[1] = bench
                 self.battle_field.active_selector_side[1] = active
+                self.battle_field.matchups.build(self.battle_field)
                 for element in self.bot_volatile:
                     Status.add_volatile_status(element, self.battle_field.active_pokemon_bot)
                 for key in self.mul_stats_bot:
@@ -287,6 +304,7 @@ class GameLoop:
             self.battle_field.turn_number = number
             self.battle_field.bench_selector_side[1] = bench
             self.battle_field.active_selector_side[1] = active
+            self.battle_field.matchups.build(self.battle_field)
             for element in self.bot_volatile:
                 Status.add_volatile_status(element, self.battle_field.active_pokemon_bot)
             for key in self.mul_stats_bot:
@@ -307,14 +325,22 @@ class GameLoop:
         :param current:
         :return:
         """
+        # The search keeps what it found for the turn that has just been played
+        if self.bot_action is not None and self.oppo_action is not None:
+            self.chooser.promote(self.battle_field, self.bot_action, self.oppo_action[0], self.oppo_action[1])
+        self.oppo_action = None
+
         # An action is a move or a switch
         move, is_move = self.chooser.choose_move(self.battle_field)
+        self.bot_action = (move, is_move)
         if is_move:
             await sender.sendmove(self.ws, self.battle_field.room_name, move, self.battle_field.turn_number,
                                   self.battle_field.active_pokemon_bot.can_mega,
                                   self.battle_field.active_pokemon_bot.moves[move].is_Z)
         else:
             await sender.sendswitch(self.ws, self.battle_field.room_name, move, self.battle_field.turn_number)
+        # The opponent is still choosing, the next turn can be searched in the meantime
+        self.chooser.ponder(self.battle_field, (move, is_move))
 
         print(self.battle_field.active_pokemon_oppo.oppo_to_string())
         print("-----------------------------------------------------------------------")
@@ -339,6 +365,8 @@ class GameLoop:
             logger.info("BATTLE WON!")
         else:
             logger.info("BATTLE LOST!")
+        self.chooser.stop_pondering()
+        self.chooser.search.shutdown()
         exit(1)
 
     async def _handle_chat(self, current):
@@ -354,7 +382,7 @@ class GameLoop:
 
                 except:
                     await sender.sender(self.ws, self.battle_field.room_name, "That difficulty is not supported "
-                                                                              "yet!\nTry easy, normal or hard")
+                                                                              "yet!\nTry easy, normal, hard or mcts")
 
             else:
                 num_answer = random.randint(0, len(self.standard_answers) - 1)
@@ -0,0 +1,39 @@
+import argparse
+import time
+from ai.self_play import run_games, MAX_TURNS
+from protocol.data_source import DatabaseDataSource
+import model.setup_logger
+import logging
+
+logger = logging.getLogger("Simulate")
+
+
+def main():
+    """
+    Headless self-play of random battles between two difficulties, without the server.
+    """
+    parser = argparse.ArgumentParser(description="Pokemon Showdown Bot self-play")
+    parser.add_argument("-n", "--games", type=int, help="Number of games", default=100)
+    parser.add_argument("-a", "--first", type=str, help="The difficulty of the first bot", default="hard",
+                        choices={"easy", "normal", "hard", "mcts"})
+    parser.add_argument("-b", "--second", type=str, help="The difficulty of the second bot", default="normal",
+                        choices={"easy", "normal", "hard", "mcts"})
+    parser.add_argument("-t", "--time_budget", type=float,
+                        help="Seconds of the hard and mcts modes for each decision", default=1)
+    parser.add_argument("-w", "--workers", type=int, help="Number of processes that play the games", default=1)
+    parser.add_argument("-r", "--seed", type=int, help="Seed of the teams and of the random outcomes", default=0)
+    parser.add_argument("-k", "--top_moves", type=int,
+                        help="Max number of unrevealed moves of the opponent searched by the hard mode", default=4)
+    parser.add_argument("-x", "--max_turns", type=int, help="Turns after which a game is a draw", default=MAX_TURNS)
+    args = parser.parse_args()
+    print("Playing {} games of {} against {}".format(args.games, args.first, args.second))
+    start = time.monotonic()
+    # Each process opens its own connection to the database
+    report = run_games(args.games, DatabaseDataSource, (args.first, args.second), args.time_budget, args.workers,
+                       args.seed, args.top_moves, args.max_turns)
+    print(report)
+    print("Played in {:.0f} seconds".format(time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import time
 import unittest
 from model.pokemon import Pokemon
 from model.status_type import StatusType
@@ -8,6 +9,7 @@ from model.stats_type import StatsType
 from model.move import SingleMove
 from model.field import BattleFieldSingle
 from ai.chooser import Chooser
+from ai import iterative_search
 from ai.iterative_search import IterativeDeepeningMinMax
 
 
@@ -58,6 +60,81 @@ class MinMaxTest(unittest.TestCase):
         move = self.search.make_decision(self.battleField, Chooser.valuation_action)
         print(move)
 
+    def test_legal_action(self):
+        value, index, is_move = self.search.make_decision(self.battleField, Chooser.valuation_action)
+        self.assertIn((index, is_move), IterativeDeepeningMinMax.bot_actions(self.battleField))
+
+    def test_pruning(self):
+        leaves = []
+
+        def counting_eval_fn(field):
+            leaves.append(field)
+            return 1
+
+        bot_actions = IterativeDeepeningMinMax.bot_actions(self.battleField)
+        oppo_actions = IterativeDeepeningMinMax.oppo_actions(self.battleField)
+        self.search.make_decision(self.battleField, counting_eval_fn, depth_limit=1)
+        # The first bot action is fully expanded, every other one is cut after its first reply
+        self.assertEqual(len(oppo_actions) + len(bot_actions) - 1, len(leaves))
+
+    def test_depth_limit(self):
+        # Starmie can't switch, so the pp it spent in a line is the number of turns played
+        turns = []
+
+        def turns_eval_fn(field):
+            turns.append(sum(move.template.max_pp - move.pp for move in field.active_pokemon_oppo.moves.values()))
+            return 1
+
+        for depth_limit in (1, 2, 3):
+            turns.clear()
+            self.search.make_decision(self.battleField, turns_eval_fn, depth_limit=depth_limit)
+            self.assertEqual(max(turns), depth_limit)
+
+    def test_time_budget(self):
+        start = time.monotonic()
+        value, index, is_move = self.search.make_decision(self.battleField, Chooser.valuation_action, depth_limit=50,
+                                                          time_budget=0.2)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIn((index, is_move), IterativeDeepeningMinMax.bot_actions(self.battleField))
+
+    def test_parallel_root(self):
+        # With chance nodes one turn is searched deterministically, the pool must find the same value and action
+        serial = IterativeDeepeningMinMax(chance_nodes=True)
+        parallel = IterativeDeepeningMinMax(chance_nodes=True, workers=2)
+        try:
+            self.assertEqual(serial.make_decision(self.battleField, Chooser.valuation_action, depth_limit=1),
+                             parallel.make_decision(self.battleField, Chooser.valuation_action, depth_limit=1))
+            value, index, is_move = parallel.make_decision(self.battleField, Chooser.valuation_action, depth_limit=2)
+            self.assertIn((index, is_move), IterativeDeepeningMinMax.bot_actions(self.battleField))
+            value, index, is_move = parallel.make_decision(self.battleField, Chooser.valuation_action,
+                                                           depth_limit=50, time_budget=0.5)
+            self.assertIn((index, is_move), IterativeDeepeningMinMax.bot_actions(self.battleField))
+        finally:
+            parallel.shutdown()
+
+    def test_parallel_tables(self):
+        parallel = IterativeDeepeningMinMax(chance_nodes=True, workers=2)
+        try:
+            parallel.make_decision(self.battleField, Chooser.valuation_action, depth_limit=2, keep_table=True)
+            generation = parallel.table_generation
+            # Nothing new is known about the teams, the workers keep their tables
+            parallel.make_decision(self.battleField, Chooser.valuation_action, depth_limit=2, keep_table=True)
+            self.assertEqual(parallel.table_generation, generation)
+            parallel.make_decision(self.battleField, Chooser.valuation_action, depth_limit=2)
+            self.assertEqual(parallel.table_generation, generation + 1)
+            # The tables are in the workers, there is no subtree to promote
+            self.assertIsNone(parallel.last_root)
+            self.assertFalse(parallel.promote(self.battleField, (1, True), "Hydropump", True))
+        finally:
+            parallel.shutdown()
+
+        # The job of a worker, in this process
+        iterative_search._init_worker(1000, True, None)
+        job = (self.battleField, Chooser.valuation_action, (1, True), (1, True), 2, None)
+        nodes = iterative_search._search_pair(1, 1, *job)[1][0]
+        self.assertLess(iterative_search._search_pair(2, 1, *job)[1][0], nodes)
+        self.assertEqual(iterative_search._search_pair(3, 2, *job)[1][0], nodes)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from ai.batch_eval import BatchEvaluator
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class BatchEvaluatorTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(BatchEvaluatorTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon1c = Pokemon("Raichu", [pk.Electric], "Male", Stats(60, 90, 55, 90, 80, 110), {}, [], 30,
+                                 StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [(StatsType.Atk, 2)], [], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Growth', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Spa, [(StatsType.Spa, 1)], [], StatsType.Spd, 100, None, None)
+        self.pokemon1c.moves[1] = SingleMove('Thunder', 70, 110, MoveCategory.Special, 10, 0, False, 1, pk.Electric,
+                                             StatsType.Spa, [], [], StatsType.Spd, 30, None,
+                                             ("normal", StatusType.Par))
+        self.pokemon2a.moves[1] = SingleMove('Hydropump', 80, 110, MoveCategory.Special, 5, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a,
+                                             {1: self.pokemon1a, 2: self.pokemon1b, 3: self.pokemon1c},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def test_same_values(self):
+        evaluator = BatchEvaluator(Chooser.valuation_matchup, Chooser.matchup_signature)
+        self.pokemon1b.stats.damage = 200
+        self.pokemon1b.non_volatile_status = StatusType.Fnt
+        self.pokemon1c.non_volatile_status = StatusType.Par
+        self.pokemon2b.stats.damage = 100
+        for weather in (Weather.Normal, Weather.Raindance, Weather.Sunnyday):
+            self.battleField.weather = weather
+            evaluator.reset()
+            rows = []
+            expected = []
+            for bot_action in IterativeDeepeningMinMax.bot_actions(self.battleField):
+                for oppo_action in IterativeDeepeningMinMax.oppo_actions(self.battleField):
+                    for probability, outcomes in self.battleField.turn_outcomes(bot_action, oppo_action):
+                        record = self.battleField.apply_actions(bot_action, oppo_action,
+                                                                IterativeDeepeningMinMax.replacement, outcomes)
+                        rows.append(evaluator.encode(self.battleField))
+                        expected.append(Chooser.valuation_action(self.battleField))
+                        self.battleField.undo(record)
+            self.assertEqual(expected, evaluator.evaluate(rows))
+
+    def test_matchup_keys(self):
+        evaluator = BatchEvaluator(Chooser.valuation_matchup, Chooser.matchup_signature)
+        # The copies of the workers are new objects with the same matchup
+        for _ in range(3):
+            evaluator.encode(self.battleField.deepcopy())
+        self.assertEqual(len(evaluator.matchups), 1)
+        other = self.battleField.deepcopy()
+        other.switch_pokemon(1, 2)
+        self.assertEqual(evaluator.encode(other)[-1], Chooser.valuation_matchup(other))
+        self.assertEqual(len(evaluator.matchups), 2)
+
+    def test_same_decision(self):
+        for depth_limit in (1, 2):
+            search = IterativeDeepeningMinMax(chance_nodes=True)
+            batch_search = IterativeDeepeningMinMax(chance_nodes=True,
+                                                    batch_evaluator=BatchEvaluator(Chooser.valuation_matchup,
+                                                                                   Chooser.matchup_signature))
+            self.assertEqual(search.make_decision(self.battleField, Chooser.valuation_action, depth_limit),
+                             batch_search.make_decision(self.battleField, Chooser.valuation_action, depth_limit))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import copy
+import unittest
+
+from model.damage_cache import DamageCache
+from model.damage_calculator import DamageCalculator
+from model.field import BattleFieldSingle
+from model.field_type import Weather, Field
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon, PokemonState
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class DamageCacheTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(DamageCacheTest, self).__init__(*args, **kwargs)
+        self.pokemon1 = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon2 = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                100, StatusType.Normal, [], None, 50)
+        self.pokemon1.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                            StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1.moves[2] = SingleMove('Darkest Lariat', 100, 85, MoveCategory.Physical, 10, 0, False, 1,
+                                            pk.Dark, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2.moves[1] = SingleMove('Energy Ball', 100, 90, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                            StatsType.Spa, [], [], StatsType.Spd, 10, None, None)
+        self.battleField = BattleFieldSingle(self.pokemon1, self.pokemon2, {1: self.pokemon1}, {1: self.pokemon2})
+
+    def setUp(self):
+        DamageCalculator.cache = DamageCache()
+
+    def damage(self, roll=0.925):
+        return [DamageCalculator.calculate(self.battleField.weather, self.battleField.field, user, move, target, roll)
+                for user, target in ((self.pokemon1, self.pokemon2), (self.pokemon2, self.pokemon1))
+                for move in user.moves.values()]
+
+    def uncached_damage(self, roll=0.925):
+        cache = DamageCalculator.cache
+        DamageCalculator.cache = DamageCache(0)
+        damage = self.damage(roll)
+        DamageCalculator.cache = cache
+        return damage
+
+    def test_same_damage(self):
+        for weather in (Weather.Normal, Weather.Sunnyday):
+            self.battleField.weather = weather
+            for terrain in (Field.Normal, Field.Grassy):
+                self.battleField.field = terrain
+                for status in (StatusType.Normal, StatusType.Brn):
+                    self.pokemon1.non_volatile_status = status
+                    for roll in (0.85, 0.875, 0.925, 0.975, 1):
+                        self.assertEqual(self.uncached_damage(roll), self.damage(roll))
+                        self.assertEqual(self.uncached_damage(roll), self.damage(roll))
+        self.assertGreater(DamageCalculator.cache.hits, 0)
+
+    def test_invalidation(self):
+        before = self.damage()
+        signature = self.pokemon1.stats.signature()
+        self.pokemon1.stats.modify(StatsType.Spa, 2)
+        self.assertNotEqual(signature, self.pokemon1.stats.signature())
+        self.assertEqual(self.uncached_damage(), self.damage())
+        self.assertGreater(self.damage()[0], before[0])
+
+        state = PokemonState(self.pokemon1)
+        self.pokemon1.stats.increase_volatile_mul(StatsType.Atk, 1.5)
+        self.pokemon2.stats.volatile_mul[StatsType.Spd] *= 2
+        self.pokemon2.stats.mul_stats[StatsType.Def] = -1
+        self.assertEqual(self.uncached_damage(), self.damage())
+        self.pokemon1.damage_output_multiplier = 1.3
+        self.assertEqual(self.uncached_damage(), self.damage())
+        state.restore(self.pokemon1)
+        self.assertEqual(self.uncached_damage(), self.damage())
+
+    def test_copies(self):
+        self.pokemon1.stats.modify(StatsType.Atk, 1)
+        for stats in (self.pokemon1.stats.deepcopy(), copy.deepcopy(self.pokemon1.stats)):
+            self.assertEqual(stats.signature(), self.pokemon1.stats.signature())
+            stats.modify(StatsType.Atk, 1)
+            self.assertNotEqual(stats.signature(), self.pokemon1.stats.signature())
+
+    def test_move_copies(self):
+        expected = self.damage()
+        # The search and every deepcopy of the field make new moves, with the template of the original
+        for pokemon in (self.pokemon1, self.pokemon2):
+            pokemon.moves = {index: move.deepcopy() for index, move in pokemon.moves.items()}
+        DamageCalculator.cache.reset_stats()
+        self.assertEqual(self.damage(), expected)
+        self.assertEqual(DamageCalculator.cache.misses, 0)
+        self.assertEqual(len(DamageCalculator.cache), 3)
+
+    def test_hit_rate(self):
+        self.damage()
+        self.assertEqual(DamageCalculator.cache.hit_rate(), 0)
+        self.damage()
+        self.damage()
+        self.assertAlmostEqual(DamageCalculator.cache.hit_rate(), 2 / 3)
+        self.assertEqual(len(DamageCalculator.cache), 3)
+        DamageCalculator.cache.reset_stats()
+        self.assertEqual(DamageCalculator.cache.hit_rate(), 0)
+
+    def test_bounded(self):
+        DamageCalculator.cache = DamageCache(2)
+        self.damage()
+        self.assertEqual(len(DamageCalculator.cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from model.damage_cache import DamageCache
+from model.damage_calculator import DamageCalculator
+from model.field_type import Weather, Field
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.pokemon_type import TypeMultiplier
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+from model.weather_type import WeatherModifiers, FieldModifiers
+
+
+def formula(weather, terrain, user, move, target, roll):
+    """The damage formula with the enum lookups, as calculate did it before the kernel"""
+    if move.category is MoveCategory.Status:
+        return 0
+    effectiveness = TypeMultiplier.effectiveness(move.move_type, target.types)
+    if effectiveness == 0:
+        return 0
+    base_damage = (((2 * user.level + 10) * user.stats.get_actual(move.scale_with) * move.calculate_base_power(
+        user.types)) / (250 * target.stats.get_actual(move.defends_on)) + 2)
+    mult = WeatherModifiers.modifiers.get((weather, move.move_type), 1)
+    terrain_mult = FieldModifiers.modifiers.get((move.move_type, terrain), 1)
+    mult *= effectiveness
+    burn_multiplier = 1
+    if user.non_volatile_status == StatusType.Brn and move.scale_with.name == "Atk":
+        burn_multiplier = 0.5
+    return int(base_damage * mult * terrain_mult * user.damage_output_multiplier * target.damage_input_multiplier *
+               roll * burn_multiplier)
+
+
+class DamageKernelTest(unittest.TestCase):
+
+    def setUp(self):
+        DamageCalculator.cache = DamageCache()
+
+    @staticmethod
+    def random_pokemon(generator):
+        pokemon = Pokemon("Pokemon", generator.sample(list(pk), generator.randint(1, 2)), "Male",
+                          Stats(*[generator.randint(20, 200) for _ in range(6)]), {}, [], 50,
+                          generator.choice([StatusType.Normal, StatusType.Brn, StatusType.Par]), [], None,
+                          generator.choice([50, 100]))
+        for stat in (StatsType.Atk, StatsType.Def, StatsType.Spa, StatsType.Spd):
+            pokemon.stats.modify(stat, generator.randint(-6, 6))
+        if generator.random() < 0.3:
+            pokemon.stats.increase_volatile_mul(generator.choice([StatsType.Atk, StatsType.Spd]), 1.5)
+        pokemon.damage_output_multiplier = generator.choice([1, 1.3, 1.5])
+        pokemon.damage_input_multiplier = generator.choice([1, 0.5, 1.5])
+        return pokemon
+
+    @staticmethod
+    def random_move(generator):
+        category = generator.choice(list(MoveCategory))
+        scale_with, defends_on = (StatsType.Atk, StatsType.Def) if category is MoveCategory.Physical else (
+            StatsType.Spa, StatsType.Spd)
+        return SingleMove('Move', 100, generator.randint(20, 150), category, 10, 0, False, 1,
+                          generator.choice(list(pk)), scale_with, [], [], defends_on, 100, None, None)
+
+    def test_bit_identical(self):
+        generator = random.Random(7)
+        for _ in range(2000):
+            user = self.random_pokemon(generator)
+            target = self.random_pokemon(generator)
+            move = self.random_move(generator)
+            weather = generator.choice(list(Weather))
+            terrain = generator.choice(list(Field))
+            roll = generator.choice([0.85, 0.875, 0.925, 0.975, 1, generator.uniform(0.85, 1)])
+            self.assertEqual(formula(weather, terrain, user, move, target, roll),
+                             DamageCalculator.calculate(weather, terrain, user, move, target, roll))
+
+    def test_resolved_terms(self):
+        move = SingleMove('Thunderbolt', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Electric, StatsType.Spa,
+                          [], [], StatsType.Spd, 10, None, None)
+        self.assertEqual(move.category_id, MoveCategory.Special.category_id)
+        self.assertEqual(move.type_id, pk.Electric.type_id)
+        self.assertEqual(move.scale_with_id, StatsType.Spa.stat_id)
+        self.assertEqual(move.defends_on_id, move.defends_on.stat_id)
+        self.assertEqual(move.powers, (90, 135))
+        self.assertEqual(move.field_mults[Field.Electric.field_id], 1.5)
+        self.assertEqual(move.burn_multiplier, 1)
+        self.assertEqual(move.deepcopy().weather_mults, move.weather_mults)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from ai.chooser import Chooser
+from model.damage_calculator import DamageCalculator
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class DamageTensorTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(DamageTensorTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Brn, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Gengar", [pk.Ghost, pk.Poison], "Female", Stats(60, 65, 60, 130, 75, 110), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Fake Out', 100, 40, MoveCategory.Physical, 10, 3, False, 1, pk.Normal,
+                                             StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon1a.moves[3] = SingleMove('Darkest Lariat', 100, 85, MoveCategory.Physical, 10, 0, False, 1,
+                                             pk.Dark, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Growth', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Spa, [(StatsType.Spa, 1)], [], StatsType.Spd, 100, None, None)
+        self.pokemon1b.moves[2] = SingleMove('Earthquake', 100, 100, MoveCategory.Physical, 10, 0, False, 1,
+                                             pk.Ground, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Shadow Ball', 100, 80, MoveCategory.Special, 15, 0, False, 1, pk.Ghost,
+                                             StatsType.Spa, [], [], StatsType.Spd, 20, None, None)
+        self.pokemon2a.possible_moves[5] = SingleMove('Sludge Wave', 100, 95, MoveCategory.Special, 10, 0, False, 1,
+                                                      pk.Poison, StatsType.Spa, [], [], StatsType.Spd, 10, None,
+                                                      ("normal", StatusType.Psn))
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def assert_same_damage(self, tensor, attackers, defenders, roll):
+        for attacker in attackers:
+            pokemon = attackers[attacker]
+            for move in tensor.moves[tensor.attacker_position[attacker]]:
+                move_object = pokemon.moves[move] if move in pokemon.moves else pokemon.possible_moves[move]
+                for defender in defenders:
+                    self.assertEqual(DamageCalculator.calculate(self.battleField.weather, self.battleField.field,
+                                                                pokemon, move_object, defenders[defender], roll),
+                                     tensor.get(attacker, move, defender))
+
+    def test_same_damage(self):
+        self.pokemon2b.damage_input_multiplier = 1.5
+        self.pokemon1b.stats.modify(StatsType.Atk, 2)
+        for weather in (Weather.Normal, Weather.Sunnyday):
+            self.battleField.weather = weather
+            for roll in (0.85, 0.925, 1):
+                bot_damage, oppo_damage = DamageCalculator.damage_tensors(self.battleField, roll)
+                self.assertEqual(bot_damage.damage.shape, (2, 3, 2))
+                self.assertEqual(oppo_damage.damage.shape, (2, 2, 2))
+                self.assert_same_damage(bot_damage, self.battleField.all_pkmns_bot, self.battleField.all_pkmns_oppo,
+                                        roll)
+                self.assert_same_damage(oppo_damage, self.battleField.all_pkmns_oppo, self.battleField.all_pkmns_bot,
+                                        roll)
+
+    def test_empty_slots_and_immunities(self):
+        bot_damage, oppo_damage = DamageCalculator.damage_tensors(self.battleField, 1)
+        # Growth is a status move, Fake Out can't hit a ghost and Venusaur has only two moves
+        self.assertEqual(bot_damage.get(2, 1, 1), 0)
+        self.assertEqual(bot_damage.get(1, 2, 1), 0)
+        self.assertTrue((bot_damage.damage[1, 2] == 0).all())
+        self.assertEqual(bot_damage.max_damage(1, 1), bot_damage.get(1, 1, 1))
+        self.assertEqual(oppo_damage.moves, [[1, 5], [1]])
+
+    def test_random_roll(self):
+        bot_damage, oppo_damage = DamageCalculator.damage_tensors(self.battleField)
+        low, _ = DamageCalculator.damage_tensors(self.battleField, 0.85)
+        high, _ = DamageCalculator.damage_tensors(self.battleField, 1)
+        self.assertTrue((low.damage <= bot_damage.damage).all() and (bot_damage.damage <= high.damage).all())
+
+    def test_normal_move(self):
+        action = Chooser("normal").choose_move(self.battleField)
+        self.assertIn(action, [(1, True), (2, True), (3, True), (2, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
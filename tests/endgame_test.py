@@ -0,0 +1,80 @@
+import unittest
+
+from ai.chooser import Chooser
+from ai.endgame import EndgameSolver, solve_matrix_game
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class EndgameTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Scizor", [pk.Bug, pk.Steel], "Female", Stats(70, 130, 100, 55, 80, 65), {}, [],
+                                 118, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1b.moves[1] = SingleMove('Earthquake', 100, 100, MoveCategory.Physical, 10, 0, False, 1,
+                                             pk.Ground, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Bug Bite', 100, 60, MoveCategory.Physical, 20, 0, False, 1, pk.Bug,
+                                             StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+        self.solver = EndgameSolver(team_size=2, seed=0)
+
+    def test_matrix_games(self):
+        value, rows, columns = solve_matrix_game([[0, 1, -1], [-1, 0, 1], [1, -1, 0]])
+        self.assertAlmostEqual(value, 0)
+        for probability in rows + columns:
+            self.assertAlmostEqual(probability, 1 / 3)
+        value, rows, columns = solve_matrix_game([[3, -1], [-2, 1]])
+        self.assertAlmostEqual(value, 1 / 7)
+        self.assertAlmostEqual(rows[0], 3 / 7)
+        self.assertAlmostEqual(columns[0], 2 / 7)
+        # Saddle point, pure strategies
+        self.assertEqual(solve_matrix_game([[2, 3], [1, 4]]), (2, [1, 0], [1, 0]))
+
+    def test_applies(self):
+        self.assertTrue(self.solver.applies(self.battleField))
+        self.assertFalse(EndgameSolver(threshold=1, team_size=2).applies(self.battleField))
+        # An opponent not seen yet
+        self.assertFalse(EndgameSolver(team_size=3).applies(self.battleField))
+
+    def test_won_position(self):
+        # Flamethrower knocks out Scizor, the last pokemon of the opponent
+        self.pokemon2b.non_volatile_status = StatusType.Fnt
+        value, index, is_move = self.solver.make_decision(self.battleField, Chooser.valuation_action, 5)
+        self.assertEqual((index, is_move), (1, True))
+        self.assertAlmostEqual(value, 1)
+        self.assertTrue(self.solver.exact)
+        self.assertEqual(self.pokemon2a.stats.damage, 0)
+
+    def test_replacement(self):
+        # The fainted Arbok is replaced by Incineroar, that knocks out Scizor, rather than by Venusaur
+        self.pokemon2b.non_volatile_status = StatusType.Fnt
+        field = BattleFieldSingle(self.pokemon2b, self.pokemon2a, {1: self.pokemon2b, 2: self.pokemon1b,
+                                                                   3: self.pokemon1a}, {1: self.pokemon2a})
+        solver = EndgameSolver(team_size=1)
+        value, index, is_move = solver.make_decision(field, Chooser.valuation_action, 5)
+        self.assertEqual((index, is_move), (3, False))
+        self.assertAlmostEqual(value, 1)
+        self.assertEqual(solver.strategy, [0, 1])
+        self.assertIs(field.active_pokemon_bot, self.pokemon2b)
+
+
+if __name__ == '__main__':
+    unittest.main()
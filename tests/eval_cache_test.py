@@ -0,0 +1,76 @@
+import unittest
+
+from ai.chooser import Chooser
+from ai.eval_cache import LRUCache
+from ai.iterative_search import IterativeDeepeningMinMax
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class EvaluationCacheTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(EvaluationCacheTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1b.moves[1] = SingleMove('Growth', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Spa, [(StatsType.Spa, 1)], [], StatsType.Spd, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Hydropump', 80, 110, MoveCategory.Special, 5, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+        self.battleField.weather = Weather.Raindance
+
+    def test_lru(self):
+        cache = LRUCache(max_size=2)
+        cache.put(1, 10)
+        cache.put(2, 20)
+        self.assertEqual(cache.get(1), 10)
+        # 2 is now the least recently used entry
+        cache.put(3, 30)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 30)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_cached_valuation(self):
+        Chooser.evaluation_cache.clear()
+        for bot_action in IterativeDeepeningMinMax.bot_actions(self.battleField):
+            for oppo_action in IterativeDeepeningMinMax.oppo_actions(self.battleField):
+                record = self.battleField.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement)
+                expected = Chooser.valuation_state(self.battleField) + Chooser.matchup_terms(self.battleField)
+                self.assertEqual(expected, Chooser.valuation_action(self.battleField))
+                self.assertEqual(expected, Chooser.valuation_action(self.battleField))
+                self.battleField.undo(record)
+
+    def test_signatures(self):
+        state_key = Chooser.state_signature(self.battleField)
+        matchup_key = Chooser.matchup_signature(self.battleField)
+        self.battleField.active_pokemon_oppo.stats.damage += 10
+        self.assertNotEqual(state_key, Chooser.state_signature(self.battleField))
+        self.assertEqual(matchup_key, Chooser.matchup_signature(self.battleField))
+        self.battleField.update_weather("sunnyday")
+        self.assertNotEqual(matchup_key, Chooser.matchup_signature(self.battleField))
+
+
+if __name__ == '__main__':
+    unittest.main()
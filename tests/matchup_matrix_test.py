@@ -0,0 +1,95 @@
+import unittest
+
+from ai.SwitchHelper import switch_help
+from ai.chooser import Chooser
+from ai.matchup_matrix import MatchupMatrix
+from model.damage_calculator import DamageCalculator
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+def rescore(bot_pokemon, oppo_pokemon):
+    """Scores computed from scratch, as the switch handlers did before the matrix"""
+    easy = 0
+    for pkmn_type in bot_pokemon.types:
+        for pkmn_type_oppo in oppo_pokemon.types:
+            easy += DamageCalculator.weak_to(pkmn_type_oppo, pkmn_type) - DamageCalculator.weak_to(pkmn_type,
+                                                                                                   pkmn_type_oppo)
+            easy += DamageCalculator.resists_to(pkmn_type, pkmn_type_oppo) - DamageCalculator.resists_to(
+                pkmn_type_oppo, pkmn_type)
+            easy += 2 * (DamageCalculator.immune_to(pkmn_type, pkmn_type_oppo) - DamageCalculator.immune_to(
+                pkmn_type_oppo, pkmn_type))
+    normal = easy * 2
+    for move in bot_pokemon.moves.values():
+        for pkmn_type_oppo in oppo_pokemon.types:
+            normal += 2 * DamageCalculator.weak_to(pkmn_type_oppo, move.move_type) - DamageCalculator.resists_to(
+                pkmn_type_oppo, move.move_type) - DamageCalculator.immune_to(pkmn_type_oppo, move.move_type)
+    return easy, normal
+
+
+class MatchupMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.charizard = Pokemon("Charizard", [pk.Fire, pk.Flying], "Male", Stats(78, 84, 78, 109, 85, 100), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.gengar = Pokemon("Gengar", [pk.Ghost, pk.Poison], "Male", Stats(60, 65, 60, 130, 75, 110), {}, [], 100,
+                              StatusType.Normal, [], None, 50)
+        self.swampert = Pokemon("Swampert", [pk.Water, pk.Ground], "Male", Stats(100, 110, 90, 85, 90, 60), {}, [],
+                                100, StatusType.Normal, [], None, 50)
+        self.venusaur = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                100, StatusType.Normal, [], None, 50)
+        self.magnezone = Pokemon("Magnezone", [pk.Electric, pk.Steel], "Male", Stats(70, 70, 115, 130, 90, 60), {},
+                                 [], 100, StatusType.Normal, [], None, 50)
+        self.gengar.moves[1] = SingleMove('Shadow Ball', 100, 80, MoveCategory.Special, 15, 0, False, 1, pk.Ghost,
+                                          StatsType.Spa, [], [], StatsType.Spd, 20, None, None)
+        self.swampert.moves[1] = SingleMove('Earthquake', 100, 100, MoveCategory.Physical, 10, 0, False, 1,
+                                            pk.Ground, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.venusaur.moves[1] = SingleMove('Sludge Bomb', 100, 90, MoveCategory.Special, 10, 0, False, 1, pk.Poison,
+                                            StatsType.Spa, [], [], StatsType.Spd, 30, None, None)
+        self.field = BattleFieldSingle(self.charizard, self.magnezone,
+                                       {1: self.charizard, 2: self.gengar, 3: self.swampert, 4: self.venusaur},
+                                       {1: self.magnezone})
+
+    def test_same_scores(self):
+        matrix = MatchupMatrix()
+        matrix.build(self.field)
+        for bot_pokemon in self.field.all_pkmns_bot.values():
+            for oppo_pokemon in (self.magnezone, self.venusaur, self.gengar):
+                self.assertEqual(matrix.get(bot_pokemon, oppo_pokemon), rescore(bot_pokemon, oppo_pokemon))
+
+    def test_switch_choices(self):
+        # Swampert has a ground move and a ground type against a steel and electric pokemon
+        self.assertEqual(switch_help(self.field), 3)
+        self.assertEqual(Chooser.__handle_normal_switch__(self.field), 3)
+        self.assertEqual(Chooser.__handle_easy_switch__(self.field), 3)
+        self.swampert.non_volatile_status = StatusType.Fnt
+        self.assertNotEqual(switch_help(self.field), 3)
+        self.assertIs(self.field.deepcopy().matchups, self.field.matchups)
+
+    def test_incremental_updates(self):
+        matrix = MatchupMatrix.of(self.field)
+        matrix.build(self.field)
+        self.assertEqual(len(matrix.scores), 4)
+        # A known pokemon with the same profile doesn't change the matrix
+        scores = matrix.scores
+        matrix.update_oppo(self.magnezone)
+        self.assertIs(matrix.scores, scores)
+        self.assertEqual(len(matrix.scores), 4)
+        # A new opponent adds a column, a new move of the bot updates a row
+        self.field.all_pkmns_oppo[2] = self.venusaur
+        matrix.update_oppo(self.venusaur)
+        self.assertEqual(len(matrix.scores), 8)
+        self.charizard.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, None)
+        matrix.update_bot(self.charizard)
+        self.assertEqual(matrix.get(self.charizard, self.venusaur), rescore(self.charizard, self.venusaur))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import time
+import unittest
+
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.mcts import MonteCarloTreeSearch
+from ai.transposition import ZobristHasher
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class MonteCarloTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(MonteCarloTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Female", Stats(60, 75, 85, 100, 85, 60), {},
+                                 [], 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Growl', 100, 0, MoveCategory.Status, 40, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [], [(StatsType.Atk, -1)], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Growth', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Spa, [(StatsType.Spa, 1)], [], StatsType.Spd, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Giga Drain', 100, 75, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def test_legal_action(self):
+        search = MonteCarloTreeSearch(seed=1)
+        value, index, is_move = search.make_decision(self.battleField, Chooser.valuation_action, iterations=50)
+        self.assertIn((index, is_move), IterativeDeepeningMinMax.bot_actions(self.battleField))
+        self.assertTrue(-1 <= value <= 1)
+        self.assertEqual(search.iterations, 50)
+
+    def test_field_unchanged(self):
+        hasher = ZobristHasher(seed=1)
+        field_hash = hasher.hash_field(self.battleField)
+        MonteCarloTreeSearch(seed=1).make_decision(self.battleField, Chooser.valuation_action, iterations=50)
+        self.assertEqual(field_hash, hasher.hash_field(self.battleField))
+
+    def test_best_move(self):
+        # Flamethrower is super effective against Venusaur, growl does nothing
+        search = MonteCarloTreeSearch(seed=1)
+        value, index, is_move = search.make_decision(self.battleField, Chooser.valuation_action, iterations=300)
+        self.assertEqual((index, is_move), (1, True))
+
+    def test_time_budget(self):
+        search = MonteCarloTreeSearch(seed=1)
+        start = time.monotonic()
+        search.make_decision(self.battleField, Chooser.valuation_action, time_budget=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertGreater(search.iterations, 0)
+
+    def test_chooser(self):
+        chooser = Chooser("mcts", time_budget=None, iterations=20)
+        self.assertIn(chooser.choose_move(self.battleField), IterativeDeepeningMinMax.bot_actions(self.battleField))
+
+
+if __name__ == '__main__':
+    unittest.main()
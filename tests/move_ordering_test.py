@@ -0,0 +1,77 @@
+import unittest
+
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.move_ordering import MoveOrdering
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class MoveOrderingTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(MoveOrderingTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Female", Stats(60, 75, 85, 100, 85, 60), {},
+                                 [], 80, StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Growl', 100, 0, MoveCategory.Status, 40, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [], [(StatsType.Atk, -1)], StatsType.Def, 100, None, None)
+        self.pokemon1a.moves[2] = SingleMove('Bite', 100, 60, MoveCategory.Physical, 25, 0, False, 1, pk.Dark,
+                                             StatsType.Atk, [], [], StatsType.Def, 30, None, None)
+        self.pokemon1a.moves[3] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon2a.moves[1] = SingleMove('Giga Drain', 100, 75, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a})
+
+    def test_damage_order(self):
+        ordering = MoveOrdering()
+        actions = IterativeDeepeningMinMax.bot_actions(self.battleField)
+        self.assertEqual(ordering.order(self.battleField, 1, actions, 0),
+                         [(3, True), (2, True), (1, True), (2, False)])
+
+    def test_best_and_killers_first(self):
+        ordering = MoveOrdering()
+        actions = IterativeDeepeningMinMax.bot_actions(self.battleField)
+        ordering.cutoff(self.battleField, 1, (2, False), 1, 1)
+        self.assertEqual(ordering.order(self.battleField, 1, actions, 1)[0], (2, False))
+        self.assertEqual(ordering.order(self.battleField, 1, actions, 1, (1, True))[:2], [(1, True), (2, False)])
+        # Killers of another depth only count with their history score
+        self.assertEqual(ordering.order(self.battleField, 1, actions, 2)[0], (2, False))
+        ordering.cutoff(self.battleField, 1, (3, True), 2, 3)
+        self.assertEqual(ordering.order(self.battleField, 1, actions, 2)[0], (3, True))
+
+    def test_killers_bounded(self):
+        ordering = MoveOrdering()
+        for action in [(1, True), (2, True), (3, True), (3, True)]:
+            ordering.cutoff(self.battleField, 2, action, 0, 2)
+        self.assertEqual(ordering.killers[2][0], [("Venusaur", (3, True)), ("Venusaur", (2, True))])
+        self.assertEqual(ordering.history[(2, "Venusaur", (3, True))], 8)
+
+    def test_new_turn(self):
+        ordering = MoveOrdering()
+        ordering.cutoff(self.battleField, 1, (1, True), 0, 1)
+        ordering.cutoff(self.battleField, 1, (2, True), 1, 2)
+        ordering.new_turn()
+        self.assertEqual(ordering.killers[1], {0: [("Incineroar", (2, True))]})
+        self.assertEqual(ordering.history, {(1, "Incineroar", (2, True)): 2})
+
+    def test_search_fills_tables(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        search.make_decision(self.battleField, Chooser.valuation_action, depth_limit=2)
+        self.assertTrue(search.move_ordering.history)
+
+
+if __name__ == '__main__':
+    unittest.main()
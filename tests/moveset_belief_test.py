@@ -0,0 +1,86 @@
+import unittest
+
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.moveset_belief import MovesetBelief, move_id
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+def physical_move(name):
+    return SingleMove(name, 100, 80, MoveCategory.Physical, 10, 0, False, 1, pk.Normal, StatsType.Atk, [], [],
+                      StatsType.Def, 100, None, None)
+
+
+class MovesetBeliefTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(MovesetBeliefTest, self).__init__(*args, **kwargs)
+        self.pools = [["swordsdance", "earthquake", "stoneedge"],
+                      ["swordsdance", "earthquake", "knockoff"],
+                      ["swordsdance", "stoneedge", "knockoff"],
+                      ["calmmind", "psychic", "shadowball"],
+                      ["calmmind", "psychic", "focusblast"],
+                      ["earthquake", "psychic"]]
+        self.pokemon1 = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1.moves[1] = physical_move("Darkest Lariat")
+        self.pokemon2 = Pokemon("Mew", [pk.Psychic], "Male", Stats(100, 100, 100, 100, 100, 100), {}, [], 4,
+                                StatusType.Normal, [], None, 50)
+        for index, name in enumerate(["Swords Dance", "Earthquake", "Stone Edge", "Calm Mind", "Psychic",
+                                      "Shadow Ball"]):
+            self.pokemon2.possible_moves[index + 5] = physical_move(name)
+        self.battleField = BattleFieldSingle(self.pokemon1, self.pokemon2, {1: self.pokemon1}, {1: self.pokemon2})
+
+    def test_counts(self):
+        belief = MovesetBelief(self.pools)
+        self.assertEqual(belief.pools, 6)
+        self.assertEqual(belief.move_counts["swordsdance"], 3)
+        self.assertEqual(belief.pair_count("earthquake", "swordsdance"), 2)
+        self.assertEqual(belief.pair_count("swordsdance", "earthquake"), 2)
+        self.assertEqual(belief.pair_count("swordsdance", "psychic"), 0)
+        self.assertEqual(move_id("U-turn"), "uturn")
+
+    def test_probabilities(self):
+        belief = MovesetBelief(self.pools)
+        probabilities = belief.probabilities(self.pokemon2)
+        self.assertAlmostEqual(sum(probabilities.values()), 1)
+
+        self.pokemon2.moves[1] = physical_move("Calm Mind")
+        probabilities = belief.probabilities(self.pokemon2)
+        self.assertEqual(probabilities[8], 0)
+        self.assertGreater(probabilities[9], probabilities[6])
+        self.assertGreater(probabilities[10], probabilities[5])
+
+        self.pokemon2.moves[1] = physical_move("Swords Dance")
+        probabilities = belief.probabilities(self.pokemon2)
+        self.assertEqual(probabilities[5], 0)
+        self.assertGreater(probabilities[6], probabilities[9])
+        self.assertGreater(probabilities[7], probabilities[10])
+
+    def test_selection(self):
+        self.pokemon2.moves[1] = physical_move("Calm Mind")
+        self.assertEqual(MovesetBelief(self.pools, top_k=2).likely_moves(self.pokemon2), [9, 10])
+        self.assertEqual(len(MovesetBelief(self.pools).likely_moves(self.pokemon2)), 5)
+        self.assertEqual(MovesetBelief(self.pools, mass=0.01).likely_moves(self.pokemon2), [9])
+        everything = MovesetBelief(self.pools, mass=1).likely_moves(self.pokemon2)
+        self.assertEqual(sorted(everything), [5, 6, 7, 9, 10])
+
+    def test_search_branching(self):
+        all_actions = IterativeDeepeningMinMax.oppo_actions(self.battleField)
+        self.assertEqual(len(all_actions), 6)
+        self.pokemon2.moves[1] = physical_move("Calm Mind")
+        MovesetBelief(self.pools, top_k=2).update(self.pokemon2)
+        self.assertEqual(IterativeDeepeningMinMax.oppo_actions(self.battleField), [(1, True), (9, True), (10, True)])
+        self.assertEqual(self.pokemon2.deepcopy().likely_moves, [9, 10])
+        self.assertIn(IterativeDeepeningMinMax(chance_nodes=True).make_decision(
+            self.battleField, lambda field: field.active_pokemon_bot.stats.get_actual_hp(), 2)[1:], [(1, True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import time
+import unittest
+
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.matchup_matrix import MatchupMatrix
+from ai.ponder import Ponderer
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class PonderTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(PonderTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [(StatsType.Atk, 2)], [], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Energy Ball', 100, 90, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Surf', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def test_predict(self):
+        ponderer = Ponderer(IterativeDeepeningMinMax(chance_nodes=True), Chooser.valuation_action, 3)
+        _, states = ponderer.predict(self.battleField, (2, True))
+        positions = [state.to_field() for state in states]
+        self.assertEqual(len(positions), 2)
+        # The field itself is not changed
+        self.assertEqual(self.pokemon1a.stats.mul_stats[StatsType.Atk], 0)
+        self.assertEqual(self.battleField.active_pokemon_oppo, self.pokemon2a)
+        for position in positions:
+            self.assertEqual(position.active_pokemon_bot.stats.mul_stats[StatsType.Atk], 2)
+
+    def test_start_and_stop(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        ponderer = Ponderer(search, Chooser.valuation_action, 8)
+        ponderer.start(self.battleField, (2, True))
+        time.sleep(0.5)
+        ponderer.stop()
+        self.assertIsNone(ponderer.thread)
+        self.assertIsNone(search.deadline)
+        self.assertEqual(len(ponderer.results), 2)
+        self.assertTrue(all(result.depth >= 1 for result in ponderer.results.values()))
+
+        # The real turn reaches one of the predicted positions
+        position = ponderer.predict(self.battleField, (2, True))[1][0].to_field()
+        result = ponderer.lookup(position)
+        self.assertIsNotNone(result)
+        self.assertIn((result.value[1], result.value[2]), IterativeDeepeningMinMax.bot_actions(position))
+        self.assertIsNone(ponderer.lookup(self.battleField))
+
+    def test_private_copy(self):
+        self.pokemon2a.possible_moves = {5: SingleMove('Ice Beam', 100, 90, MoveCategory.Special, 10, 0, False, 1,
+                                                       pk.Ice, StatsType.Spa, [], [], StatsType.Spd, 10, None, None)}
+        MatchupMatrix.of(self.battleField).build(self.battleField)
+        ponderer = Ponderer(IterativeDeepeningMinMax(chance_nodes=True), Chooser.valuation_action, 3)
+        field, _ = ponderer.predict(self.battleField, (1, True))
+        copy = field.all_pkmns_oppo[1]
+        self.assertIsNot(copy.possible_moves, self.pokemon2a.possible_moves)
+        self.assertIsNot(copy.possible_moves[5], self.pokemon2a.possible_moves[5])
+        self.assertIsNot(field.matchups, self.battleField.matchups)
+        # The messages of the turn change the field while the thread searches the copy
+        self.pokemon2a.possible_moves.clear()
+        self.battleField.matchups.update_oppo(Pokemon("Scizor", [pk.Bug, pk.Steel], "Male",
+                                                      Stats(70, 130, 100, 55, 80, 65), {}, [], 118,
+                                                      StatusType.Normal, [], None, 50))
+        self.assertEqual(list(copy.possible_moves), [5])
+        self.assertNotIn("Scizor", field.matchups.oppo)
+        self.assertEqual(field.matchups.get(self.pokemon1a, self.pokemon2a),
+                         self.battleField.matchups.get(self.pokemon1a, self.pokemon2a))
+
+    def test_chooser(self):
+        chooser = Chooser("hard", time_budget=0.2, ponder=True)
+        action = chooser.choose_move(self.battleField)
+        chooser.ponder(self.battleField, action)
+        time.sleep(0.5)
+        position = chooser.ponderer.predict(self.battleField, action)[1][0].to_field()
+        self.assertIn(chooser.choose_move(position), IterativeDeepeningMinMax.bot_actions(position))
+        self.assertIsNone(chooser.ponderer.thread)
+
+        # Without pondering nothing starts
+        chooser = Chooser("hard", time_budget=0.2)
+        chooser.ponder(self.battleField, action)
+        self.assertIsNone(chooser.ponderer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import pickle
+import random
+import unittest
+
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.transposition import ZobristHasher
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.search_state import SearchLayout, SearchState
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class SearchStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Gengar", [pk.Ghost, pk.Poison], "Female", Stats(60, 65, 60, 130, 75, 110), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1,
+                                             pk.Normal, StatsType.Atk, [(StatsType.Atk, 2)], [], StatsType.Def, 100,
+                                             None, None)
+        self.pokemon1b.moves[1] = SingleMove('Earthquake', 100, 100, MoveCategory.Physical, 10, 0, False, 1,
+                                             pk.Ground, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Shadow Ball', 100, 80, MoveCategory.Special, 15, 0, False, 1, pk.Ghost,
+                                             StatsType.Spa, [], [], StatsType.Spd, 20, None, None)
+        self.pokemon2a.possible_moves[5] = SingleMove('Confuse Ray', 100, 0, MoveCategory.Status, 10, 0, False, 1,
+                                                      pk.Ghost, StatsType.Spa, [], [], StatsType.Spd, 100,
+                                                      ("target", StatusType.Confusion), None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+        self.hasher = ZobristHasher(0)
+
+    def snapshot(self, field):
+        """Everything that a state must restore, the pokemons by name"""
+        pokemons = []
+        for side in (1, 2):
+            for index, pokemon in field.bench_selector_side[side].items():
+                pokemons.append((side, index, pokemon.name, pokemon.stats.damage, pokemon.non_volatile_status,
+                                 sorted(status.name for status in pokemon.volatile_status), pokemon.bad_poison_turn,
+                                 pokemon.blocked, dict(pokemon.stats.mul_stats), dict(pokemon.stats.volatile_mul),
+                                 pokemon.damage_output_multiplier, pokemon.damage_input_multiplier,
+                                 [move.pp for move in pokemon.moves.values()],
+                                 [move.pp for move in pokemon.possible_moves.values()]))
+        return (field.weather, field.field, field.active_pokemon_bot.name, field.active_pokemon_oppo.name,
+                field.active_selector_side[1].name, field.active_selector_side[2].name, pokemons)
+
+    def play(self, field, generator, turns):
+        for _ in range(turns):
+            if IterativeDeepeningMinMax.is_terminal(field, 0, 1):
+                break
+            field.apply_actions(generator.choice(IterativeDeepeningMinMax.bot_actions(field)),
+                                generator.choice(IterativeDeepeningMinMax.oppo_actions(field)),
+                                IterativeDeepeningMinMax.replacement)
+
+    def test_round_trip(self):
+        generator = random.Random(3)
+        layout = SearchLayout(self.battleField)
+        for _ in range(30):
+            self.play(self.battleField, generator, 2)
+            expected = self.snapshot(self.battleField)
+            expected_hash = self.hasher.hash_field(self.battleField)
+            state = SearchState.from_field(self.battleField, layout)
+            self.play(self.battleField, generator, 3)
+            state.restore(self.battleField)
+            self.assertEqual(self.snapshot(self.battleField), expected)
+            self.assertEqual(self.hasher.hash_field(self.battleField), expected_hash)
+            # A new field in the same state
+            self.assertEqual(self.snapshot(state.to_field()), expected)
+
+    def test_copy_and_hash(self):
+        self.battleField.weather = Weather.Raindance
+        self.pokemon2a.volatile_status.append(StatusType.Confusion)
+        self.pokemon1a.stats.volatile_mul[StatsType.Spe] = 0.5
+        state = SearchState.from_field(self.battleField)
+        copy = state.copy()
+        self.assertEqual(state, copy)
+        self.assertEqual(hash(state), hash(copy))
+        self.battleField.switch_pokemon(1, 2)
+        self.pokemon1a.stats.modify(StatsType.Atk, 1)
+        other = SearchState.from_field(self.battleField, state.layout)
+        self.assertNotEqual(state, other)
+        self.assertEqual({state, copy, other}, {state, other})
+        self.assertEqual(state.to_field().weather, Weather.Raindance)
+        self.assertEqual(state.to_field().active_pokemon_oppo.volatile_status, [StatusType.Confusion])
+
+    def test_multipliers_after_switch(self):
+        layout = SearchLayout(self.battleField)
+        self.pokemon1a.stats.volatile_mul[StatsType.Spe] = 0.5
+        self.pokemon1a.damage_output_multiplier = 1.5
+        self.pokemon2b.damage_input_multiplier = 0.5
+        self.battleField.switch_pokemon(1, 2)
+        self.battleField.switch_pokemon(2, 2)
+        expected = self.snapshot(self.battleField)
+        state = SearchState.from_field(self.battleField, layout)
+        self.pokemon1a.stats.volatile_mul[StatsType.Spe] = 1
+        self.pokemon1a.damage_output_multiplier = 1
+        self.pokemon2b.damage_input_multiplier = 1
+        state.restore(self.battleField)
+        self.assertEqual(self.snapshot(self.battleField), expected)
+        self.assertEqual(self.pokemon1a.stats.volatile_mul[StatsType.Spe], 0.5)
+        self.assertEqual(self.pokemon1b.stats.volatile_mul[StatsType.Spe], 1)
+        self.assertEqual((self.pokemon1a.damage_output_multiplier, self.pokemon1b.damage_output_multiplier), (1.5, 1))
+        self.assertEqual((self.pokemon2a.damage_input_multiplier, self.pokemon2b.damage_input_multiplier), (1, 0.5))
+        self.assertEqual(self.snapshot(state.to_field()), expected)
+
+    def test_size(self):
+        state = SearchState.from_field(self.battleField)
+        self.assertLess(state.nbytes() * 4, len(pickle.dumps(self.battleField.deepcopy())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import unittest
+
+from ai.batch_eval import BatchEvaluator
+from ai.chooser import Chooser
+from ai.eval_cache import LRUCache
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.search_stats import SearchStats
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1b.moves[1] = SingleMove('Earthquake', 100, 100, MoveCategory.Physical, 10, 0, False, 1,
+                                             pk.Ground, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Hydropump', 80, 110, MoveCategory.Special, 5, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+        self.battleField.turn_number = 7
+
+    def test_counters(self):
+        cache = LRUCache()
+        cache.put("known", 1)
+        cache.get("known")
+        stats = SearchStats({"cache": cache})
+        stats.start(3)
+        cache.get("known")
+        cache.get("other")
+        cache.get("other")
+        stats.nodes = 1000
+        stats.add((331, 200, 0.5, 0.25))
+        self.assertEqual(stats.cache_deltas(), {"cache": (1, 3)})
+        stats.finish(3)
+        # Only the lookups during the decision count
+        self.assertAlmostEqual(stats.hit_rates["cache"], 1 / 3)
+        self.assertEqual(stats.counters(), (1331, 200, 0.5, 0.25))
+        self.assertAlmostEqual(stats.branching_factor(), 11)
+        line = stats.to_dict()
+        self.assertEqual((line["turn"], line["depth"], line["leaves"]), (3, 3, 200))
+        # The lookups of the workers are added to the ones of this process
+        stats.start(4)
+        cache.get("known")
+        stats.add_cache_counts({"cache": (1, 3), "other": (0, 2)})
+        stats.finish(3)
+        self.assertEqual(stats.hit_rates, {"cache": 0.5, "other": 0})
+
+    def test_decision_line(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        with self.assertLogs("SearchStats", level="INFO") as logs:
+            search.make_decision(self.battleField, Chooser.valuation_action, 2)
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["turn"], line["depth"]), (7, 2))
+        self.assertGreater(line["nodes"], line["leaves"])
+        self.assertGreater(line["leaves"], 0)
+        self.assertGreater(line["make_time"], 0)
+        self.assertGreater(line["eval_time"], 0)
+        self.assertLessEqual(line["make_time"] + line["eval_time"], line["time"])
+        self.assertIn("transposition", line["hit_rates"])
+
+    def test_parallel_line(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True, workers=2, stats=SearchStats(Chooser.search_caches()),
+                                          worker_caches=Chooser.search_caches)
+        try:
+            with self.assertLogs("SearchStats", level="INFO") as logs:
+                search.make_decision(self.battleField, Chooser.valuation_action, 2)
+        finally:
+            search.shutdown()
+        line = json.loads(logs.records[0].getMessage())
+        self.assertGreater(line["nodes"], 0)
+        # The caches of this process are not used, the lookups are the ones of the workers
+        self.assertEqual(set(line["hit_rates"]), {"transposition", "evaluation", "matchup", "damage"})
+        for name in ("evaluation", "damage"):
+            self.assertGreater(search.stats.added_counts[name][1], 0)
+            self.assertGreater(line["hit_rates"][name], 0)
+
+    def test_batch_leaves(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True,
+                                          batch_evaluator=BatchEvaluator(Chooser.valuation_matchup,
+                                                                         Chooser.matchup_signature))
+        value = search.make_decision(self.battleField, Chooser.valuation_action, 2)
+        # The same search one leaf at a time
+        single = IterativeDeepeningMinMax(chance_nodes=True)
+        self.assertEqual(single.make_decision(self.battleField, Chooser.valuation_action, 2)[1:], value[1:])
+        # The batches evaluate the leaves that the transposition table would find
+        self.assertGreaterEqual(search.stats.leaves, single.stats.leaves)
+        self.assertGreater(single.stats.leaves, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+
+from ai.chooser import Chooser
+from ai.moveset_belief import MovesetBelief
+from ai.self_play import TeamGenerator, SelfPlayBattle, SelfPlayReport, GameResult, run_games
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+POKEDEX = {
+    "charizard": ("Charizard", [pk.Fire, pk.Flying], (78, 84, 78, 109, 85, 100), 90.5),
+    "blastoise": ("Blastoise", [pk.Water], (79, 83, 100, 85, 105, 78), 85.5),
+    "venusaur": ("Venusaur", [pk.Grass, pk.Poison], (80, 82, 83, 100, 100, 80), 100),
+    "gengar": ("Gengar", [pk.Ghost, pk.Poison], (60, 65, 60, 130, 75, 110), 40.5),
+    "arbok": ("Arbok", [pk.Poison], (60, 95, 69, 65, 79, 80), 65),
+    "raichu": ("Raichu", [pk.Electric], (60, 90, 55, 90, 80, 110), 30),
+    "scizor": ("Scizor", [pk.Bug, pk.Steel], (70, 130, 100, 55, 80, 65), 118),
+}
+MOVES = {
+    "flamethrower": ('Flamethrower', 100, 90, MoveCategory.Special, pk.Fire),
+    "hydropump": ('Hydro Pump', 80, 110, MoveCategory.Special, pk.Water),
+    "gigadrain": ('Giga Drain', 100, 75, MoveCategory.Special, pk.Grass),
+    "shadowball": ('Shadow Ball', 100, 80, MoveCategory.Special, pk.Ghost),
+    "sludgebomb": ('Sludge Bomb', 100, 90, MoveCategory.Special, pk.Poison),
+    "thunderbolt": ('Thunderbolt', 100, 90, MoveCategory.Special, pk.Electric),
+    "earthquake": ('Earthquake', 100, 100, MoveCategory.Physical, pk.Ground),
+    "bugbite": ('Bug Bite', 100, 60, MoveCategory.Physical, pk.Bug),
+    "bulletpunch": ('Bullet Punch', 100, 40, MoveCategory.Physical, pk.Steel),
+    "icebeam": ('Ice Beam', 100, 90, MoveCategory.Special, pk.Ice),
+}
+POOLS = {
+    "charizard": ["flamethrower", "earthquake", "shadowball", "thunderbolt", "gigadrain"],
+    "blastoise": ["hydropump", "icebeam", "earthquake", "shadowball"],
+    "venusaur": ["gigadrain", "sludgebomb", "earthquake", "icebeam"],
+    "gengar": ["shadowball", "sludgebomb", "thunderbolt", "gigadrain", "unknownmove"],
+    "arbok": ["sludgebomb", "earthquake", "bugbite"],
+    "raichu": ["thunderbolt", "icebeam", "gigadrain", "bulletpunch"],
+    "scizor": ["bugbite", "bulletpunch", "earthquake", "shadowball"],
+    "missingno": ["hydropump"],
+}
+
+
+class MemoryDataSource:
+    """Data source with a few pokemons and moves, with the methods of DatabaseDataSource used by the generator"""
+
+    def get_random_pools(self, battle_type="Single"):
+        return {name: list(moves) for name, moves in POOLS.items()}
+
+    def get_pokemon_by_name(self, name, level=50):
+        # Like the database, an unknown name has no rows
+        name, types, stats, weight = [entry for entry in POKEDEX.values() if entry[0].lower() == name.lower()][0]
+        return Pokemon(name, types, "", Stats(*stats, level=level, is_base=True), {}, [], weight, StatusType.Normal,
+                       [], None, level)
+
+    def get_move_by_name(self, name):
+        if name not in MOVES:
+            return None
+        move_name, accuracy, power, category, move_type = MOVES[name]
+        scale_with, defends_on = (StatsType.Atk, StatsType.Def) if category is MoveCategory.Physical else (
+            StatsType.Spa, StatsType.Spd)
+        return SingleMove(move_name, accuracy, power, category, 15, 0, False, 1, move_type, scale_with, [], [],
+                          defends_on, 100, None, None)
+
+
+class SelfPlayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = TeamGenerator(MemoryDataSource(), level=50, seed=1)
+
+    def test_teams(self):
+        team = self.generator.team(6)
+        self.assertEqual(list(team), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(len(set(pokemon.name for pokemon in team.values())), 6)
+        for pokemon in team.values():
+            pool = POOLS[pokemon.name.lower()]
+            self.assertEqual(list(pokemon.moves), list(range(1, min(4, len(pool)) + 1)))
+            self.assertTrue(all(move.move_name in [MOVES[move_id][0] for move_id in pool]
+                                for move in pokemon.moves.values()))
+        self.assertIn("missingno", self.generator.missing)
+        # The same seed, the same team
+        other = TeamGenerator(MemoryDataSource(), level=50, seed=1).team(6)
+        self.assertEqual([(pokemon.name, [move.move_name for move in pokemon.moves.values()])
+                          for pokemon in other.values()],
+                         [(pokemon.name, [move.move_name for move in pokemon.moves.values()])
+                          for pokemon in team.values()])
+
+    def test_views(self):
+        teams = [self.generator.team(3), self.generator.team(3)]
+        battle = SelfPlayBattle([Chooser("easy"), Chooser("easy")], teams, self.generator)
+        view = battle.view(1)
+        # The opponent shows only its active pokemon and no moves
+        self.assertEqual([pokemon.name for pokemon in view.all_pkmns_oppo.values()], [teams[1][1].name])
+        self.assertEqual(view.active_pokemon_oppo.moves, {})
+        self.assertEqual(len(view.active_pokemon_oppo.possible_moves),
+                         len([move for move in POOLS[teams[1][1].name.lower()] if move in MOVES]))
+        self.assertEqual(list(view.all_pkmns_bot), [1, 2, 3])
+        self.assertIsNot(view.active_pokemon_bot, teams[0][1])
+        # A used move is revealed and is no more a possible move
+        battle.reveal(2, 1)
+        used = teams[1][1].moves[1].move_name
+        view = battle.view(1)
+        self.assertEqual([move.move_name for move in view.active_pokemon_oppo.moves.values()], [used])
+        self.assertNotIn(used, [move.move_name for move in view.active_pokemon_oppo.possible_moves.values()])
+        self.assertEqual(battle.view(2).active_pokemon_bot.name, teams[1][1].name)
+
+    def test_game(self):
+        teams = [self.generator.team(3), self.generator.team(3)]
+        belief = MovesetBelief(self.generator.pools.values(), 4)
+        battle = SelfPlayBattle([Chooser("normal"), Chooser("easy")], teams, self.generator, belief)
+        result = battle.play()
+        self.assertLessEqual(result.turns, 200)
+        self.assertGreater(len(result.latencies[0]), 0)
+        self.assertGreater(len(result.latencies[1]), 0)
+        alive = [[pokemon for pokemon in team.values() if pokemon.non_volatile_status is not StatusType.Fnt]
+                 for team in teams]
+        if result.winner is not None:
+            self.assertEqual(alive[1 - result.winner], [])
+            self.assertNotEqual(alive[result.winner], [])
+
+    def test_report(self):
+        report = SelfPlayReport(["a", "b"])
+        report.add(GameResult(0, 10, ([0.1, 0.3], [0.2])))
+        report.add(GameResult(None, 200, ([0.2], [0.4])))
+        self.assertEqual((report.games, report.wins, report.draws), (2, [1, 0], 1))
+        self.assertEqual(report.win_rate(0), 0.5)
+        latency = report.latency(0)
+        self.assertAlmostEqual(latency["mean"], 0.2)
+        self.assertEqual((latency["p50"], latency["max"]), (0.2, 0.3))
+        self.assertEqual(report.latency(1)["p95"], 0.4)
+
+    def test_run_games(self):
+        report = run_games(4, MemoryDataSource, ("normal", "easy"), seed=3, max_turns=100)
+        self.assertEqual(report.games, 4)
+        self.assertEqual(sum(report.wins) + report.draws, 4)
+        # The workers play the same games
+        parallel = run_games(4, MemoryDataSource, ("normal", "easy"), workers=2, seed=3, max_turns=100)
+        self.assertEqual((parallel.wins, parallel.draws, parallel.turns), (report.wins, report.draws, report.turns))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -72,3 +72,37 @@ class StatsTest(unittest.TestCase):
 
         self.assertEqual(self.stat.mul_stats[StatsType.Atk], 6,
                          "Multiplier should be 6 instead of {}".format(str(self.stat.mul_stats[StatsType.Atk])))
+
+    def testCachedActualValues(self):
+        speed = self.stat.get_actual(StatsType.Spe)
+        # Direct writes and the volatile multipliers drop the cached value too
+        self.stat.mul_stats[StatsType.Spe] = 2
+        self.assertEqual(self.stat.get_actual(StatsType.Spe), 2 * speed)
+        self.stat.increase_volatile_mul(StatsType.Spe, 0.5)
+        self.assertEqual(self.stat.get_actual(StatsType.Spe), speed)
+        self.stat.volatile_mul[StatsType.Spe] = 1
+        self.assertEqual(self.stat.get_actual(StatsType.Spe), 2 * speed)
+        self.stat.mul_stats.update({StatsType.Spe: 0})
+        self.assertEqual(self.stat.get_actual(StatsType.Spe), speed)
+
+    def testFlatCopy(self):
+        self.stat.modify(StatsType.Def, 1)
+        defense = self.stat.get_actual(StatsType.Def)
+        copy = self.stat.deepcopy()
+        self.assertIs(copy.real_stats, self.stat.real_stats)
+        copy.modify(StatsType.Def, -2)
+        self.assertEqual(self.stat.get_actual(StatsType.Def), defense)
+        self.assertNotEqual(copy.get_actual(StatsType.Def), defense)
+        # Restoring the saved multipliers restores the effective values
+        copy.mul_stats.update(self.stat.mul_stats)
+        self.assertEqual(copy.get_actual(StatsType.Def), defense)
+        self.assertEqual(copy.signature(), self.stat.signature())
+
+    def testDictApi(self):
+        self.assertEqual(list(self.stat.mul_stats), [StatsType.Atk, StatsType.Def, StatsType.Spa, StatsType.Spd,
+                                                     StatsType.Spe, StatsType.Accuracy, StatsType.Evasion])
+        self.assertEqual(dict(self.stat.mul_stats), dict.fromkeys(self.stat.mul_stats, 0))
+        self.assertEqual(sum(self.stat.volatile_mul.values()), 7)
+        self.assertNotIn(StatsType.HP, self.stat.mul_stats)
+        with self.assertRaises(KeyError):
+            self.stat.mul_stats[StatsType.HP] = 1
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+
+from ai.chooser import Chooser
+from ai.endgame import EndgameSolver, HORIZON_BOUND
+from ai.tablebase import Tablebase, build_tablebase, STATUSES
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+from protocol.enemy_updater import update_enemy_move
+
+
+class MemoryMoves:
+    """Moves of the database, by the names that the updater looks up"""
+
+    def __init__(self, moves):
+        self.moves = {move.move_name.replace(" ", "").replace("-", "").lower(): move for move in moves}
+
+    def get_move_by_name(self, name):
+        return self.moves.get(name)
+
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "endgames.tb")
+        build_tablebase(cls.path, [cls.incineroar(), cls.scizor()], Chooser.valuation_action, hp_buckets=2,
+                        time_budget=None, max_turns=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    @staticmethod
+    def incineroar():
+        pokemon = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {}, [],
+                          80.50, StatusType.Normal, [], None, 50)
+        pokemon.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                      StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        return pokemon
+
+    @staticmethod
+    def scizor_pool():
+        """The pool of Scizor, the tables hold its first four moves"""
+        return [SingleMove('Bug Bite', 100, 60, MoveCategory.Physical, 20, 0, False, 1, pk.Bug, StatsType.Atk, [], [],
+                           StatsType.Def, 100, None, None),
+                SingleMove('Bullet Punch', 100, 40, MoveCategory.Physical, 30, 1, False, 1, pk.Steel, StatsType.Atk,
+                           [], [], StatsType.Def, 100, None, None),
+                SingleMove('Knock Off', 100, 65, MoveCategory.Physical, 20, 0, False, 1, pk.Dark, StatsType.Atk, [],
+                           [], StatsType.Def, 100, None, None),
+                SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal, StatsType.Atk,
+                           [(StatsType.Atk, 2)], [], StatsType.Def, 100, None, None),
+                SingleMove('U-turn', 100, 70, MoveCategory.Physical, 20, 0, False, 1, pk.Bug, StatsType.Atk, [], [],
+                           StatsType.Def, 100, None, None),
+                SingleMove('Superpower', 100, 120, MoveCategory.Physical, 5, 0, False, 1, pk.Fighting, StatsType.Atk,
+                           [], [], StatsType.Def, 100, None, None)]
+
+    @staticmethod
+    def scizor():
+        pokemon = Pokemon("Scizor", [pk.Bug, pk.Steel], "Female", Stats(70, 130, 100, 55, 80, 65), {}, [], 118,
+                          StatusType.Normal, [], None, 50)
+        for index, move in enumerate(TablebaseTest.scizor_pool()[:4], 1):
+            pokemon.moves[index] = move
+        return pokemon
+
+    def setUp(self):
+        self.tablebase = Tablebase(self.path)
+        self.pokemon1 = self.incineroar()
+        self.pokemon2 = self.scizor()
+        self.battleField = BattleFieldSingle(self.pokemon1, self.pokemon2, {1: self.pokemon1}, {1: self.pokemon2})
+
+    def tearDown(self):
+        self.tablebase.close()
+
+    def test_file(self):
+        self.assertEqual(len(self.tablebase), 4)
+        self.assertEqual(self.tablebase.species, {"Incineroar": (0, 50, ("Flamethrower",)),
+                                                  "Scizor": (1, 50, ("Bug Bite", "Bullet Punch", "Knock Off",
+                                                                     "Swords Dance"))})
+        self.assertEqual(os.path.getsize(self.path), self.tablebase.tables_offset + 4 * (2 * len(STATUSES)) ** 2)
+        with open(os.path.join(self.directory.name, "other.tb"), "wb") as file:
+            file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            Tablebase(os.path.join(self.directory.name, "other.tb"))
+
+    def test_lookup(self):
+        # Flamethrower knocks out Scizor
+        self.assertAlmostEqual(self.tablebase.lookup(self.pokemon1, self.pokemon2), 1, 2)
+        self.assertAlmostEqual(self.tablebase.lookup(self.pokemon2, self.pokemon1), -1, 2)
+        self.assertEqual(Tablebase.hp_bucket(self.pokemon1, 2), 1)
+        self.pokemon1.stats.damage = self.pokemon1.stats.real_stats[StatsType.HP] - 1
+        self.assertEqual(Tablebase.hp_bucket(self.pokemon1, 2), 0)
+        # Another level, a boost, a weather or a fainted pokemon are not in the tables
+        self.assertIsNotNone(self.tablebase.lookup_field(self.battleField))
+        self.pokemon1.stats.modify(StatsType.Spa, 1)
+        self.assertIsNone(self.tablebase.lookup_field(self.battleField))
+        self.pokemon1.stats.modify(StatsType.Spa, -1)
+        self.battleField.weather = Weather.Raindance
+        self.assertIsNone(self.tablebase.lookup_field(self.battleField))
+        self.battleField.weather = Weather.Normal
+        self.assertIsNotNone(self.tablebase.lookup_field(self.battleField))
+        # Another moveset or moves not revealed yet
+        self.pokemon2.moves[5] = self.incineroar().moves[1]
+        self.assertIsNone(self.tablebase.lookup_field(self.battleField))
+        del self.pokemon2.moves[5]
+        del self.pokemon2.moves[4]
+        self.assertIsNone(self.tablebase.lookup_field(self.battleField))
+        self.pokemon2.non_volatile_status = StatusType.Fnt
+        self.assertIsNone(self.tablebase.lookup(self.pokemon1, self.pokemon2))
+        self.pokemon2.level = 80
+        self.assertIsNone(self.tablebase.lookup(self.pokemon1, self.pokemon2))
+
+    def test_revealed_moves(self):
+        pool = self.scizor_pool()
+        self.pokemon2.moves = {}
+        self.pokemon2.possible_moves = {index: move for index, move in enumerate(pool, 5)}
+        moves = MemoryMoves(pool)
+        for revealed, move in enumerate(pool[:4], 1):
+            self.assertIsNone(self.tablebase.lookup_field(self.battleField))
+            update_enemy_move(self.battleField, moves, move.move_name)
+            self.assertEqual(len(self.pokemon2.moves), revealed)
+        # The rest of the pool is still possible, the four revealed moves are the whole moveset of the tables
+        self.assertTrue(self.pokemon2.possible_moves)
+        self.assertAlmostEqual(self.tablebase.lookup_field(self.battleField), 1, 2)
+
+    def test_solver(self):
+        # Arbok faints and its replacement is the 1v1 of the tables
+        arbok = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65, StatusType.Normal,
+                        [], None, 50)
+        arbok.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1, pk.Poison,
+                                    StatsType.Atk, [], [], StatsType.Def, 30, None, ("normal", StatusType.Psn))
+        arbok.stats.damage = arbok.stats.real_stats[StatsType.HP] - 1
+        field = BattleFieldSingle(self.pokemon1, arbok, {1: self.pokemon1}, {1: arbok, 2: self.pokemon2})
+        solver = EndgameSolver(team_size=2, max_turns=2, tablebase=self.tablebase)
+        value, index, is_move = solver.make_decision(field, Chooser.valuation_action, 5)
+        self.assertEqual((index, is_move), (1, True))
+        # The values of the tables are approximations, bounded like the ones at the horizon
+        self.assertAlmostEqual(value, HORIZON_BOUND, 2)
+        self.assertFalse(solver.exact)
+        # Solving the 1v1 in the same turns finds the exact win with more nodes
+        searching = EndgameSolver(team_size=2, max_turns=2)
+        self.assertAlmostEqual(searching.make_decision(field, Chooser.valuation_action, 5)[0], 1, 2)
+        self.assertTrue(searching.exact)
+        self.assertLess(solver.nodes, searching.nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
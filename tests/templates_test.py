@@ -0,0 +1,69 @@
+import pickle
+import unittest
+
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class TemplatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pokemon1 = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {}, [],
+                                80.50, StatusType.Normal, [], None, 50)
+        self.pokemon2 = Pokemon("Gengar", [pk.Ghost, pk.Poison], "Female", Stats(60, 65, 60, 130, 75, 110), {}, [],
+                                80, StatusType.Normal, [], None, 50)
+        self.pokemon1.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                            StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon2.moves[1] = SingleMove('Shadow Ball', 100, 80, MoveCategory.Special, 15, 0, False, 1, pk.Ghost,
+                                            StatsType.Spa, [], [], StatsType.Spd, 20, None, None)
+
+    def test_move_template(self):
+        move = self.pokemon1.moves[1]
+        copy = move.deepcopy()
+        self.assertIs(copy.template, move.template)
+        self.assertEqual((copy.move_name, copy.base_power, copy.pp), ('Flamethrower', 90, 15))
+        copy.pp -= 1
+        copy.is_Z = True
+        self.assertEqual((move.pp, move.is_Z), (15, False))
+        self.assertEqual(SingleMove.from_template(move.template).pp, 15)
+        with self.assertRaises(AttributeError):
+            copy.base_power = 100
+        with self.assertRaises(AttributeError):
+            copy.new_attribute = 1
+
+    def test_pokemon_species(self):
+        other = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Female", Stats(100, 100, 100, 100, 100, 100), {}, [],
+                        80.50, StatusType.Normal, [], None, 50)
+        self.assertIs(other.species, self.pokemon1.species)
+        copy = self.pokemon1.deepcopy()
+        self.assertIs(copy.species, self.pokemon1.species)
+        self.assertEqual((copy.name, copy.types, copy.weight), ("Incineroar", [pk.Fire, pk.Dark], 80.50))
+        self.assertIsNot(copy.moves[1], self.pokemon1.moves[1])
+        with self.assertRaises(AttributeError):
+            copy.name = "Gengar"
+
+    def test_stats_share_fixed_values(self):
+        copy = self.pokemon1.stats.deepcopy()
+        self.assertIs(copy.real_stats, self.pokemon1.stats.real_stats)
+        self.assertIs(copy.base_stats, self.pokemon1.stats.base_stats)
+        copy.modify(StatsType.Atk, 2)
+        self.assertEqual(self.pokemon1.stats.mul_stats[StatsType.Atk], 0)
+        self.assertEqual(copy.get_actual(StatsType.Atk), 2 * self.pokemon1.stats.get_actual(StatsType.Atk))
+
+    def test_pickle(self):
+        field = BattleFieldSingle(self.pokemon1, self.pokemon2, {1: self.pokemon1}, {1: self.pokemon2})
+        self.pokemon1.stats.modify(StatsType.Spe, 1)
+        loaded = pickle.loads(pickle.dumps(field))
+        self.assertEqual(loaded.active_pokemon_bot.name, "Incineroar")
+        self.assertEqual(loaded.active_pokemon_bot.stats.signature(), self.pokemon1.stats.signature())
+        self.assertEqual(loaded.active_pokemon_oppo.moves[1].powers, (80, 120))
+
+
+if __name__ == '__main__':
+    unittest.main()
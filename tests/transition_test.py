@@ -0,0 +1,120 @@
+import random
+import unittest
+
+from ai.iterative_search import IterativeDeepeningMinMax
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class TransitionTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TransitionTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [(StatsType.Atk, 2)], [], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Giga Drain', 100, 75, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                             StatsType.Spa, [], [], StatsType.Spd, 0, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Psy Beam', 100, 65, MoveCategory.Special, 20, 0, False, 1, pk.Psychic,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, ("normal",
+                                                                                         StatusType.Confusion), None)
+        self.pokemon2a.possible_moves = {5: SingleMove('Thunder Wave', 90, 0, MoveCategory.Status, 20, 0, False, 1,
+                                                       pk.Electric, StatsType.Spa, [], [], StatsType.Spd, 100, None,
+                                                       ("normal", StatusType.Par))}
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def snapshot(self):
+        pokemons = list(self.battleField.all_pkmns_bot.items()) + list(self.battleField.all_pkmns_oppo.items())
+        return (self.battleField.active_pokemon_bot.name, self.battleField.active_pokemon_oppo.name,
+                self.battleField.active_selector_side[1].name, self.battleField.active_selector_side[2].name,
+                [(index, pokemon.name, pokemon.stats.damage, dict(pokemon.stats.mul_stats),
+                  dict(pokemon.stats.volatile_mul), pokemon.non_volatile_status, list(pokemon.volatile_status))
+                 for index, pokemon in pokemons],
+                [(move.move_name, move.pp) for move in list(self.pokemon1a.moves.values()) +
+                 list(self.pokemon2a.moves.values()) + list(self.pokemon2a.possible_moves.values())])
+
+    def test_undo_restores_field(self):
+        before = self.snapshot()
+        for bot_action in IterativeDeepeningMinMax.bot_actions(self.battleField):
+            for oppo_action in IterativeDeepeningMinMax.oppo_actions(self.battleField):
+                record = self.battleField.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement)
+                self.assertNotEqual(before, self.snapshot())
+                self.battleField.undo(record)
+                self.assertEqual(before, self.snapshot())
+
+    def test_apply_actions(self):
+        record = self.battleField.apply_actions((2, False), (1, True))
+        self.assertEqual(self.battleField.active_pokemon_bot.name, "Venusaur")
+        self.assertEqual(self.battleField.all_pkmns_bot[1].name, "Venusaur")
+        self.assertNotEqual(self.pokemon1b.stats.damage, 0)
+        self.assertEqual(self.pokemon2a.moves[1].pp, 19)
+        self.battleField.undo(record)
+        self.assertEqual(self.battleField.active_pokemon_bot.name, "Incineroar")
+        self.assertEqual(self.pokemon1b.stats.damage, 0)
+        self.assertEqual(self.pokemon2a.moves[1].pp, 20)
+
+    def test_search_leaves_field_unchanged(self):
+        before = self.snapshot()
+        IterativeDeepeningMinMax().make_decision(self.battleField, lambda field: field.active_pokemon_bot.stats.
+                                                 get_actual_hp(), depth_limit=3)
+        self.assertEqual(before, self.snapshot())
+
+    def test_move_outcomes(self):
+        # Sure hit without secondary effects: one outcome for each damage roll
+        outcomes = self.pokemon1b.moves[1].outcomes()
+        self.assertEqual(len(outcomes), 3)
+        self.assertAlmostEqual(sum(outcome.probability for outcome in outcomes), 1)
+
+        # Status move with 90% accuracy: miss or hit
+        outcomes = self.pokemon2a.possible_moves[5].outcomes()
+        self.assertEqual([outcome.hit for outcome in outcomes], [False, True])
+        self.assertAlmostEqual(outcomes[0].probability, 0.1)
+
+        turn = self.battleField.turn_outcomes((1, True), (5, True))
+        self.assertEqual(len(turn), 6)
+        self.assertAlmostEqual(sum(probability for probability, outcomes in turn), 1)
+
+    def test_apply_outcomes(self):
+        miss = [outcome for outcome in self.pokemon2a.possible_moves[5].outcomes() if not outcome.hit][0]
+        record = self.battleField.apply_actions((2, False), (5, True), outcomes={2: miss})
+        self.assertEqual(self.pokemon1b.non_volatile_status, StatusType.Normal)
+        self.assertEqual(self.pokemon2a.possible_moves[5].pp, 19)
+        self.battleField.undo(record)
+
+        results = set()
+        for seed in range(5):
+            random.seed(seed)
+            roll = self.pokemon1a.moves[1].outcomes()[0]
+            record = self.battleField.apply_actions((1, True), (None, True), outcomes={1: roll})
+            results.add(self.pokemon2a.stats.damage)
+            self.battleField.undo(record)
+        self.assertEqual(len(results), 1)
+
+    def test_chance_nodes_search_is_deterministic(self):
+        decisions = set()
+        for seed in range(3):
+            random.seed(seed)
+            decisions.add(IterativeDeepeningMinMax(chance_nodes=True).make_decision(
+                self.battleField, lambda field: -field.active_pokemon_oppo.stats.damage, depth_limit=2))
+        self.assertEqual(len(decisions), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from ai.iterative_search import IterativeDeepeningMinMax
+from ai.transposition import Bound, TranspositionTable, ZobristHasher
+from model.field import BattleFieldSingle
+from model.field_type import Weather
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class TranspositionTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TranspositionTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1b.moves[1] = SingleMove('Growth', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Spa, [(StatsType.Spa, 1)], [], StatsType.Spd, 100, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Hydropump', 1, 110, MoveCategory.Special, 5, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+        self.battleField.weather = Weather.Raindance
+
+    def test_incremental_hash(self):
+        hasher = ZobristHasher(seed=1)
+        field_hash = hasher.hash_field(self.battleField)
+        for bot_action in IterativeDeepeningMinMax.bot_actions(self.battleField):
+            for oppo_action in IterativeDeepeningMinMax.oppo_actions(self.battleField):
+                record = self.battleField.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement)
+                self.assertEqual(hasher.hash_field(self.battleField), hasher.update(field_hash, self.battleField,
+                                                                                    record))
+                self.battleField.undo(record)
+                self.assertEqual(field_hash, hasher.hash_field(self.battleField))
+
+    def test_hash_depends_on_state(self):
+        hasher = ZobristHasher(seed=1)
+        field_hash = hasher.hash_field(self.battleField)
+        new_field = self.battleField.deepcopy()
+        self.assertEqual(field_hash, hasher.hash_field(new_field))
+
+        new_field.active_pokemon_bot.stats.modify(StatsType.Atk, 1)
+        self.assertNotEqual(field_hash, hasher.hash_field(new_field))
+        new_field.active_pokemon_bot.stats.modify(StatsType.Atk, -1)
+        self.assertEqual(field_hash, hasher.hash_field(new_field))
+
+        new_field.update_weather("sunnyday")
+        self.assertNotEqual(field_hash, hasher.hash_field(new_field))
+
+        new_field = self.battleField.deepcopy()
+        new_field.switch_pokemon(2, 2)
+        self.assertNotEqual(field_hash, hasher.hash_field(new_field))
+
+    def test_table_bounds(self):
+        table = TranspositionTable(max_size=2)
+        table.store(1, 10, 2, Bound.Exact, (1, True))
+        table.store(2, 5, 1, Bound.Lower)
+        table.store(3, 5, 1, Bound.Upper)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.evictions, 1)
+        self.assertIsNone(table.probe(1))
+
+        # Lower bound usable only when it beats beta, upper bound only when it is below alpha
+        self.assertEqual(table.lookup(2, 1, 0, 4)[1], 5)
+        self.assertIsNone(table.lookup(2, 1, 0, 6)[1])
+        self.assertEqual(table.lookup(3, 1, 6, 10)[1], 5)
+        self.assertIsNone(table.lookup(3, 1, 0, 10)[1])
+        # Too shallow
+        self.assertIsNone(table.lookup(2, 2, 0, 4)[1])
+        self.assertEqual(table.hits, 5)
+        self.assertEqual(table.cutoffs, 2)
+
+    def test_search_uses_table(self):
+        search = IterativeDeepeningMinMax()
+        # The second iteration finds the nodes of the first one
+        search.make_decision(self.battleField, lambda field: 1, depth_limit=2, time_budget=10)
+        self.assertGreater(len(search.transposition_table), 0)
+        self.assertGreater(search.transposition_table.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from ai.chooser import Chooser
+from ai.iterative_search import IterativeDeepeningMinMax
+from model.field import BattleFieldSingle
+from model.move import SingleMove
+from model.move_type import MoveCategory
+from model.pokemon import Pokemon
+from model.pokemon_type import PokemonType as pk
+from model.stats import Stats
+from model.stats_type import StatsType
+from model.status_type import StatusType
+
+
+class TreeReuseTest(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(TreeReuseTest, self).__init__(*args, **kwargs)
+        self.pokemon1a = Pokemon("Incineroar", [pk.Fire, pk.Dark], "Male", Stats(100, 100, 100, 100, 100, 100), {},
+                                 [], 80.50, StatusType.Normal, [], None, 50)
+        self.pokemon1b = Pokemon("Venusaur", [pk.Grass, pk.Poison], "Male", Stats(80, 82, 83, 100, 100, 80), {}, [],
+                                 100, StatusType.Normal, [], None, 50)
+        self.pokemon2a = Pokemon("Starmie", [pk.Water, pk.Psychic], "Female", Stats(60, 75, 85, 100, 85, 115), {}, [],
+                                 80, StatusType.Normal, [], None, 50)
+        self.pokemon2b = Pokemon("Arbok", [pk.Poison], "Male", Stats(60, 95, 69, 65, 79, 80), {}, [], 65,
+                                 StatusType.Normal, [], None, 50)
+
+        self.pokemon1a.moves[1] = SingleMove('Flamethrower', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Fire,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, ("normal", StatusType.Brn))
+        self.pokemon1a.moves[2] = SingleMove('Swords Dance', 100, 0, MoveCategory.Status, 20, 0, False, 1, pk.Normal,
+                                             StatsType.Atk, [(StatsType.Atk, 2)], [], StatsType.Def, 100, None, None)
+        self.pokemon1b.moves[1] = SingleMove('Energy Ball', 100, 90, MoveCategory.Special, 10, 0, False, 1, pk.Grass,
+                                             StatsType.Spa, [], [], StatsType.Spd, 10, None, None)
+        self.pokemon2a.moves[1] = SingleMove('Surf', 100, 90, MoveCategory.Special, 15, 0, False, 1, pk.Water,
+                                             StatsType.Spa, [], [], StatsType.Spd, 100, None, None)
+        self.pokemon2a.possible_moves[5] = SingleMove('Calm Mind', 100, 0, MoveCategory.Status, 20, 0, False, 1,
+                                                      pk.Psychic, StatsType.Spa, [(StatsType.Spa, 1)], [],
+                                                      StatsType.Spd, 100, None, None)
+        self.pokemon2b.moves[1] = SingleMove('Poison Jab', 100, 80, MoveCategory.Physical, 20, 0, False, 1,
+                                             pk.Poison, StatsType.Atk, [], [], StatsType.Def, 30, None,
+                                             ("normal", StatusType.Psn))
+        self.battleField = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1a, 2: self.pokemon1b},
+                                             {1: self.pokemon2a, 2: self.pokemon2b})
+
+    def play(self, bot_action, oppo_action):
+        """Returns a copy of the field after a turn with the most likely outcomes"""
+        field = self.battleField.deepcopy()
+        _, outcomes = max(field.turn_outcomes(bot_action, oppo_action), key=lambda outcome: outcome[0])
+        field.apply_actions(bot_action, oppo_action, IterativeDeepeningMinMax.replacement, outcomes)
+        return field
+
+    def test_keep_table(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        value = search.make_decision(self.battleField, Chooser.valuation_action, 2)
+        stored = len(search.transposition_table)
+        self.assertEqual(search.make_decision(self.battleField, Chooser.valuation_action, 2, keep_table=True), value)
+        self.assertGreater(search.transposition_table.cutoffs, 0)
+        self.assertEqual(len(search.transposition_table), stored)
+
+        # A new move of the opponent changes the tree under the same hashes
+        self.pokemon2b.moves[2] = SingleMove('Sucker Punch', 100, 70, MoveCategory.Physical, 5, 1, False, 1,
+                                             pk.Dark, StatsType.Atk, [], [], StatsType.Def, 100, None, None)
+        search.make_decision(self.battleField, Chooser.valuation_action, 2, keep_table=True)
+        fresh = IterativeDeepeningMinMax(chance_nodes=True)
+        fresh.make_decision(self.battleField, Chooser.valuation_action, 2)
+        self.assertEqual(search.transposition_table.cutoffs, fresh.transposition_table.cutoffs)
+
+    def test_promote(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        search.make_decision(self.battleField, Chooser.valuation_action, 3)
+        field = self.play((2, True), (5, True))
+        self.assertTrue(search.promote(field, (2, True), "Calm Mind", True))
+        entry = search.transposition_table.probe(search.hasher.hash_field(field))
+        self.assertIsNotNone(entry)
+        self.assertIn(entry.best_action, IterativeDeepeningMinMax.bot_actions(field))
+
+        value = search.make_decision(field, Chooser.valuation_action, 2, keep_table=True)
+        self.assertGreater(search.transposition_table.cutoffs, 0)
+        self.assertIn((value[1], value[2]), IterativeDeepeningMinMax.bot_actions(field))
+
+    def test_promote_unknown(self):
+        search = IterativeDeepeningMinMax(chance_nodes=True)
+        field = self.play((1, True), (1, True))
+        self.assertFalse(search.promote(field, (1, True), "Surf", True))
+        search.make_decision(self.battleField, Chooser.valuation_action, 1)
+        self.assertFalse(search.promote(field, (1, True), "Hydro Pump", True))
+        self.assertFalse(search.promote(field, (1, True), "Mew", False))
+        self.assertTrue(search.promote(field, (1, True), "Surf", True))
+
+    def test_translate_switch(self):
+        field = BattleFieldSingle(self.pokemon1a, self.pokemon2a, {1: self.pokemon1b, 2: self.pokemon1a},
+                                  {1: self.pokemon2a, 2: self.pokemon2b})
+        self.assertEqual(IterativeDeepeningMinMax.translate_action(self.battleField, field, (2, False)), (1, False))
+        self.assertEqual(IterativeDeepeningMinMax.translate_action(self.battleField, field, (2, True)), (2, True))
+        self.assertEqual(IterativeDeepeningMinMax.knowledge(self.battleField), IterativeDeepeningMinMax.knowledge(
+            field))
+
+
+if __name__ == '__main__':
+    unittest.main()
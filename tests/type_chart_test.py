@@ -0,0 +1,44 @@
+import unittest
+
+from model.damage_calculator import DamageCalculator
+from model.pokemon_type import PokemonType as pk
+from model.pokemon_type import TypeMultiplier
+
+
+class TypeChartTest(unittest.TestCase):
+
+    def test_type_ids(self):
+        self.assertEqual(sorted(pokemon_type.type_id for pokemon_type in pk), list(range(18)))
+
+    def test_tables_match_lists(self):
+        for pokemon1 in pk:
+            for pokemon2 in pk:
+                self.assertEqual(DamageCalculator.weak_to(pokemon1, pokemon2),
+                                 pokemon2 in TypeMultiplier.weakTo[pokemon1])
+                self.assertEqual(DamageCalculator.resists_to(pokemon1, pokemon2),
+                                 pokemon2 in TypeMultiplier.resistsTo[pokemon1])
+                self.assertEqual(DamageCalculator.immune_to(pokemon1, pokemon2),
+                                 pokemon2 in TypeMultiplier.immuneTo[pokemon1])
+
+    def test_dual_chart(self):
+        combinations = set()
+        for move_type in pk:
+            for pokemon1 in pk:
+                for pokemon2 in pk:
+                    combinations.add(frozenset((pokemon1, pokemon2)))
+                    self.assertEqual(TypeMultiplier.dual_chart[move_type.type_id][pokemon1.type_id][pokemon2.type_id],
+                                     TypeMultiplier.dual_chart[move_type.type_id][pokemon2.type_id][pokemon1.type_id])
+        self.assertEqual(len(combinations), 171)
+
+    def test_effectiveness(self):
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Water, [pk.Fire]), 2)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Fire, [pk.Grass, pk.Steel]), 4)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Fire, [pk.Water, pk.Dragon]), 0.25)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Electric, [pk.Water, pk.Ground]), 0)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Ground, [pk.Fire, pk.Flying]), 0)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Ice, [pk.Grass, pk.Fire]), 1)
+        self.assertEqual(TypeMultiplier.effectiveness(pk.Rock, [pk.Fire, pk.Flying, pk.Bug]), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()